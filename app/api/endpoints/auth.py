@@ -1,10 +1,13 @@
-from fastapi import APIRouter, HTTPException, Depends, Body
+from fastapi import APIRouter, HTTPException, Depends, Body, Request, BackgroundTasks
 from pydantic import BaseModel, EmailStr
 from typing import Optional
+from app.core.auth import get_current_user
 from app.core.db import supabase
+from app.core.rate_limit import auth_rate_limiter
+from app.services import provisioning
+import asyncio
 import logging
 import os
-import time
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -36,8 +39,9 @@ class ProfileCreateRequest(BaseModel):
     company_name: str
 
 @router.post("/signin")
-async def sign_in(request: SignInRequest):
+async def sign_in(request: SignInRequest, http_request: Request):
     """Sign in with email and password"""
+    await auth_rate_limiter.check(http_request, "signin", request.email)
     try:
         logger.info(f"Sign in attempt for email: {request.email}")
         response = supabase.auth.sign_in_with_password({
@@ -63,8 +67,9 @@ async def sign_in(request: SignInRequest):
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/signup")
-async def sign_up(request: SignUpRequest):
+async def sign_up(request: SignUpRequest, http_request: Request, background_tasks: BackgroundTasks):
     """Sign up with email and password"""
+    await auth_rate_limiter.check(http_request, "signup", request.email)
     try:
         logger.info(f"Sign up attempt for email: {request.email}")
         response = supabase.auth.sign_up({
@@ -72,46 +77,11 @@ async def sign_up(request: SignUpRequest):
             "password": request.password
         })
         
-        if response.error:
-            logger.error(f"Sign up error: {response.error.message}")
-            raise HTTPException(status_code=400, detail=response.error.message)
-        
         if not response.user:
             logger.warning(f"Sign up failed for email: {request.email}")
             raise HTTPException(status_code=400, detail="Failed to create user")
-        
-        # Retry logic for creating user profile
-        for attempt in range(3):
-            profile_data = {
-                "id": response.user.id,
-                "company_name": request.name or "Default Company",
-                "role": "user",  # Default role
-                "created_at": "now()",
-                "updated_at": "now()",
-                "organization_id": None,  # Adjust as needed
-                "email": request.email
-            }
-            logger.info(f"Attempt {attempt + 1}: Inserting profile data: {profile_data}")
-            profile_response = supabase.table("profiles").insert(profile_data).execute()
-            
-            if not profile_response.error:
-                logger.info(f"Profile created successfully for user: {response.user.id}")
-                break
-            
-            logger.error(f"Profile creation error: {profile_response.error.message}")
-            if attempt < 2:
-                logger.info("Retrying profile creation...")
-                time.sleep(3)  # 3-second delay
-            else:
-                raise HTTPException(status_code=400, detail="Failed to create profile after multiple attempts")
-        
-        return {
-            "message": "User created successfully. Please check your email for verification.",
-            "user": {
-                "id": response.user.id,
-                "email": response.user.email
-            }
-        }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Sign up error: {str(e)}")
         raise HTTPException(
@@ -119,9 +89,52 @@ async def sign_up(request: SignUpRequest):
             detail="An error occurred during sign up"
         )
 
+    # Profile and default organization are created by the provisioning outbox,
+    # first right after this response and then with backoff until they succeed
+    try:
+        job = provisioning.enqueue_signup(response.user.id, request.email, request.name)
+        background_tasks.add_task(provisioning.process_job, job)
+        provisioning_status = job["status"]
+    except Exception as e:
+        logger.error(f"Error queueing provisioning for user {response.user.id}: {str(e)}")
+        provisioning_status = "unknown"
+
+    return {
+        "message": "User created successfully. Please check your email for verification.",
+        "user": {
+            "id": response.user.id,
+            "email": response.user.email
+        },
+        "provisioning": {
+            "status": provisioning_status,
+            "status_url": "/api/v1/auth/signup-status"
+        }
+    }
+
+@router.get("/signup-status")
+async def get_signup_status(user_id: str = Depends(get_current_user)):
+    """Whether the current user's profile and default organization have been set up"""
+    try:
+        job = await asyncio.to_thread(provisioning.get_status, user_id)
+    except Exception as e:
+        logger.error(f"Error getting provisioning status for user {user_id}: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if not job:
+        raise HTTPException(status_code=404, detail="No provisioning job for this user")
+    return {
+        "user_id": user_id,
+        "status": job["status"],
+        "finished": job["status"] in ("succeeded", "failed"),
+        "attempts": job["attempts"],
+        "next_attempt_at": job["next_attempt_at"] if job["status"] in ("pending", "running") else None,
+        "completed_at": job.get("completed_at")
+    }
+
 @router.post("/reset-password")
-async def reset_password(request: ResetPasswordRequest):
+async def reset_password(request: ResetPasswordRequest, http_request: Request):
     """Send a password reset email"""
+    await auth_rate_limiter.check(http_request, "reset-password", request.email)
     try:
         logger.info(f"Password reset request for email: {request.email}")
         
@@ -206,8 +219,9 @@ async def debug_token(token: str):
         return {"valid": False, "error": str(e)}
 
 @router.post("/magic-link")
-async def magic_link(request: MagicLinkRequest):
+async def magic_link(request: MagicLinkRequest, http_request: Request):
     """Send magic link for passwordless login"""
+    await auth_rate_limiter.check(http_request, "magic-link", request.email)
     try:
         logger.info(f"Magic link request for email: {request.email}")
         response = supabase.auth.sign_in_with_otp({
@@ -0,0 +1,110 @@
+from fastapi import APIRouter, HTTPException, Depends, Request
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field
+from urllib.parse import urlsplit
+from app.core.auth import get_current_user, AUTHENTICATED_USER_SCOPE_KEY
+from app.core.config import settings
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+# Headers passed from the batch request on to every sub-request
+FORWARDED_HEADERS = {b"authorization", b"user-agent", b"x-forwarded-for"}
+
+
+class BatchItem(BaseModel):
+    id: Optional[str] = None
+    method: str = "GET"
+    path: str = Field(..., description="Path relative to /api/v1, e.g. /portfolios/ or /assets/?portfolio_id=...")
+
+
+class BatchRequest(BaseModel):
+    requests: List[BatchItem]
+
+
+async def _dispatch(request: Request, user_id: str, item: BatchItem) -> Dict[str, Any]:
+    """Run one GET through the application in-process and collect its response"""
+    url = urlsplit(item.path)
+    path = settings.API_V1_STR + "/" + url.path.lstrip("/")
+    scope = {
+        "type": "http",
+        "asgi": request.scope.get("asgi", {"version": "3.0"}),
+        "http_version": request.scope.get("http_version", "1.1"),
+        "method": "GET",
+        "scheme": request.scope.get("scheme", "http"),
+        "server": request.scope.get("server"),
+        "client": request.scope.get("client"),
+        "root_path": request.scope.get("root_path", ""),
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": url.query.encode(),
+        "headers": [(k, v) for k, v in request.scope["headers"] if k in FORWARDED_HEADERS]
+        + [(b"accept", b"application/json")],
+        AUTHENTICATED_USER_SCOPE_KEY: user_id,
+    }
+
+    async def receive() -> Dict[str, Any]:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    status = 500
+    content_type = ""
+    chunks: List[bytes] = []
+
+    async def send(message: Dict[str, Any]) -> None:
+        nonlocal status, content_type
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            for key, value in message.get("headers", []):
+                if key.lower() == b"content-type":
+                    content_type = value.decode("latin-1")
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    try:
+        await request.scope["app"](scope, receive, send)
+    except Exception as e:
+        logger.error(f"Batch sub-request {item.path} failed: {str(e)}")
+        return {"id": item.id, "path": item.path, "status": 500, "body": {"detail": "Internal server error"}}
+
+    raw = b"".join(chunks)
+    if content_type.startswith("application/json") and raw:
+        body: Any = json.loads(raw)
+    else:
+        body = raw.decode("utf-8", errors="replace")
+    return {"id": item.id, "path": item.path, "status": status, "body": body}
+
+
+@router.post("")
+async def run_batch(
+    batch: BatchRequest,
+    request: Request,
+    current_user: str = Depends(get_current_user)
+):
+    """Run several read requests concurrently, authenticating once for all of them"""
+    if not batch.requests:
+        raise HTTPException(status_code=400, detail="Batch must contain at least one request")
+    if len(batch.requests) > settings.BATCH_MAX_REQUESTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch may contain at most {settings.BATCH_MAX_REQUESTS} requests"
+        )
+
+    responses: List[Optional[Dict[str, Any]]] = [None] * len(batch.requests)
+    pending = []
+    for i, item in enumerate(batch.requests):
+        if item.method.upper() != "GET":
+            responses[i] = {"id": item.id, "path": item.path, "status": 405, "body": {"detail": "Only GET requests can be batched"}}
+        elif not item.path.startswith("/") or urlsplit(item.path).path.rstrip("/") == "/batch":
+            responses[i] = {"id": item.id, "path": item.path, "status": 400, "body": {"detail": "Invalid batch path"}}
+        else:
+            pending.append((i, item))
+
+    results = await asyncio.gather(*(_dispatch(request, current_user, item) for _, item in pending))
+    for (i, _), result in zip(pending, results):
+        responses[i] = result
+
+    logger.info("Batch of %d requests for user %s", len(batch.requests), current_user)
+    return {"responses": responses}
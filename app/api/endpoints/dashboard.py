@@ -0,0 +1,80 @@
+from fastapi import APIRouter, HTTPException, Depends
+from typing import Any, Dict, List
+from app.core.auth import get_current_user
+from app.core.db import supabase
+from app.services import rollups
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+PORTFOLIO_COLUMNS = "id,name,description,organization_id,created_at,updated_at"
+
+
+async def _execute(query) -> Any:
+    """Run a blocking Supabase query on a worker thread so several can be in flight at once"""
+    return (await asyncio.to_thread(query.execute)).data
+
+
+@router.get("/")
+async def get_dashboard(current_user: str = Depends(get_current_user)):
+    """Everything the frontend renders at login, in one payload.
+
+    Portfolios and roll-ups are filtered through the user's profile in the
+    database, so none of the three queries waits on another's result.
+    """
+    try:
+        profile, portfolios, portfolio_rollups = await asyncio.gather(
+            _execute(
+                supabase.table("profiles")
+                .select("id,email,first_name,last_name,role,organization_id,organizations(*)")
+                .eq("id", current_user)
+                .limit(1)
+            ),
+            _execute(
+                supabase.table("portfolios")
+                .select(f"{PORTFOLIO_COLUMNS},organizations!inner(profiles!inner(id))")
+                .eq("organizations.profiles.id", current_user)
+                .order("name")
+            ),
+            _execute(
+                supabase.table("portfolio_rollups")
+                .select("portfolio_id,asset_count,floor_area,assets_by_type,organizations!inner(profiles!inner(id))")
+                .eq("organizations.profiles.id", current_user)
+            ),
+        )
+        if not profile:
+            raise HTTPException(status_code=404, detail="Profile not found")
+
+        profile = profile[0]
+        organization = profile.pop("organizations", None)
+        rollup_of = {row["portfolio_id"]: row for row in portfolio_rollups or []}
+
+        summaries: List[Dict[str, Any]] = []
+        totals = {"portfolio_count": 0, "asset_count": 0, "floor_area": 0.0}
+        for portfolio in portfolios or []:
+            portfolio.pop("organizations", None)
+            rollup = rollup_of.get(portfolio["id"]) or rollups.empty_rollup()
+            summaries.append({
+                **portfolio,
+                "asset_count": rollup.get("asset_count") or 0,
+                "floor_area": rollup.get("floor_area") or 0,
+                "assets_by_type": rollup.get("assets_by_type") or {},
+            })
+            totals["portfolio_count"] += 1
+            totals["asset_count"] += rollup.get("asset_count") or 0
+            totals["floor_area"] += float(rollup.get("floor_area") or 0)
+
+        return {
+            "user_id": current_user,
+            "profile": profile,
+            "organization": organization,
+            "portfolios": summaries,
+            "totals": totals
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error building dashboard for user {current_user}: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
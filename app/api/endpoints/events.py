@@ -0,0 +1,25 @@
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from app.core.auth import get_current_user, get_optional_organization_id
+from app.core.events import event_hub
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+@router.get("/")
+async def stream_events(
+    current_user: str = Depends(get_current_user),
+    org_id: Optional[str] = Depends(get_optional_organization_id)
+):
+    """Server-sent events for the organization and the user: `change` (a table's rows changed; refetch or
+    sync it), `job` (progress of background work) and `reset` (the server ended the stream; refetch and reconnect)"""
+    if event_hub.full:
+        raise HTTPException(status_code=503, detail="Too many event streams, please retry shortly", headers={"Retry-After": "5"})
+    return StreamingResponse(
+        event_hub.stream(org_id, current_user),
+        media_type="text/event-stream",
+        # No caching, and no buffering by nginx-style proxies
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,24 @@
+from fastapi import APIRouter
+from datetime import datetime
+import os
+
+router = APIRouter()
+
+@router.get("/")
+async def root():
+    """Root API endpoint"""
+    return {
+        "message": "Welcome to the NetZeroXchange API",
+        "version": "0.1.0",
+        "timestamp": datetime.utcnow().isoformat(),
+        "environment": os.getenv("ENVIRONMENT", "development")
+    }
+
+@router.get("/version")
+async def version():
+    """Get API version information"""
+    return {
+        "version": "0.1.0",
+        "build": "development",
+        "timestamp": datetime.utcnow().isoformat()
+    }
@@ -1,19 +1,30 @@
 from fastapi import APIRouter, HTTPException, Depends
-from typing import List
-from app.core.auth import get_current_user
+from typing import List, Optional
+from app.core.auth import (
+    get_current_user,
+    get_current_organization_id,
+    get_optional_organization_id,
+    forget_organization_id
+)
 from app.core.db import supabase
+from app.core.cache import read_cache
+from app.core.scoping import fetch_scoped_shared, invalidate_scope, profile_tag
 from app.models.organization import Organization, OrganizationCreate
+from app.services import rollups
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 @router.get("/", response_model=List[Organization])
-async def get_organizations(current_user: str = Depends(get_current_user)):
+async def get_organizations(org_id: Optional[str] = Depends(get_optional_organization_id)):
     """Get all organizations for the current user"""
     try:
-        response = supabase.table("organizations").select("*").execute()
-        return response.data
+        if not org_id:
+            return []
+        return await fetch_scoped_shared("organizations", org_id)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting organizations: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
@@ -45,10 +56,23 @@ async def create_organization(
         supabase.table("profiles").update(
             {"organization_id": new_org["id"]}
         ).eq("id", current_user).execute()
+        forget_organization_id(current_user)
+        await read_cache.invalidate(profile_tag(current_user))
+        await invalidate_scope("organizations", new_org["id"])
+        await invalidate_scope("profiles", new_org["id"])
         
         return new_org
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error creating organization: {str(e)}")
-        raise HTTPException(status_code=400, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/summary")
+async def get_organization_summary(org_id: str = Depends(get_current_organization_id)):
+    """Get the materialized roll-up totals for the current user's organization"""
+    try:
+        return rollups.get_organization_rollup(org_id)
+    except Exception as e:
+        logger.error(f"Error getting organization summary: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
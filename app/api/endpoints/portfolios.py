@@ -1,25 +1,25 @@
 from fastapi import APIRouter, HTTPException, Depends
-from typing import List
-from app.core.auth import get_current_user
+from typing import List, Optional
+from app.core.auth import get_current_user, get_current_organization_id, get_optional_organization_id
 from app.core.db import supabase
+from app.core.scoping import fetch_scoped_row, fetch_scoped_shared, invalidate_scope
 from app.models.portfolio import Portfolio, PortfolioCreate
+from app.services import anomalies, bills, rollups
+from app.services import asset_indexes
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 @router.get("/", response_model=List[Portfolio])
-async def get_portfolios(current_user: str = Depends(get_current_user)):
+async def get_portfolios(org_id: Optional[str] = Depends(get_optional_organization_id)):
     """Get all portfolios for the current user's organization"""
     try:
-        # Get user's organization_id
-        user = supabase.table("profiles").select("organization_id").eq("id", current_user).single().execute()
-        if not user.data or not user.data.get("organization_id"):
+        if not org_id:
             return []
-
-        # Get portfolios for the organization
-        response = supabase.table("portfolios").select("*").eq("organization_id", user.data["organization_id"]).execute()
-        return response.data
+        return await fetch_scoped_shared("portfolios", org_id)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting portfolios: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
@@ -41,6 +41,8 @@ async def create_portfolio(
         portfolio_data["organization_id"] = user.data["organization_id"]
         
         response = supabase.table("portfolios").insert(portfolio_data).execute()
+        asset_indexes.register_portfolio(response.data[0]["id"], portfolio_data["organization_id"])
+        await invalidate_scope("portfolios", portfolio_data["organization_id"])
         return response.data[0]
     except HTTPException:
         raise
@@ -48,11 +50,60 @@ async def create_portfolio(
         logger.error(f"Error creating portfolio: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.get("/{portfolio_id}", response_model=Portfolio)
-async def get_portfolio(portfolio_id: str, current_user: str = Depends(get_current_user)):
-    """Get a specific portfolio"""
+@router.get("/{portfolio_id}/summary")
+async def get_portfolio_summary(portfolio_id: str, org_id: str = Depends(get_current_organization_id)):
+    """Get the materialized roll-up totals for a portfolio"""
+    try:
+        if not await fetch_scoped_row("portfolios", org_id, portfolio_id):
+            raise HTTPException(status_code=404, detail="Portfolio not found")
+        return rollups.get_portfolio_rollup(portfolio_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting portfolio summary: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _ensure_portfolio_in_organization(portfolio_id: str, org_id: str) -> None:
+    response = supabase.table("portfolios").select("id").eq("id", portfolio_id).eq("organization_id", org_id).execute()
+    if not response.data:
+        raise HTTPException(status_code=404, detail="Portfolio not found")
+
+@router.post("/{portfolio_id}/anomalies/scan")
+async def scan_portfolio_anomalies(portfolio_id: str, org_id: str = Depends(get_current_organization_id)):
+    """Run meter anomaly detection over every bill series in a portfolio"""
     try:
-        response = supabase.table("portfolios").select("*").eq("id", portfolio_id).single().execute()
+        _ensure_portfolio_in_organization(portfolio_id, org_id)
+        return anomalies.scan_bills(bills.fetch_portfolio_bills(portfolio_id))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error scanning portfolio anomalies: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/{portfolio_id}/anomalies")
+async def get_portfolio_anomalies(portfolio_id: str, org_id: str = Depends(get_current_organization_id)):
+    """List stored meter anomalies for a portfolio"""
+    try:
+        _ensure_portfolio_in_organization(portfolio_id, org_id)
+        response = supabase.table("bill_anomalies").select(
+            "*, assets!inner(portfolio_id)"
+        ).eq("assets.portfolio_id", portfolio_id).order("detected_at", desc=True).execute()
         return response.data
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting portfolio anomalies: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/{portfolio_id}", response_model=Portfolio)
+async def get_portfolio(portfolio_id: str, org_id: Optional[str] = Depends(get_optional_organization_id)):
+    """Get a specific portfolio of the current user's organization"""
+    try:
+        portfolio = await fetch_scoped_row("portfolios", org_id, portfolio_id) if org_id else None
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=404, detail="Portfolio not found") 
\ No newline at end of file
+        raise HTTPException(status_code=404, detail="Portfolio not found")
+    if not portfolio:
+        raise HTTPException(status_code=404, detail="Portfolio not found")
+    return portfolio
@@ -0,0 +1,33 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import Optional
+from app.core.auth import get_current_organization_id
+from app.core.config import settings
+from app.services import sync
+from app.services.sync import CursorExpired
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+@router.get("/{table}")
+async def get_changes(
+    table: str,
+    since: Optional[str] = Query(None, description="Cursor from the previous response; omit to start a full sync"),
+    limit: int = Query(settings.SYNC_PAGE_SIZE, ge=1, le=1000),
+    org_id: str = Depends(get_current_organization_id)
+):
+    """Rows of the organization created, updated or deleted since the cursor, and the cursor to continue from"""
+    if table not in sync.SYNC_TABLES:
+        raise HTTPException(status_code=404, detail=f"Unknown sync table '{table}'")
+    try:
+        return await asyncio.to_thread(sync.fetch_changes, table, org_id, since, limit)
+    except HTTPException:
+        raise
+    except CursorExpired as e:
+        raise HTTPException(status_code=410, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error syncing {table}: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
@@ -1,33 +1,42 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
 from typing import List, Optional
-from app.core.auth import get_current_user
+from app.core.auth import get_current_user, get_optional_organization_id, forget_organization_id
+from app.core.cache import read_cache
 from app.core.db import supabase
+from app.core.scoping import fetch_scoped_shared, invalidate_scope, profile_tag
 from app.models.user import UserProfile, UserUpdate, UserCreate
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+MEMBER_COLUMNS = "id,email,first_name,last_name,created_at,updated_at"
+
+
+def _fetch_profile(user_id: str):
+    return supabase.table("profiles").select("""
+        id,
+        email,
+        first_name,
+        last_name,
+        organization_id,
+        organizations (
+            id,
+            name,
+            domain
+        )
+    """).eq("id", user_id).single().execute().data
+
 @router.get("/me", response_model=UserProfile)
 async def get_current_user_profile(current_user: str = Depends(get_current_user)):
     """Get the current user's profile"""
     try:
-        response = supabase.table("profiles").select("""
-            id,
-            email,
-            first_name,
-            last_name,
-            organization_id,
-            organizations (
-                id,
-                name,
-                domain
-            )
-        """).eq("id", current_user).single().execute()
-        
-        if not response.data:
+        profile = await read_cache.get_or_load(("profile", current_user), [profile_tag(current_user)], _fetch_profile, current_user)
+        if not profile:
             raise HTTPException(status_code=404, detail="Profile not found")
-        return response.data
+        return profile
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting user profile: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
@@ -35,7 +44,8 @@ async def get_current_user_profile(current_user: str = Depends(get_current_user)
 @router.put("/me", response_model=UserProfile)
 async def update_current_user_profile(
     profile_update: UserUpdate,
-    current_user: str = Depends(get_current_user)
+    current_user: str = Depends(get_current_user),
+    previous_org_id: Optional[str] = Depends(get_optional_organization_id)
 ):
     """Update the current user's profile"""
     try:
@@ -51,6 +61,11 @@ async def update_current_user_profile(
         
         if not response.data:
             raise HTTPException(status_code=404, detail="Profile not found")
+        forget_organization_id(current_user)
+        await read_cache.invalidate(profile_tag(current_user))
+        await invalidate_scope("profiles", previous_org_id)
+        if response.data[0].get("organization_id") != previous_org_id:
+            await invalidate_scope("profiles", response.data[0].get("organization_id"))
         return response.data[0]
     except Exception as e:
         logger.error(f"Error updating user profile: {str(e)}")
@@ -59,25 +74,17 @@ async def update_current_user_profile(
 @router.get("/organization/{org_id}/members", response_model=List[UserProfile])
 async def get_organization_members(
     org_id: str,
-    current_user: str = Depends(get_current_user)
+    current_org_id: Optional[str] = Depends(get_optional_organization_id)
 ):
     """Get all members of an organization"""
     try:
         # First verify user belongs to organization
-        user = supabase.table("profiles").select("organization_id").eq("id", current_user).single().execute()
-        if not user.data or user.data["organization_id"] != org_id:
+        if current_org_id != org_id:
             raise HTTPException(status_code=403, detail="Not authorized to view organization members")
 
-        response = supabase.table("profiles").select("""
-            id,
-            email,
-            first_name,
-            last_name,
-            created_at,
-            updated_at
-        """).eq("organization_id", org_id).execute()
-        
-        return response.data
+        return await fetch_scoped_shared("profiles", org_id, MEMBER_COLUMNS)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting organization members: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
@@ -112,6 +119,7 @@ async def invite_user(
             "last_name": invite.last_name,
             "organization_id": user.data["organization_id"]
         }).execute()
+        await invalidate_scope("profiles", user.data["organization_id"])
 
         return profile.data[0]
     except Exception as e:
@@ -0,0 +1,86 @@
+from typing import List, NamedTuple, Optional
+from fastapi import APIRouter, FastAPI
+import importlib
+import os
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class RouteGroup(NamedTuple):
+    prefix: str
+    module: str
+    tags: List[str]
+    development_only: bool = False
+
+
+# Every router of the API, in registration order. main.py includes them all at
+# start-up; the serverless entry point imports each one on its first request.
+ROUTE_GROUPS = [
+    RouteGroup("", "app.api.endpoints.meta", []),
+    RouteGroup("/auth", "app.api.endpoints.auth", ["auth"]),
+    RouteGroup("/assets", "app.api.endpoints.assets", ["assets"]),
+    RouteGroup("/portfolios", "app.api.endpoints.portfolios", ["portfolios"]),
+    RouteGroup("/organizations", "app.api.endpoints.organizations", ["organizations"]),
+    RouteGroup("/users", "app.api.endpoints.users", ["users"]),
+    RouteGroup("/dashboard", "app.api.endpoints.dashboard", ["dashboard"]),
+    RouteGroup("/sync", "app.api.endpoints.sync", ["sync"]),
+    RouteGroup("/events", "app.api.endpoints.events", ["events"]),
+    RouteGroup("/batch", "app.api.endpoints.batch", ["batch"]),
+    RouteGroup("/debug", "app.api.endpoints.debug", ["debug"], development_only=True),
+]
+
+
+def enabled_groups() -> List[RouteGroup]:
+    development = os.getenv("ENVIRONMENT") == "development"
+    return [group for group in ROUTE_GROUPS if development or not group.development_only]
+
+
+def load_router(group: RouteGroup) -> APIRouter:
+    return importlib.import_module(group.module).router
+
+
+class LazyRouteGroups:
+    """ASGI middleware that includes a route group into `fastapi_app` on the first request under its prefix.
+
+    Only the groups a warm instance has actually served are ever imported, so
+    a cold start pays for the route it is handling, not for the whole API.
+    Requests for the OpenAPI schema or docs load every group first. Groups
+    without a prefix cannot be told apart by path and are left to the caller
+    to include eagerly.
+    """
+
+    def __init__(self, app, fastapi_app: FastAPI, api_prefix: str = "/api/v1", groups: Optional[List[RouteGroup]] = None):
+        self.app = app
+        self.fastapi_app = fastapi_app
+        self.api_prefix = api_prefix
+        self.pending = [g for g in (groups if groups is not None else enabled_groups()) if g.prefix]
+        self.load_times_ms = {}
+
+    def _load(self, group: RouteGroup) -> None:
+        started = time.perf_counter()
+        self.fastapi_app.include_router(load_router(group), prefix=self.api_prefix + group.prefix, tags=group.tags)
+        self.fastapi_app.openapi_schema = None
+        self.pending.remove(group)
+        self.load_times_ms[group.module] = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(f"Loaded route group {group.module} in {self.load_times_ms[group.module]} ms")
+
+    def _group_for(self, path: str) -> Optional[RouteGroup]:
+        for group in self.pending:
+            prefix = self.api_prefix + group.prefix
+            if path == prefix or path.startswith(prefix + "/"):
+                return group
+        return None
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "http" and self.pending:
+            path = scope.get("path", "")
+            if path in (self.fastapi_app.openapi_url, self.fastapi_app.docs_url, self.fastapi_app.redoc_url):
+                for group in list(self.pending):
+                    self._load(group)
+            else:
+                group = self._group_for(path)
+                if group is not None:
+                    self._load(group)
+        await self.app(scope, receive, send)
@@ -0,0 +1,187 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import asyncio
+import heapq
+import itertools
+import json
+import math
+import logging
+from app.core.auth import AUTHENTICATED_USER_SCOPE_KEY
+
+logger = logging.getLogger(__name__)
+
+# Never queued or shed: load balancer probes and scrapers must see a live worker
+EXEMPT_PATHS = ("/health", "/stats/", "/metrics")
+# Held open for as long as the client listens; the event hub caps them per worker instead
+STREAM_PATHS = ("/api/v1/events",)
+
+HIGH, NORMAL, BULK = 0, 1, 2
+PRIORITY_NAMES = {HIGH: "high", NORMAL: "normal", BULK: "bulk"}
+
+# (method or None for any, path fragment, priority); first match wins. Fragments
+# starting with /api/ must prefix the path, others may appear anywhere in it
+PRIORITY_RULES: List[Tuple[Optional[str], str, int]] = [
+    (None, "/api/v1/auth/", HIGH),
+    (None, "/api/v1/users/me", HIGH),
+    (None, "/api/v1/dashboard", HIGH),
+    (None, "/export", BULK),
+    (None, "/report", BULK),
+    ("POST", "/documents", BULK),
+    ("POST", "/anomalies/scan", BULK),
+    (None, "/documents/search", BULK),
+]
+
+# Share of the queue each priority may fill; bulk work cannot crowd out interactive requests
+QUEUE_SHARE = {HIGH: 1.0, NORMAL: 1.0, BULK: 0.25}
+
+
+def classify(method: str, path: str) -> int:
+    for rule_method, fragment, priority in PRIORITY_RULES:
+        if rule_method and rule_method != method:
+            continue
+        if path.startswith(fragment) if fragment.startswith("/api/") else fragment in path:
+            return priority
+    return NORMAL
+
+
+class AdmissionController:
+    """Per-worker concurrency limit with a bounded priority queue.
+
+    Up to `max_concurrency` requests run at once. Others wait, highest
+    priority first and FIFO within a priority, for at most `max_wait`
+    seconds; a request that finds its priority's share of the queue full,
+    or times out waiting, is shed. When the whole queue is full, a new
+    request evicts the newest waiter of a less urgent priority, if any.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int, max_wait: float):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.active = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self.queued = {priority: 0 for priority in PRIORITY_NAMES}
+        self.admitted = {priority: 0 for priority in PRIORITY_NAMES}
+        self.shed = {(priority, reason): 0 for priority in PRIORITY_NAMES for reason in ("queue_full", "evicted", "timeout")}
+        self.max_queue_depth = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(self.queued.values())
+
+    async def acquire(self, priority: int) -> Optional[str]:
+        """Take a slot; returns None once admitted, or the reason the request was shed"""
+        if self.active < self.max_concurrency and not self.queue_depth:
+            self.active += 1
+            self.admitted[priority] += 1
+            return None
+
+        if self.queued[priority] >= max(1, int(self.max_queue * QUEUE_SHARE[priority])):
+            self.shed[(priority, "queue_full")] += 1
+            return "queue_full"
+        if self.queue_depth >= self.max_queue and not self._evict_below(priority):
+            self.shed[(priority, "queue_full")] += 1
+            return "queue_full"
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        self.queued[priority] += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        try:
+            # release() hands its slot over by resolving the future with True, so
+            # active is not incremented here; False means a more urgent request took our place
+            if not await asyncio.wait_for(future, self.max_wait):
+                self.shed[(priority, "evicted")] += 1
+                return "evicted"
+        except asyncio.TimeoutError:
+            self.shed[(priority, "timeout")] += 1
+            return "timeout"
+        except asyncio.CancelledError:
+            # Client went away; pass on a slot that was handed over just before
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+        finally:
+            self.queued[priority] -= 1
+        self.admitted[priority] += 1
+        return None
+
+    def _evict_below(self, priority: int) -> bool:
+        """Drop the newest waiter of the least urgent priority below `priority` to make room"""
+        candidates = [w for w in self._waiters if w[0] > priority and not w[2].done()]
+        if not candidates:
+            return False
+        victim = max(candidates, key=lambda w: (w[0], w[1]))
+        victim[2].set_result(False)
+        return True
+
+    def release(self) -> None:
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(True)
+                return
+        self.active -= 1
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.max_wait))
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "max_wait_seconds": self.max_wait,
+            "active": self.active,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "queued": {PRIORITY_NAMES[p]: n for p, n in self.queued.items()},
+            "admitted": {PRIORITY_NAMES[p]: n for p, n in self.admitted.items()},
+            "shed": {
+                PRIORITY_NAMES[p]: {reason: n for (q, reason), n in self.shed.items() if q == p}
+                for p in PRIORITY_NAMES
+            },
+        }
+
+
+class AdmissionMiddleware:
+    """Sheds load with a fast 503 + Retry-After instead of letting requests pile up behind slow upstream calls"""
+
+    def __init__(self, app: Callable, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        path = scope.get("path", "")
+        if (
+            scope["type"] != "http"
+            or path.startswith(EXEMPT_PATHS)
+            or path.startswith(STREAM_PATHS)
+            # Batch sub-requests run inside their parent's slot
+            or AUTHENTICATED_USER_SCOPE_KEY in scope
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        priority = classify(scope.get("method", "GET"), path)
+        reason = await self.controller.acquire(priority)
+        if reason:
+            logger.warning(f"Shed {PRIORITY_NAMES[priority]} request {scope.get('method')} {path}: {reason}")
+            await self._reject(send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release()
+
+    async def _reject(self, send: Callable) -> None:
+        body = json.dumps({"detail": "Server is busy, please retry shortly"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(self.controller.retry_after()).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
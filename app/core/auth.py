@@ -1,15 +1,26 @@
 from fastapi import HTTPException, Depends, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from typing import Dict, Optional, Tuple
 import logging
+import time
+from app.core.broker import broker
 from app.core.db import supabase
+from app.core.singleflight import reads
 import os
 
 logger = logging.getLogger(__name__)
 security = HTTPBearer()
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+# ASGI scope key carrying a user id already verified by the enclosing request (see endpoints/batch.py)
+AUTHENTICATED_USER_SCOPE_KEY = "nzx.authenticated_user"
+
+async def get_current_user(request: Request, credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Simplified auth handler that works with Supabase tokens"""
-    logger.info(f"Authenticating user with token: {credentials.credentials[:10]}...")
+    preauthenticated = request.scope.get(AUTHENTICATED_USER_SCOPE_KEY)
+    if preauthenticated:
+        return preauthenticated
+
+    logger.debug("Authenticating bearer token")
     
     try:
         token = credentials.credentials
@@ -21,9 +32,61 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             logger.error("User not found in token")
             raise HTTPException(status_code=401, detail="Invalid authentication token")
             
-        logger.info(f"User authenticated: {response.user.id}")
+        logger.debug("User authenticated: %s", response.user.id)
         return response.user.id
             
     except Exception as e:
         logger.error(f"Authentication error: {str(e)}")
-        raise HTTPException(status_code=401, detail="Authentication failed") 
\ No newline at end of file
+        raise HTTPException(status_code=401, detail="Authentication failed") 
+
+# user id -> (organization id, monotonic expiry); saves the profile lookup on every scoped request
+ORGANIZATION_CACHE_TTL = 60
+_organization_ids: Dict[str, Tuple[str, float]] = {}
+
+
+MEMBERSHIP_CHANNEL = "membership"
+
+
+def forget_organization_id(user_id: str) -> None:
+    """Drop a cached membership after the user's organization changes, in every worker"""
+    broker.publish(MEMBERSHIP_CHANNEL, {"user_id": user_id})
+
+
+def _on_membership_change(payload: Dict[str, str]) -> None:
+    _organization_ids.pop(payload.get("user_id"), None)
+
+
+broker.subscribe(MEMBERSHIP_CHANNEL, _on_membership_change, on_reset=_organization_ids.clear)
+
+
+def _lookup_organization_id(user_id: str) -> Optional[str]:
+    response = supabase.table("profiles").select("organization_id").eq("id", user_id).single().execute()
+    return response.data.get("organization_id") if response.data else None
+
+
+async def get_optional_organization_id(current_user: str = Depends(get_current_user)) -> Optional[str]:
+    """The current user's organization, or None when they have not joined one yet"""
+    cached = _organization_ids.get(current_user)
+    if cached and cached[1] > time.monotonic():
+        return cached[0]
+
+    try:
+        # A page load fires several requests for the same user at once; one lookup serves them all
+        org_id = await reads.do(("profiles", "organization_id", current_user), _lookup_organization_id, current_user)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error resolving organization for user {current_user}: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if not org_id:
+        return None
+    _organization_ids[current_user] = (org_id, time.monotonic() + ORGANIZATION_CACHE_TTL)
+    return org_id
+
+
+async def get_current_organization_id(org_id: Optional[str] = Depends(get_optional_organization_id)) -> str:
+    """Resolve the organization the current user belongs to"""
+    if not org_id:
+        raise HTTPException(status_code=403, detail="User must belong to an organization")
+    return org_id
@@ -0,0 +1,219 @@
+from typing import Any, Callable, Dict, List, Optional
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import uuid
+import logging
+from app.core.config import settings
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+# Subscriber callbacks take the message payload. They may run on any thread and must not block.
+Callback = Callable[[Dict[str, Any]], None]
+
+
+class _Subscriptions:
+    def __init__(self):
+        self.origin = uuid.uuid4().hex
+        self._callbacks: Dict[str, List[Callback]] = {}
+        self._reset_callbacks: List[Callable[[], None]] = []
+
+    def subscribe(self, channel: str, callback: Callback, on_reset: Optional[Callable[[], None]] = None) -> None:
+        """Call `callback` with every message on `channel`, this worker's own included.
+
+        `on_reset` runs when messages from other workers may have been missed
+        (the log was rotated, the Redis connection dropped), so subscribers
+        holding derived state can drop it.
+        """
+        self._callbacks.setdefault(channel, []).append(callback)
+        if on_reset is not None:
+            self._reset_callbacks.append(on_reset)
+
+    def unsubscribe(self, channel: str, callback: Callback) -> None:
+        callbacks = self._callbacks.get(channel, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+
+    def deliver(self, channel: str, payload: Dict[str, Any]) -> None:
+        for callback in list(self._callbacks.get(channel, [])):
+            try:
+                callback(payload)
+            except Exception as e:
+                logger.error(f"Broker subscriber for {channel} failed: {str(e)}")
+
+    def reset(self) -> None:
+        for callback in list(self._reset_callbacks):
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Broker reset callback failed: {str(e)}")
+
+
+class LocalBroker(_Subscriptions):
+    """Publish/subscribe between the workers of one host; the stand-in when no Redis is configured.
+
+    Messages are delivered to this worker's subscribers straight away and
+    appended as JSON lines to a log file in `directory` that every worker
+    tails from a background thread. Without start() (tests, serverless)
+    delivery is in-process only.
+    """
+
+    def __init__(self, directory: str, poll_interval: float = 0.2, max_bytes: int = 4 * 1024 * 1024):
+        super().__init__()
+        self.path = os.path.join(directory, "broker.log")
+        self.poll_interval = poll_interval
+        self.max_bytes = max_bytes
+        self._offset = 0
+        self._inode = None
+        self._pending = b""
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def publish(self, channel: str, payload: Dict[str, Any]) -> None:
+        self.deliver(channel, payload)
+        if self._thread is None:
+            return
+        line = json.dumps({"channel": channel, "payload": payload, "origin": self.origin}, default=str).encode() + b"\n"
+        try:
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+            try:
+                # One write() in append mode, so lines from different workers do not interleave
+                os.write(fd, line)
+                rotate = os.fstat(fd).st_size > self.max_bytes
+            finally:
+                os.close(fd)
+            if rotate:
+                os.replace(self.path, self.path + ".1")
+        except OSError as e:
+            logger.warning(f"Could not publish {channel} to other workers: {str(e)}")
+
+    def _poll(self) -> None:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return
+        size = stat.st_size
+        if stat.st_ino != self._inode or size < self._offset:
+            # Rotated; whatever was appended to the old file since the last poll is lost
+            self._inode, self._offset, self._pending = stat.st_ino, 0, b""
+            self.reset()
+        if size == self._offset:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read(size - self._offset)
+        self._offset += len(data)
+        *lines, self._pending = (self._pending + data).split(b"\n")
+        for line in lines:
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            if message.get("origin") != self.origin:
+                self.deliver(message["channel"], message["payload"])
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self._poll()
+            except Exception as e:
+                logger.error(f"Broker poll failed: {str(e)}")
+
+    async def start(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "ab"):
+            pass
+        stat = os.stat(self.path)
+        self._inode, self._offset = stat.st_ino, stat.st_size
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="broker-tail", daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        self._thread = None
+
+
+class RedisBroker(_Subscriptions):
+    """Publish/subscribe across every worker and host through Redis pub/sub"""
+
+    def __init__(self, url: str, prefix: str = "nzx:broker:"):
+        super().__init__()
+        self.prefix = prefix
+        self._client = aioredis.from_url(url)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def publish(self, channel: str, payload: Dict[str, Any]) -> None:
+        self.deliver(channel, payload)
+        if self._loop is None:
+            return
+        message = json.dumps({"payload": payload, "origin": self.origin}, default=str)
+        coroutine = self._client.publish(self.prefix + channel, message)
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._loop.create_task(self._send(coroutine, channel))
+        else:
+            # Called from a worker thread (asyncio.to_thread)
+            asyncio.run_coroutine_threadsafe(self._send(coroutine, channel), self._loop)
+
+    async def _send(self, coroutine, channel: str) -> None:
+        try:
+            await coroutine
+        except Exception as e:
+            logger.warning(f"Could not publish {channel} to other workers: {str(e)}")
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                pubsub = self._client.pubsub()
+                await pubsub.psubscribe(self.prefix + "*")
+                async for message in pubsub.listen():
+                    if message.get("type") != "pmessage":
+                        continue
+                    channel = message["channel"].decode()[len(self.prefix):]
+                    body = json.loads(message["data"])
+                    if body.get("origin") != self.origin:
+                        self.deliver(channel, body["payload"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Broker subscription lost, reconnecting: {str(e)}")
+                self.reset()
+                await asyncio.sleep(1.0)
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._loop = None
+
+
+def create_broker():
+    if settings.REDIS_URL and aioredis is not None:
+        return RedisBroker(settings.REDIS_URL)
+    return LocalBroker(
+        settings.BROKER_DIR or os.path.join(tempfile.gettempdir(), "nzx-broker"),
+        poll_interval=settings.BROKER_POLL_SECONDS
+    )
+
+
+broker = create_broker()
@@ -0,0 +1,295 @@
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Tuple
+from collections import OrderedDict
+import asyncio
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import logging
+from app.core.broker import broker
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.singleflight import reads
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "cache-invalidation"
+
+
+class SqliteCacheTier:
+    """Second tier shared by the workers of one host through a SQLite file; the stand-in when no Redis is configured"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._puts = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=OFF")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value TEXT, stored_at REAL, expires_at REAL)"
+            )
+            connection.execute("CREATE TABLE IF NOT EXISTS entry_tags (tag TEXT, key TEXT, UNIQUE (tag, key))")
+            connection.execute("CREATE INDEX IF NOT EXISTS entry_tags_tag ON entry_tags (tag)")
+            self._local.connection = connection
+        return connection
+
+    # The sqlite3 calls block, so each operation runs in a worker thread (with its own connection)
+
+    def _get(self, key: str) -> Optional[Tuple[Any, float]]:
+        row = self._connection().execute(
+            "SELECT value, stored_at FROM entries WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def _put(self, key: str, value: Any, stored_at: float, tags: Iterable[str], ttl: float) -> None:
+        connection = self._connection()
+        with connection:
+            connection.execute("BEGIN")
+            connection.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, default=str), stored_at, stored_at + ttl)
+            )
+            connection.executemany("INSERT OR IGNORE INTO entry_tags VALUES (?, ?)", [(tag, key) for tag in tags])
+            self._puts += 1
+            if self._puts % 500 == 0:
+                connection.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),))
+                connection.execute("DELETE FROM entry_tags WHERE key NOT IN (SELECT key FROM entries)")
+
+    def _invalidate(self, tags: Iterable[str]) -> None:
+        tags = list(tags)
+        marks = ",".join("?" for _ in tags)
+        connection = self._connection()
+        with connection:
+            connection.execute("BEGIN")
+            connection.execute(f"DELETE FROM entries WHERE key IN (SELECT key FROM entry_tags WHERE tag IN ({marks}))", tags)
+            connection.execute(f"DELETE FROM entry_tags WHERE tag IN ({marks})", tags)
+
+    async def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        return await asyncio.to_thread(self._get, key)
+
+    async def put(self, key: str, value: Any, stored_at: float, tags: Iterable[str], ttl: float) -> None:
+        await asyncio.to_thread(self._put, key, value, stored_at, list(tags), ttl)
+
+    async def invalidate(self, tags: Iterable[str]) -> None:
+        await asyncio.to_thread(self._invalidate, list(tags))
+
+
+class RedisCacheTier:
+    """Second tier shared by every worker and host through Redis"""
+
+    def __init__(self, url: str, prefix: str = "nzx:cache:"):
+        self.prefix = prefix
+        self._client = aioredis.from_url(url, socket_timeout=0.25, socket_connect_timeout=0.25)
+
+    async def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        raw = await self._client.get(self.prefix + key)
+        if raw is None:
+            return None
+        entry = json.loads(raw)
+        return entry["value"], entry["stored_at"]
+
+    async def put(self, key: str, value: Any, stored_at: float, tags: Iterable[str], ttl: float) -> None:
+        pipeline = self._client.pipeline(transaction=False)
+        pipeline.set(self.prefix + key, json.dumps({"value": value, "stored_at": stored_at}, default=str), ex=max(1, int(ttl)))
+        for tag in tags:
+            pipeline.sadd(self.prefix + "tag:" + tag, key)
+            pipeline.expire(self.prefix + "tag:" + tag, max(1, int(ttl)))
+        await pipeline.execute()
+
+    async def invalidate(self, tags: Iterable[str]) -> None:
+        for tag in tags:
+            keys = await self._client.smembers(self.prefix + "tag:" + tag)
+            names = [self.prefix + k.decode() for k in keys] + [self.prefix + "tag:" + tag]
+            await self._client.delete(*names)
+
+
+_MISSING = object()
+
+
+class ReadCache:
+    """In-process LRU/TTL cache in front of Supabase reads, with an optional shared second tier.
+
+    Entries carry tags (e.g. "portfolios:<organization id>"); a write calls
+    invalidate() with the tags it affects, which drops matching entries from
+    the shared tier and, through the broker, from every worker's local tier.
+    A read that was loading while its tags were invalidated is not cached.
+    Misses are loaded through the singleflight, so one upstream query fills
+    the cache however many requests missed at once. Cached values are shared
+    between requests and must not be mutated.
+    """
+
+    def __init__(self, name: str, ttl: float, max_entries: int, shared=None):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.shared = shared
+        self._lock = threading.Lock()
+        # key -> (value, stored_at wall clock, expires_at monotonic, tags)
+        self._entries: "OrderedDict[str, Tuple[Any, float, float, Tuple[str, ...]]]" = OrderedDict()
+        self._tag_keys: Dict[str, Set[str]] = {}
+        self._generations: Dict[str, int] = {}
+        self._label = (("cache", name),)
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        broker.subscribe(INVALIDATION_CHANNEL, self._on_invalidation, on_reset=self.clear)
+
+    async def get_or_load(self, key: Tuple[Any, ...], tags: Iterable[str], loader: Callable[..., Any], *args: Any) -> Any:
+        """The cached value for `key`, or `loader(*args)` run in a thread and cached under `tags`"""
+        cache_key = "|".join(str(part) for part in key)
+        tags = tuple(tags)
+        value = self._get_local(cache_key)
+        if value is not _MISSING:
+            return value
+
+        generations = self._generation_snapshot(tags)
+        if self.shared is not None:
+            try:
+                found = await self.shared.get(cache_key)
+            except Exception as e:
+                logger.warning(f"Shared cache read failed: {str(e)}")
+                found = None
+            if found is not None:
+                self.shared_hits += 1
+                registry.inc("nzx_cache_requests_total", self._label + (("tier", "shared"), ("result", "hit")))
+                self._observe_age(found[1])
+                self._put_local(cache_key, found[0], found[1], tags, generations)
+                return found[0]
+
+        if self.shared is not None:
+            registry.inc("nzx_cache_requests_total", self._label + (("tier", "shared"), ("result", "miss")))
+        self.misses += 1
+        value = await reads.do(key, loader, *args)
+        stored_at = time.time()
+        if self._put_local(cache_key, value, stored_at, tags, generations) and self.shared is not None:
+            try:
+                await self.shared.put(cache_key, value, stored_at, tags, self.ttl)
+            except Exception as e:
+                logger.warning(f"Shared cache write failed: {str(e)}")
+        return value
+
+    def _get_local(self, cache_key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None and entry[2] <= time.monotonic():
+                self._drop(cache_key)
+                registry.inc("nzx_cache_evictions_total", self._label + (("reason", "expired"),))
+                entry = None
+            if entry is None:
+                registry.inc("nzx_cache_requests_total", self._label + (("tier", "local"), ("result", "miss")))
+                return _MISSING
+            self._entries.move_to_end(cache_key)
+        self.local_hits += 1
+        registry.inc("nzx_cache_requests_total", self._label + (("tier", "local"), ("result", "hit")))
+        self._observe_age(entry[1])
+        return entry[0]
+
+    def _observe_age(self, stored_at: float) -> None:
+        registry.observe("nzx_cache_hit_age_seconds", self._label, max(0.0, time.time() - stored_at))
+
+    def _generation_snapshot(self, tags: Tuple[str, ...]) -> Tuple[int, ...]:
+        with self._lock:
+            return tuple(self._generations.get(tag, 0) for tag in tags)
+
+    def _put_local(self, cache_key: str, value: Any, stored_at: float, tags: Tuple[str, ...], generations: Tuple[int, ...]) -> bool:
+        with self._lock:
+            if tuple(self._generations.get(tag, 0) for tag in tags) != generations:
+                # Invalidated while loading; the value may predate the write
+                return False
+            self._drop(cache_key)
+            # A value from the shared tier keeps the lifetime it has left there
+            expires_at = time.monotonic() + max(0.0, self.ttl - (time.time() - stored_at))
+            self._entries[cache_key] = (value, stored_at, expires_at, tags)
+            for tag in tags:
+                self._tag_keys.setdefault(tag, set()).add(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                registry.inc("nzx_cache_evictions_total", self._label + (("reason", "lru"),))
+            registry.set("nzx_cache_entries", self._label + (("worker", str(os.getpid())),), len(self._entries))
+        return True
+
+    def _drop(self, cache_key: str) -> None:
+        entry = self._entries.pop(cache_key, None)
+        if entry is not None:
+            for tag in entry[3]:
+                keys = self._tag_keys.get(tag)
+                if keys is not None:
+                    keys.discard(cache_key)
+                    if not keys:
+                        del self._tag_keys[tag]
+
+    def _invalidate_local(self, tags: Iterable[str]) -> int:
+        dropped = 0
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+                for cache_key in list(self._tag_keys.get(tag, ())):
+                    self._drop(cache_key)
+                    dropped += 1
+        if dropped:
+            registry.inc("nzx_cache_evictions_total", self._label + (("reason", "invalidated"),), dropped)
+        return dropped
+
+    def _on_invalidation(self, payload: Dict[str, Any]) -> None:
+        if payload.get("cache") != self.name:
+            return
+        self._invalidate_local(payload.get("tags", []))
+        registry.observe("nzx_cache_invalidation_delay_seconds", self._label, max(0.0, time.time() - payload.get("at", time.time())))
+
+    async def invalidate(self, *tags: str) -> None:
+        """Drop every entry carrying any of `tags`, here, in the shared tier and in every other worker"""
+        tags = [tag for tag in tags if tag]
+        if not tags:
+            return
+        broker.publish(INVALIDATION_CHANNEL, {"cache": self.name, "tags": tags, "at": time.time()})
+        if self.shared is not None:
+            try:
+                await self.shared.invalidate(tags)
+            except Exception as e:
+                logger.warning(f"Shared cache invalidation failed: {str(e)}")
+
+    def clear(self) -> None:
+        """Drop every local entry, e.g. after invalidations from other workers may have been missed"""
+        with self._lock:
+            for tag in list(self._tag_keys):
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+            self._entries.clear()
+            self._tag_keys.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        lookups = self.local_hits + self.shared_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "shared_tier": type(self.shared).__name__ if self.shared else None,
+            "local_hits": self.local_hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "hit_ratio": round((lookups - self.misses) / lookups, 4) if lookups else None,
+        }
+
+
+def create_read_cache() -> ReadCache:
+    shared = None
+    if settings.REDIS_URL and aioredis is not None:
+        shared = RedisCacheTier(settings.REDIS_URL)
+    elif settings.CACHE_SHARED_TIER:
+        shared = SqliteCacheTier(settings.CACHE_SHARED_PATH or os.path.join(tempfile.gettempdir(), "nzx-cache.sqlite3"))
+    return ReadCache("reads", ttl=settings.CACHE_TTL_SECONDS, max_entries=settings.CACHE_MAX_ENTRIES, shared=shared)
+
+
+read_cache = create_read_cache()
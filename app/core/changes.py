@@ -0,0 +1,80 @@
+from typing import Any, Callable, Dict, List, NamedTuple, Tuple
+from datetime import datetime, timezone
+import base64
+import json
+import re
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# (timestamp, id) of the last row sent; an empty id means every row up to the timestamp was sent
+Position = Tuple[datetime, str]
+
+
+class SyncCursor(NamedTuple):
+    rows: Position
+    deleted: Position
+
+
+def parse_timestamp(value: str) -> datetime:
+    """An ISO timestamp from PostgREST or a cursor; Postgres drops trailing zeros that fromisoformat needs before 3.11"""
+    match = re.match(r"^(.+?[T ]\d{2}:\d{2}:\d{2})(?:\.(\d+))?(Z|[+-]\d{2}:?\d{2})?$", value)
+    if not match:
+        raise ValueError(f"Invalid timestamp '{value}'")
+    head, fraction, zone = match.groups()
+    zone = "+00:00" if zone in (None, "Z") else zone
+    if len(zone) == 5:
+        zone = f"{zone[:3]}:{zone[3:]}"
+    text = head.replace(" ", "T") + (f".{(fraction + '000000')[:6]}" if fraction else "") + zone
+    return datetime.fromisoformat(text).astimezone(timezone.utc)
+
+
+def encode_cursor(cursor: SyncCursor) -> str:
+    payload = {
+        "v": 1,
+        "rows": [cursor.rows[0].isoformat(), cursor.rows[1]],
+        "deleted": [cursor.deleted[0].isoformat(), cursor.deleted[1]],
+    }
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(value: str) -> SyncCursor:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(value + "=" * (-len(value) % 4)))
+        return SyncCursor(
+            rows=(parse_timestamp(payload["rows"][0]), str(payload["rows"][1])),
+            deleted=(parse_timestamp(payload["deleted"][0]), str(payload["deleted"][1])),
+        )
+    except (ValueError, KeyError, IndexError, TypeError):
+        raise ValueError("Invalid sync cursor")
+
+
+def fetch_page(
+    build_query: Callable[[], Any],
+    column: str,
+    position: Position,
+    upper: datetime,
+    limit: int,
+) -> Tuple[List[Dict[str, Any]], Position, bool]:
+    """Rows after `position` up to `upper` in (column, id) order, the position after them, and whether more remain.
+
+    Rows sharing the position's timestamp are finished first with an id
+    filter, so a bulk write with one timestamp pages correctly however
+    large it is.
+    """
+    stamp, last_id = position
+    rows: List[Dict[str, Any]] = []
+    if last_id:
+        rows = build_query().eq(column, stamp.isoformat()).gt("id", last_id).order("id").limit(limit).execute().data or []
+    if len(rows) < limit:
+        rows += (
+            build_query()
+            .gt(column, stamp.isoformat())
+            .lte(column, upper.isoformat())
+            .order(f"{column},id")
+            .limit(limit - len(rows))
+            .execute()
+            .data or []
+        )
+    if len(rows) < limit:
+        return rows, (upper, ""), False
+    return rows, (parse_timestamp(rows[-1][column]), rows[-1]["id"]), True
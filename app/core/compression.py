@@ -0,0 +1,345 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from collections import OrderedDict
+import asyncio
+import hashlib
+import threading
+import time
+import zlib
+import logging
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "text/",
+    "image/svg+xml",
+)
+
+# Responses whose body is the same for every caller; their compressed form is cached.
+# Responses carrying an ETag (static files, versioned payloads) are cached as well.
+CACHEABLE_PATHS = (
+    "/api/v1/assets/types",
+    "/api/v1/assets/simple-types",
+)
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Pick br or gzip from an Accept-Encoding header, honouring q-values; None for identity"""
+    offered: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        offered[coding] = q
+
+    wildcard = offered.get("*", 0.0)
+    candidates = []
+    if brotli is not None:
+        candidates.append(("br", offered.get("br", wildcard)))
+    candidates.append(("gzip", offered.get("gzip", wildcard)))
+    best = max(candidates, key=lambda c: c[1])
+    return best[0] if best[1] > 0 else None
+
+
+class _GzipStream:
+    """Incremental gzip; flush() emits everything compressed so far so streamed chunks are not held back"""
+
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliStream:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class CompressedCache:
+    """LRU of compressed bodies keyed by (body digest, encoding), bounded in total bytes"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[bytes, str], bytes]" = OrderedDict()
+        self._size = 0
+
+    def get(self, key: Tuple[bytes, str]) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def put(self, key: Tuple[bytes, str], body: bytes) -> None:
+        if len(body) > self.max_bytes // 8:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = body
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class CompressionStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.responses = 0
+        self.compressed = 0
+        self.streamed = 0
+        self.cache_hits = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_seconds = 0.0
+        self.by_encoding: Dict[str, int] = {}
+
+    def record(self, bytes_in: int, bytes_out: int, encoding: Optional[str] = None,
+               cpu_seconds: float = 0.0, cache_hit: bool = False, streamed: bool = False) -> None:
+        with self._lock:
+            self.responses += 1
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+            self.cpu_seconds += cpu_seconds
+            if encoding:
+                self.compressed += 1
+                self.by_encoding[encoding] = self.by_encoding.get(encoding, 0) + 1
+            if cache_hit:
+                self.cache_hits += 1
+            if streamed:
+                self.streamed += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "responses": self.responses,
+                "compressed": self.compressed,
+                "streamed": self.streamed,
+                "cache_hits": self.cache_hits,
+                "by_encoding": dict(self.by_encoding),
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "bytes_saved": self.bytes_in - self.bytes_out,
+                "ratio": round(self.bytes_out / self.bytes_in, 4) if self.bytes_in else None,
+                "cpu_ms_total": round(self.cpu_seconds * 1000, 3),
+                "cpu_ms_per_compressed_response": (
+                    round(self.cpu_seconds * 1000 / self.compressed, 3) if self.compressed else None
+                ),
+            }
+
+
+compression_stats = CompressionStats()
+
+
+class CompressionMiddleware:
+    """gzip/brotli response compression for the whole ASGI app.
+
+    Bodies sent in one piece are compressed in one go; those of
+    `thread_size` bytes or more in a worker thread, so a large export does
+    not hold up the other requests of the worker. Static and versioned
+    payloads (an ETag or a path in `cacheable_paths`) are compressed once and
+    cached under a digest of the body. Streamed bodies are compressed chunk by chunk and flushed as they go.
+    Responses below `minimum_size`, already encoded or of a non-text type
+    pass through untouched.
+    """
+
+    def __init__(
+        self,
+        app: Callable[..., Awaitable[None]],
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 5,
+        cache_bytes: int = 32 * 1024 * 1024,
+        thread_size: int = 256 * 1024,
+        cacheable_paths: Tuple[str, ...] = CACHEABLE_PATHS,
+        stats: CompressionStats = compression_stats,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.thread_size = thread_size
+        self.cacheable_paths = cacheable_paths
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.cache = CompressedCache(cache_bytes)
+        self.stats = stats
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept = ""
+        for key, value in scope.get("headers", []):
+            if key == b"accept-encoding":
+                accept = value.decode("latin-1")
+                break
+        encoding = negotiate(accept) if accept else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressedResponse(self, encoding, send).run(scope, receive)
+
+    def _stream(self, encoding: str):
+        if encoding == "br":
+            return _BrotliStream(self.brotli_quality)
+        return _GzipStream(self.gzip_level)
+
+    def compress(self, encoding: str, body: bytes) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        compressor = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 31)
+        return compressor.compress(body) + compressor.flush()
+
+    def compress_timed(self, encoding: str, body: bytes) -> Tuple[bytes, float]:
+        """The compressed body and the CPU seconds it took, measured on the thread that ran it"""
+        started = time.thread_time()
+        compressed = self.compress(encoding, body)
+        return compressed, time.thread_time() - started
+
+
+class _CompressedResponse:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Callable):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.send = send
+        self.start: Optional[Dict[str, Any]] = None
+        self.path = ""
+        self.passthrough = False
+        self.stream = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_seconds = 0.0
+
+    async def run(self, scope: Dict[str, Any], receive: Callable) -> None:
+        self.path = scope.get("path", "")
+        await self.middleware.app(scope, receive, self.handle)
+
+    def _header(self, name: bytes) -> Optional[bytes]:
+        for key, value in self.start.get("headers", []):
+            if key.lower() == name:
+                return value
+        return None
+
+    def _headers(self, content_length: Optional[int]) -> List[Tuple[bytes, bytes]]:
+        headers = [
+            (k, v) for k, v in self.start.get("headers", [])
+            if k.lower() not in (b"content-length", b"vary")
+        ]
+        vary = self._header(b"vary")
+        headers.append((b"vary", vary + b", Accept-Encoding" if vary else b"Accept-Encoding"))
+        headers.append((b"content-encoding", self.encoding.encode()))
+        if content_length is not None:
+            headers.append((b"content-length", str(content_length).encode()))
+        etag = self._header(b"etag")
+        if etag:
+            # A compressed representation must not share the identity ETag
+            headers = [(k, v) for k, v in headers if k.lower() != b"etag"]
+            headers.append((b"etag", etag[:-1] + b"-" + self.encoding.encode() + b'"' if etag.endswith(b'"') else etag))
+        return headers
+
+    def _compressible(self) -> bool:
+        if self.start["status"] < 200 or self.start["status"] in (204, 304):
+            return False
+        if self._header(b"content-encoding"):
+            return False
+        content_type = (self._header(b"content-type") or b"").decode("latin-1").lower()
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    async def handle(self, message: Dict[str, Any]) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            self.passthrough = not self._compressible()
+            if self.passthrough:
+                await self.send(message)
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.stream is None and not more_body:
+            await self._send_whole(body)
+        else:
+            await self._send_chunk(body, more_body)
+
+    async def _send_whole(self, body: bytes) -> None:
+        if len(body) < self.middleware.minimum_size:
+            await self.send(self.start)
+            await self.send({"type": "http.response.body", "body": body})
+            self.middleware.stats.record(len(body), len(body))
+            return
+
+        key = None
+        if self._header(b"etag") or self.path.startswith(self.middleware.cacheable_paths):
+            # Keyed on the body, not the ETag: an ETag is not unique across resources or Vary variants
+            key = (hashlib.blake2b(body, digest_size=16).digest(), self.encoding)
+        compressed = self.middleware.cache.get(key) if key else None
+        cache_hit = compressed is not None
+        cpu = 0.0
+        if compressed is None:
+            if len(body) >= self.middleware.thread_size:
+                compressed, cpu = await asyncio.to_thread(self.middleware.compress_timed, self.encoding, body)
+            else:
+                compressed, cpu = self.middleware.compress_timed(self.encoding, body)
+            if key:
+                self.middleware.cache.put(key, compressed)
+
+        if len(compressed) >= len(body):
+            # Incompressible; not worth the client's CPU either
+            await self.send(self.start)
+            await self.send({"type": "http.response.body", "body": body})
+            self.middleware.stats.record(len(body), len(body), cpu_seconds=cpu)
+            return
+
+        await self.send({**self.start, "headers": self._headers(len(compressed))})
+        await self.send({"type": "http.response.body", "body": compressed})
+        self.middleware.stats.record(len(body), len(compressed), self.encoding, cpu, cache_hit)
+
+    async def _send_chunk(self, body: bytes, more_body: bool) -> None:
+        if self.stream is None:
+            self.stream = self.middleware._stream(self.encoding)
+            await self.send({**self.start, "headers": self._headers(None)})
+
+        started = time.thread_time()
+        chunk = self.stream.compress(body) if body else b""
+        if not more_body:
+            chunk += self.stream.finish()
+        self.cpu_seconds += time.thread_time() - started
+        self.bytes_in += len(body)
+        self.bytes_out += len(chunk)
+
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+        if not more_body:
+            self.middleware.stats.record(
+                self.bytes_in, self.bytes_out, self.encoding, self.cpu_seconds, streamed=True
+            )
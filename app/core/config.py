@@ -11,8 +11,11 @@ except ImportError:
 
 from functools import lru_cache
 from typing import Optional, List, Any, Dict
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
 # Function to parse string to list
 def parse_cors_origin(v: Any) -> List[str]:
     if isinstance(v, List):
@@ -48,6 +51,98 @@ class Settings(BaseSettings):
     SUPABASE_KEY: str
     SUPABASE_JWT_SECRET: str | None = None
 
+    # Local full-text index of extracted document text
+    DOCUMENT_INDEX_PATH: str = "var/document_index.sqlite3"
+
+    # Most sub-requests accepted by POST /api/v1/batch
+    BATCH_MAX_REQUESTS: int = 20
+
+    # Responses smaller than this many bytes are sent uncompressed; those of at
+    # least COMPRESSION_THREAD_SIZE bytes are compressed off the event loop
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_THREAD_SIZE: int = 256 * 1024
+
+    # Per-worker admission control: requests running at once, requests allowed
+    # to wait for a slot, and how long they may wait before a 503
+    ADMISSION_MAX_CONCURRENCY: int = 64
+    ADMISSION_MAX_QUEUE: int = 128
+    ADMISSION_MAX_WAIT_SECONDS: float = 5.0
+
+    # Shared store for counters across gunicorn workers (auth rate limits). Without it
+    # every worker keeps its own buckets and the effective limit is multiplied by the
+    # worker count; render.yaml wires it to the nzx-redis service
+    REDIS_URL: Optional[str] = None
+    # Proxies in front of the app that append to X-Forwarded-For
+    TRUSTED_PROXY_COUNT: int = 1
+
+    # Logging: level, "json" or "text" lines, share of requests whose INFO/DEBUG
+    # lines are kept (see ROUTE_SAMPLE_RATES in app/core/logs.py), longest message
+    # written, and records buffered for the writer thread before new ones are dropped
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"
+    LOG_SAMPLE_RATE: float = 1.0
+    LOG_MAX_MESSAGE_CHARS: int = 2000
+    LOG_QUEUE_SIZE: int = 10000
+
+    # Where each worker publishes its metrics for /metrics to sum (default: <tmp>/nzx-metrics),
+    # and how often
+    METRICS_DIR: Optional[str] = None
+    METRICS_WRITE_SECONDS: float = 5.0
+
+    # Upstream call tracing: add a Server-Timing header, log calls slower than this,
+    # warn when a request makes more calls than this or repeats one query shape this often
+    TRACE_SERVER_TIMING: bool = True
+    TRACE_SLOW_CALL_SECONDS: float = 0.5
+    TRACE_MAX_UPSTREAM_CALLS: int = 10
+    TRACE_REPEATED_CALLS: int = 3
+
+    # Longest a coalesced read (and everyone waiting on it) waits for Supabase before a 504
+    SINGLEFLIGHT_TIMEOUT_SECONDS: float = 10.0
+
+    # Read cache: entry lifetime (the staleness bound if an invalidation is lost) and
+    # size per worker. Without REDIS_URL the shared tier is a SQLite file on this
+    # host (CACHE_SHARED_PATH, default <tmp>/nzx-cache.sqlite3)
+    CACHE_TTL_SECONDS: float = 60.0
+    CACHE_MAX_ENTRIES: int = 10000
+    CACHE_SHARED_TIER: bool = True
+    CACHE_SHARED_PATH: Optional[str] = None
+
+    # Cross-worker messages (cache invalidation) without Redis: a log file in this
+    # directory (default <tmp>/nzx-broker), polled this often
+    BROKER_DIR: Optional[str] = None
+    BROKER_POLL_SECONDS: float = 0.2
+
+    # Compiled reference datasets (pathways, emission factors) memory-mapped by every
+    # worker: where published versions live (default <tmp>/nzx-reference) and how
+    # often a worker checks for a newly published one
+    REFERENCE_DATA_DIR: Optional[str] = None
+    REFERENCE_DATA_CHECK_SECONDS: float = 5.0
+
+    # Delta sync (GET /api/v1/sync/{table}): rows per page, how far behind now a page
+    # stops so late-committing writes are not skipped, and how long tombstones are kept
+    SYNC_PAGE_SIZE: int = 500
+    SYNC_SAFETY_LAG_SECONDS: float = 5.0
+    SYNC_TOMBSTONE_RETENTION_DAYS: int = 30
+
+    # Local read replica of organizations, profiles, portfolios and assets: a SQLite
+    # file shared by the workers of a host (REPLICA_PATH, default <tmp>/nzx-replica.sqlite3,
+    # or ":memory:" for one per worker), polled for changes this often. Scoped reads
+    # go upstream instead when it is further behind than REPLICA_MAX_STALENESS_SECONDS
+    REPLICA_ENABLED: bool = False
+    REPLICA_PATH: Optional[str] = None
+    REPLICA_SYNC_SECONDS: float = 2.0
+    REPLICA_MAX_STALENESS_SECONDS: float = 30.0
+
+    # Server-sent events (GET /api/v1/events/): a comment line this often keeps
+    # proxies from closing idle streams; a client that falls EVENTS_MAX_PENDING
+    # distinct events behind is disconnected; each worker holds at most
+    # EVENTS_MAX_STREAMS and ends each after EVENTS_MAX_CONNECTION_SECONDS so
+    # the client reconnects and is authenticated again
+    EVENTS_HEARTBEAT_SECONDS: float = 15.0
+    EVENTS_MAX_PENDING: int = 100
+    EVENTS_MAX_STREAMS: int = 1000
+    EVENTS_MAX_CONNECTION_SECONDS: float = 3600.0
+
     @property
     def CORS_ORIGINS(self) -> List[str]:
         """Parse CORS origins from environment variable or use default"""
@@ -62,7 +157,7 @@ class Settings(BaseSettings):
 def get_settings() -> Settings:
     settings = Settings()
     # Debug info about CORS settings
-    print(f"CORS_ORIGINS type: {type(settings.CORS_ORIGINS)}, value: {settings.CORS_ORIGINS}")
+    logger.debug("CORS_ORIGINS type: %s, value: %s", type(settings.CORS_ORIGINS), settings.CORS_ORIGINS)
     return settings
 
 settings = get_settings() 
\ No newline at end of file
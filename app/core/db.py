@@ -1,10 +1,10 @@
 import os
-from supabase import create_client, Client
 import logging
+import threading
 from dotenv import load_dotenv
 import time
-import httpx
 from app.core.config import settings
+from app.core.upstream import instrument_supabase
 
 # Load environment variables
 load_dotenv()
@@ -13,6 +13,9 @@ logger = logging.getLogger(__name__)
 
 def create_supabase_client(retries=3, delay=1):
     """Create Supabase client with retries"""
+    import httpx
+    from supabase import create_client
+
     SUPABASE_URL = os.getenv("SUPABASE_URL")
     SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
@@ -24,7 +27,7 @@ def create_supabase_client(retries=3, delay=1):
 
     for attempt in range(retries):
         try:
-            client = create_client(SUPABASE_URL, SUPABASE_KEY)
+            client = instrument_supabase(create_client(SUPABASE_URL, SUPABASE_KEY))
             # Test the connection
             if os.getenv("ENVIRONMENT") == "development":
                 client.table("profiles").select("count").execute()
@@ -47,19 +50,44 @@ def get_supabase():
     logger.info(f"Initializing Supabase client with URL: {supabase_url}")
     
     try:
-        return create_client(supabase_url, supabase_key)
+        from supabase import create_client
+
+        return instrument_supabase(create_client(supabase_url, supabase_key))
     except Exception as e:
         logger.error(f"Error creating Supabase client: {str(e)}")
         raise
 
-# Initialize the client
-try:
-    supabase = get_supabase()
-except Exception as e:
-    logger.error(f"Could not initialize Supabase: {str(e)}")
-    # In production, we might want to handle this more gracefully
-    if os.getenv("ENVIRONMENT") == "development":
-        raise
-    else:
-        # In production, we'll initialize with None and handle errors at the endpoint level
-        supabase = None
\ No newline at end of file
+class LazySupabaseClient:
+    """Stands in for the Supabase client and creates it on first use.
+
+    Importing supabase-py (httpx, gotrue, postgrest, realtime, storage) and
+    building the client is the largest part of a cold start, and most
+    serverless invocations that only hit health or reference endpoints never
+    need it. Creation that fails is retried on the next use.
+    """
+
+    def __init__(self):
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _get(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    try:
+                        self._client = get_supabase()
+                    except Exception as e:
+                        logger.error(f"Could not initialize Supabase: {str(e)}")
+                        raise
+        return self._client
+
+    @property
+    def initialized(self) -> bool:
+        return self._client is not None
+
+    def __getattr__(self, name):
+        return getattr(self._get(), name)
+
+
+# Every module imports this one object; the real client is created on first attribute access
+supabase = LazySupabaseClient()
@@ -0,0 +1,217 @@
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+from collections import OrderedDict
+import asyncio
+import json
+import os
+import time
+import logging
+from app.core.auth import MEMBERSHIP_CHANNEL
+from app.core.broker import broker
+from app.core.cache import INVALIDATION_CHANNEL
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.scoping import SCOPES
+
+logger = logging.getLogger(__name__)
+
+EVENTS_CHANNEL = "events"
+
+# Last event of a stream the server ends (too far behind, scope changed, events
+# missed, connection too old); the client refetches what it shows and reconnects
+RESET = "reset"
+HEARTBEAT = b": keepalive\n\n"
+
+
+def format_event(event_type: str, data: Dict[str, Any]) -> bytes:
+    return f"event: {event_type}\ndata: {json.dumps(data, default=str)}\n\n".encode()
+
+
+class EventStream:
+    """Events waiting for one connected client.
+
+    Events carry a key (the table for changes, the job for progress); a
+    newer event replaces a pending one with the same key, so a client that
+    reads slowly gets the latest state rather than every step. One that
+    still falls `max_pending` distinct events behind is closed.
+    """
+
+    def __init__(self, organization_id: Optional[str], user_id: str, max_pending: int):
+        self.organization_id = organization_id
+        self.user_id = user_id
+        self.max_pending = max_pending
+        self.pending: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.closed: Optional[str] = None
+        self._ready = asyncio.Event()
+
+    def offer(self, key: str, event: Dict[str, Any]) -> None:
+        if self.closed:
+            return
+        if key in self.pending:
+            del self.pending[key]
+            registry.inc("nzx_events_coalesced_total", (("type", event["type"]),))
+        elif len(self.pending) >= self.max_pending:
+            self.close("overflow")
+            return
+        self.pending[key] = event
+        self._ready.set()
+
+    def close(self, reason: str) -> None:
+        if not self.closed:
+            self.closed = reason
+            self.pending.clear()
+            self._ready.set()
+
+    async def next(self, timeout: float) -> List[Dict[str, Any]]:
+        """Every pending event, or an empty list after `timeout` seconds without one"""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        self._ready.clear()
+        events = list(self.pending.values())
+        self.pending.clear()
+        return events
+
+
+class EventHub:
+    """Fans job progress and data changes out to this worker's event streams.
+
+    Changes need no publishing of their own: every write already announces
+    the cache tags it invalidates to all workers, and a tag names the table
+    and organization (or user) it covers. Job progress is published on
+    EVENTS_CHANNEL. Broker callbacks can arrive on the broker's thread, so
+    delivery is handed to the event loop the streams run on.
+    """
+
+    def __init__(self, max_streams: int, max_pending: int, heartbeat: float, max_connection: float):
+        self.max_streams = max_streams
+        self.max_pending = max_pending
+        self.heartbeat = heartbeat
+        self.max_connection = max_connection
+        self._streams: Set[EventStream] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._worker = (("worker", str(os.getpid())),)
+        broker.subscribe(EVENTS_CHANNEL, self._on_event, on_reset=self._on_reset)
+        broker.subscribe(INVALIDATION_CHANNEL, self._on_invalidation)
+        broker.subscribe(MEMBERSHIP_CHANNEL, self._on_membership_change)
+
+    def publish(self, event_type: str, key: str, data: Dict[str, Any], organization_id: Optional[str] = None, user_id: Optional[str] = None) -> None:
+        """Send an event to the streams of an organization or of one user, in every worker"""
+        broker.publish(EVENTS_CHANNEL, {
+            "type": event_type, "key": key, "data": data,
+            "organization_id": organization_id, "user_id": user_id, "at": time.time()
+        })
+
+    @property
+    def full(self) -> bool:
+        return len(self._streams) >= self.max_streams
+
+    def open(self, organization_id: Optional[str], user_id: str) -> EventStream:
+        self._loop = asyncio.get_running_loop()
+        stream = EventStream(organization_id, user_id, self.max_pending)
+        self._streams.add(stream)
+        registry.set("nzx_event_streams_open", self._worker, len(self._streams))
+        return stream
+
+    def close(self, stream: EventStream) -> None:
+        self._streams.discard(stream)
+        registry.set("nzx_event_streams_open", self._worker, len(self._streams))
+
+    # Delivery
+
+    def _call_in_loop(self, callback, *args) -> None:
+        if self._loop is None or not self._streams:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            callback(*args)
+        else:
+            self._loop.call_soon_threadsafe(callback, *args)
+
+    def _dispatch(self, event: Dict[str, Any]) -> None:
+        for stream in list(self._streams):
+            if (
+                event.get("organization_id") and event["organization_id"] == stream.organization_id
+                or event.get("user_id") and event["user_id"] == stream.user_id
+            ):
+                stream.offer(event["key"], event)
+
+    def _on_event(self, payload: Dict[str, Any]) -> None:
+        self._call_in_loop(self._dispatch, payload)
+
+    def _on_invalidation(self, payload: Dict[str, Any]) -> None:
+        for tag in payload.get("tags", []):
+            table, _, owner = tag.partition(":")
+            change = {"type": "change", "key": f"change:{tag}", "at": payload.get("at")}
+            if table == "profile":
+                change.update(data={"table": "profiles", "id": owner}, user_id=owner)
+            elif table in SCOPES:
+                change.update(data={"table": table}, organization_id=owner)
+            else:
+                continue
+            self._call_in_loop(self._dispatch, change)
+
+    def _close_user(self, user_id: Optional[str]) -> None:
+        for stream in list(self._streams):
+            if stream.user_id == user_id:
+                # Events are scoped by the organization the stream was opened with
+                stream.close("membership")
+
+    def _on_membership_change(self, payload: Dict[str, str]) -> None:
+        self._call_in_loop(self._close_user, payload.get("user_id"))
+
+    def _reset_all(self) -> None:
+        for stream in list(self._streams):
+            stream.close("missed")
+
+    def _on_reset(self) -> None:
+        # Events from other workers may have been lost; clients refetch rather than trust their state
+        self._call_in_loop(self._reset_all)
+
+    async def stream(self, organization_id: Optional[str], user_id: str) -> AsyncIterator[bytes]:
+        """The text/event-stream body of one connection"""
+        stream = self.open(organization_id, user_id)
+        deadline = time.monotonic() + self.max_connection
+        try:
+            yield format_event("ready", {"organization_id": organization_id, "heartbeat_seconds": self.heartbeat})
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    stream.close("expired")
+                events = await stream.next(min(self.heartbeat, max(remaining, 0)))
+                if stream.closed:
+                    if stream.closed == "overflow":
+                        logger.warning(f"Closed the event stream of user {user_id}: more than {self.max_pending} events behind")
+                    registry.inc("nzx_event_streams_closed_total", (("reason", stream.closed),))
+                    yield format_event(RESET, {"reason": stream.closed})
+                    return
+                if not events:
+                    yield HEARTBEAT
+                    continue
+                for event in events:
+                    registry.inc("nzx_events_sent_total", (("type", event["type"]),))
+                # One write per batch; it waits while the client's socket is full, and
+                # events arriving meanwhile coalesce in the stream
+                yield b"".join(format_event(event["type"], {**event["data"], "at": event["at"]}) for event in events)
+        finally:
+            self.close(stream)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "streams": len(self._streams),
+            "max_streams": self.max_streams,
+            "max_pending": self.max_pending,
+            "pending": sum(len(stream.pending) for stream in self._streams),
+            "heartbeat_seconds": self.heartbeat,
+        }
+
+
+event_hub = EventHub(
+    max_streams=settings.EVENTS_MAX_STREAMS,
+    max_pending=settings.EVENTS_MAX_PENDING,
+    heartbeat=settings.EVENTS_HEARTBEAT_SECONDS,
+    max_connection=settings.EVENTS_MAX_CONNECTION_SECONDS
+)
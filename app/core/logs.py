@@ -0,0 +1,228 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import uuid
+from app.core.config import settings
+
+# Request context, attached to every record logged while the request runs
+request_id_var: contextvars.ContextVar = contextvars.ContextVar("log_request_id", default=None)
+route_var: contextvars.ContextVar = contextvars.ContextVar("log_route", default=None)
+sampled_var: contextvars.ContextVar = contextvars.ContextVar("log_sampled", default=True)
+
+# Share of requests whose DEBUG/INFO records are kept, by path prefix; first match
+# wins, other paths use LOG_SAMPLE_RATE. Warnings and errors are always kept.
+ROUTE_SAMPLE_RATES: List[Tuple[str, float]] = [
+    ("/health", 0.0),
+    ("/api/health", 0.0),
+    ("/stats/", 0.0),
+    ("/metrics", 0.0),
+    ("/api/v1/auth/", 1.0),
+    ("/api/v1/assets/types", 0.01),
+    ("/api/v1/assets/simple-types", 0.01),
+    ("/api/v1/dashboard", 0.1),
+    ("/api/v1/batch", 0.1),
+    ("/api/v1/sync/", 0.1),
+]
+
+# Loggers that install their own synchronous handlers; routed through ours instead
+ADOPTED_LOGGERS = ("uvicorn", "uvicorn.error", "uvicorn.access")
+
+
+def sample_rate(path: str, default: float) -> float:
+    for prefix, rate in ROUTE_SAMPLE_RATES:
+        if path.startswith(prefix):
+            return rate
+    return default
+
+
+def truncate(text: str, limit: int) -> str:
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}... [{len(text) - limit} more chars]"
+
+
+class RequestContextFilter(logging.Filter):
+    """Drops DEBUG/INFO records of unsampled requests and stamps the rest with the request context.
+
+    Runs in the thread that logs, before the record is queued, so it must stay cheap.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING and not sampled_var.get():
+            return False
+        record.request_id = request_id_var.get()
+        record.route = route_var.get()
+        return True
+
+
+class StructuredFormatter(logging.Formatter):
+    """One JSON object (or one plain line) per record, with the message and traceback capped.
+
+    This is where `%`-style arguments are rendered, so with the queue handler a
+    payload passed as an argument is only turned into a string on the listener
+    thread, and only if the record survived level and sampling checks.
+    """
+
+    def __init__(self, output: str = "json", max_chars: int = 2000):
+        super().__init__()
+        self.output = output
+        self.max_chars = max_chars
+
+    def fields(self, record: logging.LogRecord) -> Dict[str, Any]:
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": truncate(record.getMessage(), self.max_chars),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+            entry["route"] = record.route
+        if record.exc_info:
+            entry["exc"] = truncate(self.formatException(record.exc_info), self.max_chars * 4)
+        elif record.exc_text:
+            entry["exc"] = truncate(record.exc_text, self.max_chars * 4)
+        return entry
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = self.fields(record)
+        if self.output == "json":
+            return json.dumps(entry, default=str)
+        context = f" [{entry['request_id']}]" if "request_id" in entry else ""
+        line = f"{entry['ts']} {entry['level']} {entry['logger']}{context} {entry['msg']}"
+        return line + "\n" + entry["exc"] if "exc" in entry else line
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Hands records to the listener thread as they are; never waits on a full queue.
+
+    The stock QueueHandler formats every record in the logging thread before
+    queueing it; here formatting and the write both happen on the listener
+    thread. Records arriving while the queue is full are dropped and counted.
+    Arguments are rendered after the call returns, so pass values that are not
+    mutated afterwards (upstream responses, ids), not a dict being built up.
+    """
+
+    def __init__(self, log_queue: "queue.Queue"):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LoggingPipeline:
+    def __init__(self):
+        self.handler: Optional[logging.Handler] = None
+        self.listener: Optional[logging.handlers.QueueListener] = None
+
+    def setup(self, level: str = "INFO", output: str = "json", max_chars: int = 2000,
+              queue_size: int = 10000, queued: bool = True, stream=None) -> None:
+        """Replace the root handlers with the structured pipeline; safe to call more than once"""
+        self.stop()
+        sink = logging.StreamHandler(stream or sys.stdout)
+        sink.setFormatter(StructuredFormatter(output, max_chars))
+
+        if queued:
+            self.handler = NonBlockingQueueHandler(queue.Queue(maxsize=queue_size))
+            self.listener = logging.handlers.QueueListener(self.handler.queue, sink)
+            self.listener.start()
+        else:
+            # Serverless: the process may be frozen right after the response, so write synchronously
+            self.handler = sink
+        self.handler.addFilter(RequestContextFilter())
+
+        root = logging.getLogger()
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(self.handler)
+        root.setLevel(level.upper())
+        for name in ADOPTED_LOGGERS:
+            adopted = logging.getLogger(name)
+            adopted.handlers = []
+            adopted.propagate = True
+
+    def stop(self) -> None:
+        """Flush whatever is still queued"""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        queued = isinstance(self.handler, NonBlockingQueueHandler)
+        return {
+            "queued": queued,
+            "queue_depth": self.handler.queue.qsize() if queued else 0,
+            "dropped": self.handler.dropped if queued else 0,
+            "level": logging.getLevelName(logging.getLogger().level),
+        }
+
+
+log_pipeline = LoggingPipeline()
+atexit.register(log_pipeline.stop)
+
+
+def setup_logging(queued: bool = True) -> None:
+    """Configure logging from settings"""
+    log_pipeline.setup(
+        level=settings.LOG_LEVEL,
+        output=settings.LOG_FORMAT,
+        max_chars=settings.LOG_MAX_MESSAGE_CHARS,
+        queue_size=settings.LOG_QUEUE_SIZE,
+        queued=queued,
+    )
+
+
+class RequestLogContextMiddleware:
+    """Gives each request an id (X-Request-ID if the client sent one) and decides once whether it is sampled.
+
+    The decision covers the whole request, so a sampled request logs every
+    line and an unsampled one logs only its warnings and errors. Batch
+    sub-requests keep their parent's id and decision.
+    """
+
+    def __init__(self, app: Callable, default_rate: float = 1.0):
+        self.app = app
+        self.default_rate = default_rate
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope.get("path", "")
+        tokens = [(route_var, route_var.set(path))]
+        request_id = request_id_var.get()
+        if request_id is None:
+            for key, value in scope.get("headers", []):
+                if key == b"x-request-id":
+                    request_id = value.decode("latin-1")[:64]
+                    break
+            request_id = request_id or uuid.uuid4().hex[:16]
+            tokens.append((request_id_var, request_id_var.set(request_id)))
+            tokens.append((sampled_var, sampled_var.set(random.random() < sample_rate(path, self.default_rate))))
+
+        async def send_with_id(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-request-id", request_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            for var, token in reversed(tokens):
+                var.reset(token)
@@ -0,0 +1,316 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from bisect import bisect_left
+import asyncio
+import json
+import os
+import threading
+import time
+import logging
+from app.core.upstream import UpstreamCall, add_listener
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+AGE_BUCKETS = (0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+# name -> (type, help, histogram buckets)
+METRICS: Dict[str, Tuple[str, str, Tuple[float, ...]]] = {
+    "nzx_http_requests_total": ("counter", "HTTP requests by method, route template and status", ()),
+    "nzx_http_request_duration_seconds": ("histogram", "HTTP request latency by method and route template", LATENCY_BUCKETS),
+    "nzx_http_requests_in_flight": ("gauge", "HTTP requests being handled, per worker", ()),
+    "nzx_upstream_calls_total": ("counter", "Supabase calls by service, table and operation, and whether they failed", ()),
+    "nzx_upstream_call_duration_seconds": ("histogram", "Supabase call latency by service, table and operation", LATENCY_BUCKETS),
+    "nzx_event_loop_lag_seconds": ("histogram", "How late the event loop woke a periodic timer", LAG_BUCKETS),
+    "nzx_singleflight_requests_total": ("counter", "Coalesced reads by flight; followers are upstream calls saved", ()),
+    "nzx_singleflight_timeouts_total": ("counter", "Coalesced reads that gave up waiting for the upstream call", ()),
+    "nzx_cache_requests_total": ("counter", "Read cache lookups by tier and hit or miss", ()),
+    "nzx_cache_evictions_total": ("counter", "Read cache entries dropped: lru, expired or invalidated", ()),
+    "nzx_cache_entries": ("gauge", "Entries in each worker's local read cache", ()),
+    "nzx_cache_hit_age_seconds": ("histogram", "Age of cached values when served (staleness)", AGE_BUCKETS),
+    "nzx_cache_invalidation_delay_seconds": ("histogram", "Time from a write's invalidation to its arrival in a worker", LAG_BUCKETS),
+    "nzx_replica_reads_total": ("counter", "Scoped reads by table, served from the local replica or upstream", ()),
+    "nzx_replica_rows_applied_total": ("counter", "Changed and deleted rows applied to the local replica", ()),
+    "nzx_replica_lag_seconds": ("gauge", "How far the local replica is behind Supabase after each sync", ()),
+    "nzx_event_streams_open": ("gauge", "Server-sent event streams connected to each worker", ()),
+    "nzx_events_sent_total": ("counter", "Events written to server-sent event streams, by type", ()),
+    "nzx_events_coalesced_total": ("counter", "Events replaced by a newer one with the same key before a slow client read them", ()),
+    "nzx_event_streams_closed_total": ("counter", "Server-sent event streams ended by the server, by reason", ()),
+}
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class MetricsRegistry:
+    """Counters, gauges and fixed-bucket histograms of this process.
+
+    Updating a metric is a dict lookup and an add under one uncontended lock;
+    rendering and cross-worker merging only happen when /metrics is scraped.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self.gauges: Dict[Tuple[str, Labels], float] = {}
+        # (name, labels) -> [count per bucket (last is +Inf), sum]
+        self.histograms: Dict[Tuple[str, Labels], List[Any]] = {}
+
+    def inc(self, name: str, labels: Labels, value: float = 1.0) -> None:
+        key = (name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0.0) + value
+
+    def set(self, name: str, labels: Labels, value: float) -> None:
+        with self._lock:
+            self.gauges[(name, labels)] = value
+
+    def add(self, name: str, labels: Labels, value: float) -> None:
+        key = (name, labels)
+        with self._lock:
+            self.gauges[key] = self.gauges.get(key, 0.0) + value
+
+    def observe(self, name: str, labels: Labels, value: float) -> None:
+        buckets = METRICS[name][2]
+        index = bisect_left(buckets, value)
+        key = (name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [[0] * (len(buckets) + 1), 0.0]
+            histogram[0][index] += 1
+            histogram[1] += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-serializable copy of every series"""
+        with self._lock:
+            return {
+                "counters": [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                "gauges": [[name, list(labels), value] for (name, labels), value in self.gauges.items()],
+                "histograms": [
+                    [name, list(labels), list(counts), total]
+                    for (name, labels), (counts, total) in self.histograms.items()
+                ],
+            }
+
+
+def _labels(pairs: Iterable) -> Labels:
+    return tuple((str(k), str(v)) for k, v in pairs)
+
+
+def merge(snapshots: Iterable[Dict[str, Any]]) -> MetricsRegistry:
+    """Sum counters, gauges and histograms of several workers into one registry"""
+    merged = MetricsRegistry()
+    for snapshot in snapshots:
+        for name, labels, value in snapshot.get("counters", []):
+            merged.inc(name, _labels(labels), value)
+        for name, labels, value in snapshot.get("gauges", []):
+            merged.add(name, _labels(labels), value)
+        for name, labels, counts, total in snapshot.get("histograms", []):
+            key = (name, _labels(labels))
+            histogram = merged.histograms.setdefault(key, [[0] * len(counts), 0.0])
+            histogram[0] = [a + b for a, b in zip(histogram[0], counts)]
+            histogram[1] += total
+    return merged
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _series(name: str, labels: Labels, value: float, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    rendered = ",".join(f'{k}="{_escape(v)}"' for k, v in pairs)
+    return f"{name}{{{rendered}}} {value:g}" if rendered else f"{name} {value:g}"
+
+
+def render(registry: MetricsRegistry) -> str:
+    """Prometheus text exposition format (version 0.0.4)"""
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind == "histogram":
+            for (series, labels), (counts, total) in sorted(registry.histograms.items()):
+                if series != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(list(buckets) + [None], counts):
+                    cumulative += count
+                    le = "+Inf" if bound is None else f"{bound:g}"
+                    lines.append(_series(f"{name}_bucket", labels, cumulative, ("le", le)))
+                lines.append(_series(f"{name}_sum", labels, total))
+                lines.append(_series(f"{name}_count", labels, cumulative))
+        else:
+            values = registry.counters if kind == "counter" else registry.gauges
+            for (series, labels), value in sorted(values.items()):
+                if series == name:
+                    lines.append(_series(name, labels, value))
+    return "\n".join(lines) + "\n"
+
+
+class WorkerMetricsStore:
+    """Shares each worker's metrics with the others through one JSON file per process.
+
+    Every worker rewrites its own file every few seconds and on each scrape;
+    whichever worker answers /metrics sums all files. Counters and histograms
+    of workers that have exited are kept so totals never go backwards; their
+    gauges are dropped. The directory should be empty when the server starts
+    (it lives in the container's temp dir by default, which a deploy resets).
+    """
+
+    def __init__(self, directory: str, registry: MetricsRegistry, interval: float = 5.0):
+        self.directory = directory
+        self.registry = registry
+        self.interval = interval
+        self.pid = os.getpid()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def _path(self, pid: int) -> str:
+        return os.path.join(self.directory, f"worker-{pid}.json")
+
+    def write(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(os.getpid())
+        temporary = f"{path}.tmp"
+        with open(temporary, "w") as f:
+            json.dump(self.registry.snapshot(), f)
+        os.replace(temporary, path)
+
+    @staticmethod
+    def _alive(pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+            return True
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+
+    def collect(self) -> MetricsRegistry:
+        """Merged metrics of every worker, this one read live"""
+        try:
+            self.write()
+        except OSError as e:
+            logger.warning(f"Could not write worker metrics: {str(e)}")
+        snapshots = [self.registry.snapshot()]
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            names = []
+        for filename in names:
+            if not (filename.startswith("worker-") and filename.endswith(".json")):
+                continue
+            pid = int(filename[len("worker-"):-len(".json")])
+            if pid == os.getpid():
+                continue
+            try:
+                with open(os.path.join(self.directory, filename)) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if not self._alive(pid):
+                snapshot["gauges"] = []
+            snapshots.append(snapshot)
+        return merge(snapshots)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.write()
+            except OSError as e:
+                logger.warning(f"Could not write worker metrics: {str(e)}")
+
+    def start(self) -> None:
+        # gunicorn forks workers after the app is imported; the thread must be started in the worker
+        if self._thread is None or self.pid != os.getpid():
+            self.pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="metrics-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        try:
+            self.write()
+        except OSError:
+            pass
+
+
+registry = MetricsRegistry()
+
+
+def record_upstream_call(call: UpstreamCall) -> None:
+    labels = (("service", call.service), ("table", call.table), ("operation", call.operation))
+    outcome = "ok" if call.status is not None and call.status < 400 else "error"
+    registry.inc("nzx_upstream_calls_total", labels + (("outcome", outcome),))
+    registry.observe("nzx_upstream_call_duration_seconds", labels, call.seconds)
+
+
+add_listener(record_upstream_call)
+
+
+async def monitor_event_loop(stop: asyncio.Event, interval: float = 0.5) -> None:
+    """Sleep for `interval` over and over; anything beyond it is time the loop was blocked"""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        started = loop.time()
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+        registry.observe("nzx_event_loop_lag_seconds", (), max(0.0, loop.time() - started - interval))
+
+
+class MetricsMiddleware:
+    """Counts requests and times them per route template (/assets/{asset_id}, not each id).
+
+    Requests that match no route share one label so clients cannot create
+    series at will. Exceptions count as status 500.
+    """
+
+    def __init__(self, app: Callable, registry: MetricsRegistry = registry):
+        self.app = app
+        self.registry = registry
+        self._templates: Dict[Any, str] = {}
+        # Starlette builds the middleware stack on the first request, so this is the worker's pid
+        self._worker = (("worker", str(os.getpid())),)
+
+    def _template(self, scope: Dict[str, Any]) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return UNMATCHED_ROUTE
+        template = self._templates.get(endpoint)
+        if template is None:
+            # Routers can be added after start-up (lazy route groups), so rebuild on a miss
+            for route in getattr(scope.get("app"), "routes", []):
+                self._templates.setdefault(getattr(route, "endpoint", None), getattr(route, "path", UNMATCHED_ROUTE))
+            template = self._templates.get(endpoint, UNMATCHED_ROUTE)
+        return template
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        worker = self._worker
+        self.registry.add("nzx_http_requests_in_flight", worker, 1)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.registry.add("nzx_http_requests_in_flight", worker, -1)
+            labels = (("method", scope.get("method", "")), ("route", self._template(scope)))
+            self.registry.inc("nzx_http_requests_total", labels + (("status", str(status)),))
+            self.registry.observe("nzx_http_request_duration_seconds", labels, elapsed)
@@ -0,0 +1,183 @@
+from typing import Dict, NamedTuple, Optional, Tuple
+import hashlib
+import math
+import os
+import threading
+import time
+import logging
+from fastapi import HTTPException, Request
+from app.core.config import settings
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+
+class Limit(NamedTuple):
+    capacity: int
+    per_seconds: float
+
+    @property
+    def rate(self) -> float:
+        """Tokens refilled per second"""
+        return self.capacity / self.per_seconds
+
+
+# Per action: limit per email address, limit per client IP. A bucket holds
+# `capacity` requests and refills completely over `per_seconds`.
+AUTH_LIMITS: Dict[str, Tuple[Limit, Limit]] = {
+    "signin": (Limit(5, 300), Limit(30, 300)),
+    "signup": (Limit(3, 3600), Limit(10, 3600)),
+    "magic-link": (Limit(3, 900), Limit(20, 900)),
+    "reset-password": (Limit(3, 900), Limit(20, 900)),
+}
+
+
+class MemoryBucketStore:
+    """Token buckets in this process only; the stand-in when no Redis is configured, and for tests"""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    async def take(self, key: str, limit: Limit, now: Optional[float] = None) -> Tuple[bool, float]:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (float(limit.capacity), now))
+            tokens = min(float(limit.capacity), tokens + (now - updated) * limit.rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                allowed, retry_after = True, 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                allowed, retry_after = False, (1 - tokens) / limit.rate
+            if len(self._buckets) > self.max_keys:
+                self._prune(now)
+        return allowed, retry_after
+
+    def _prune(self, now: float) -> None:
+        # Buckets idle long enough to be full again carry no information
+        for key, (tokens, updated) in list(self._buckets.items()):
+            if now - updated > 3600:
+                del self._buckets[key]
+
+
+# Refill, take one token and set the expiry in a single atomic step; time comes
+# from the Redis server so every worker agrees on it
+_TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return {allowed, tostring(retry_after)}
+"""
+
+
+class RedisBucketStore:
+    """Token buckets shared by every gunicorn worker through Redis"""
+
+    def __init__(self, url: str, prefix: str = "nzx:ratelimit:"):
+        self.prefix = prefix
+        self._client = aioredis.from_url(url, socket_timeout=0.25, socket_connect_timeout=0.25)
+        self._script = self._client.register_script(_TAKE_SCRIPT)
+
+    async def take(self, key: str, limit: Limit) -> Tuple[bool, float]:
+        allowed, retry_after = await self._script(keys=[self.prefix + key], args=[limit.capacity, limit.rate])
+        return bool(int(allowed)), float(retry_after)
+
+
+def _fingerprint(value: str) -> str:
+    """Keys never hold raw email addresses or IPs"""
+    return hashlib.sha256(value.encode()).hexdigest()[:32]
+
+
+class AuthRateLimiter:
+    """Per-email and per-IP token buckets in front of the Supabase Auth calls.
+
+    A rejected request costs one bucket lookup and never reaches Supabase.
+    If the shared store is unreachable the limiter falls back to this
+    worker's own buckets rather than failing the request.
+    """
+
+    def __init__(self, store=None, fallback: Optional[MemoryBucketStore] = None, trusted_proxies: int = 1):
+        self.store = store or MemoryBucketStore()
+        self.fallback = fallback or MemoryBucketStore()
+        self.trusted_proxies = trusted_proxies
+        self.allowed = 0
+        self.rejected: Dict[str, int] = {}
+        self.store_errors = 0
+
+    def client_ip(self, request: Request) -> str:
+        """The address the outermost trusted proxy saw; X-Forwarded-For entries before it are client-controlled"""
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded and self.trusted_proxies > 0:
+            hops = [h.strip() for h in forwarded.split(",") if h.strip()]
+            if hops:
+                return hops[max(0, len(hops) - self.trusted_proxies)]
+        return request.client.host if request.client else "unknown"
+
+    async def _take(self, key: str, limit: Limit) -> Tuple[bool, float]:
+        try:
+            return await self.store.take(key, limit)
+        except Exception as e:
+            self.store_errors += 1
+            logger.warning(f"Rate limit store unavailable, using local buckets: {str(e)}")
+            return await self.fallback.take(key, limit)
+
+    async def check(self, request: Request, action: str, email: Optional[str] = None) -> None:
+        """Raise 429 with Retry-After when the client IP or the email address is over its limit"""
+        email_limit, ip_limit = AUTH_LIMITS[action]
+        checks = [("ip", self.client_ip(request), ip_limit)]
+        if email:
+            checks.append(("email", email.strip().lower(), email_limit))
+
+        for kind, value, limit in checks:
+            allowed, retry_after = await self._take(f"{action}:{kind}:{_fingerprint(value)}", limit)
+            if not allowed:
+                self.rejected[f"{action}:{kind}"] = self.rejected.get(f"{action}:{kind}", 0) + 1
+                logger.warning(f"Rate limited {action} by {kind}")
+                raise HTTPException(
+                    status_code=429,
+                    detail="Too many requests, please try again later",
+                    headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+                )
+        self.allowed += 1
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "backend": type(self.store).__name__,
+            "allowed": self.allowed,
+            "rejected": dict(self.rejected),
+            "store_errors": self.store_errors,
+        }
+
+
+def create_auth_rate_limiter() -> AuthRateLimiter:
+    if settings.REDIS_URL and aioredis is not None:
+        return AuthRateLimiter(RedisBucketStore(settings.REDIS_URL), trusted_proxies=settings.TRUSTED_PROXY_COUNT)
+    if settings.REDIS_URL:
+        logger.warning("REDIS_URL is set but the redis package is not installed; auth rate limits are per worker")
+    elif os.getenv("ENVIRONMENT") == "production":
+        logger.warning("REDIS_URL is not set; auth rate limits are per worker, multiplied by the worker count")
+    return AuthRateLimiter(trusted_proxies=settings.TRUSTED_PROXY_COUNT)
+
+
+auth_rate_limiter = create_auth_rate_limiter()
@@ -0,0 +1,275 @@
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+import asyncio
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import logging
+from app.core.broker import broker
+from app.core.cache import INVALIDATION_CHANNEL
+from app.core.changes import EPOCH, SyncCursor, decode_cursor, encode_cursor, fetch_page
+from app.core.config import settings
+from app.core.db import supabase
+from app.core.metrics import registry
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# table -> (column holding the parent's id, parent table), parents first; the chain ends at organizations
+REPLICA_TABLES: Dict[str, Tuple[Optional[str], Optional[str]]] = {
+    "organizations": (None, None),
+    "profiles": ("organization_id", "organizations"),
+    "portfolios": ("organization_id", "organizations"),
+    "assets": ("portfolio_id", "portfolios"),
+    "asset_tenants": ("asset_id", "assets"),
+}
+# Deletes the database cascades, which leave tombstones only for the parent (profiles are unlinked, not deleted)
+CASCADES = {"organizations": ["portfolios"], "portfolios": ["assets"], "assets": ["asset_tenants"]}
+# PostgREST caps a single response at 1000 rows
+PAGE_SIZE = 1000
+
+
+class LocalReplica:
+    """SQLite copy of the organization tables, kept current from their updated_at and tombstones (sql/sync.sql).
+
+    With a file path every worker of the host reads the same replica and
+    one of them, whichever holds the file lock, syncs it; with ":memory:"
+    each worker keeps and syncs its own. A table is served from the replica
+    only while it is at most `max_staleness` seconds behind and has caught
+    up with the last write this worker heard of (through the read cache's
+    invalidations); otherwise reads go to Supabase.
+    """
+
+    def __init__(self, path: str, sync_interval: float = 2.0, max_staleness: float = 30.0, enabled: bool = True):
+        self.path = path
+        self.sync_interval = sync_interval
+        self.max_staleness = max_staleness
+        self.enabled = enabled
+        self._memory = path == ":memory:"
+        self._local = threading.local()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+        self._lock_file = None
+        # table -> wall-clock time of the latest write heard of
+        self._writes: Dict[str, float] = {}
+        self._synced: Tuple[float, Dict[str, float]] = (0.0, {})
+        broker.subscribe(INVALIDATION_CHANNEL, self._on_write)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._memory:
+            connection = sqlite3.connect(":memory:", check_same_thread=False, isolation_level=None)
+        else:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+        for table in REPLICA_TABLES:
+            connection.execute(f'CREATE TABLE IF NOT EXISTS "{table}" (id TEXT PRIMARY KEY, parent_id TEXT, data TEXT NOT NULL)')
+            connection.execute(f'CREATE INDEX IF NOT EXISTS "{table}_parent" ON "{table}" (parent_id)')
+        connection.execute("CREATE TABLE IF NOT EXISTS sync_state (table_name TEXT PRIMARY KEY, cursor TEXT, synced_through REAL)")
+        return connection
+
+    @contextmanager
+    def _db(self) -> Iterator[sqlite3.Connection]:
+        if self._memory:
+            # One connection for the worker; SQLite connections are not safe to share without the lock
+            with self._lock:
+                if self._connection is None:
+                    self._connection = self._connect()
+                yield self._connection
+            return
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = self._connect()
+        yield connection
+
+    def _on_write(self, payload: Dict[str, Any]) -> None:
+        for tag in payload.get("tags", []):
+            table = tag.split(":", 1)[0]
+            if table in REPLICA_TABLES:
+                self._writes[table] = max(self._writes.get(table, 0.0), payload.get("at", time.time()))
+
+    # Syncing
+
+    def sync_once(self) -> int:
+        """Pull every table's changes since its cursor; returns the rows applied"""
+        applied = sum(self._sync_table(table) for table in REPLICA_TABLES)
+        # This worker sees its own progress at once
+        self._synced = (0.0, {})
+        return applied
+
+    def _sync_table(self, table: str) -> int:
+        now = datetime.now(timezone.utc)
+        upper = now - timedelta(seconds=settings.SYNC_SAFETY_LAG_SECONDS)
+        with self._db() as db:
+            state = db.execute("SELECT cursor FROM sync_state WHERE table_name = ?", (table,)).fetchone()
+        cursor = decode_cursor(state[0]) if state else None
+        if cursor is None or cursor.deleted[0] < now - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS):
+            # First sync, or deletions since the cursor may have been purged: copy the table afresh
+            if cursor is not None:
+                logger.warning(f"Replica of {table} is older than the tombstones kept; resyncing it")
+            cursor = SyncCursor(rows=(EPOCH, ""), deleted=(upper, ""))
+            with self._db() as db:
+                db.execute("BEGIN")
+                db.execute(f'DELETE FROM "{table}"')
+                # Not served again until the copy is complete
+                db.execute("DELETE FROM sync_state WHERE table_name = ?", (table,))
+                db.execute("COMMIT")
+
+        applied = 0
+        while True:
+            items, rows_position, more_items = fetch_page(
+                lambda: supabase.table(table).select("*"),
+                "updated_at", cursor.rows, max(upper, cursor.rows[0]), PAGE_SIZE
+            )
+            tombstones, deleted_position, more_deleted = fetch_page(
+                lambda: supabase.table("sync_tombstones").select("id,row_id,deleted_at").eq("table_name", table),
+                "deleted_at", cursor.deleted, max(upper, cursor.deleted[0]), PAGE_SIZE
+            )
+            cursor = SyncCursor(rows_position, deleted_position)
+            caught_up = not (more_items or more_deleted)
+            self._apply(table, items, [t["row_id"] for t in tombstones], cursor, upper.timestamp() if caught_up else None)
+            applied += len(items) + len(tombstones)
+            if caught_up:
+                break
+        if applied:
+            registry.inc("nzx_replica_rows_applied_total", (("table", table),), applied)
+        registry.set("nzx_replica_lag_seconds", (("table", table), ("worker", str(os.getpid()))), time.time() - upper.timestamp())
+        return applied
+
+    def _apply(self, table: str, items: List[Dict[str, Any]], deleted: List[str], cursor: SyncCursor, synced_through: Optional[float]) -> None:
+        parent_column = REPLICA_TABLES[table][0]
+        with self._db() as db:
+            db.execute("BEGIN")
+            try:
+                db.executemany(
+                    f'INSERT OR REPLACE INTO "{table}" (id, parent_id, data) VALUES (?, ?, ?)',
+                    [(row["id"], row.get(parent_column) if parent_column else None, json.dumps(row, default=str)) for row in items]
+                )
+                self._delete(db, table, deleted)
+                # A page that did not reach the end keeps the previous synced_through
+                db.execute(
+                    "INSERT INTO sync_state VALUES (?, ?, ?) ON CONFLICT (table_name) DO UPDATE SET "
+                    "cursor = excluded.cursor, synced_through = COALESCE(excluded.synced_through, sync_state.synced_through)",
+                    (table, encode_cursor(cursor), synced_through)
+                )
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+
+    def _delete(self, db: sqlite3.Connection, table: str, ids: List[str]) -> None:
+        if not ids:
+            return
+        marks = ",".join("?" for _ in ids)
+        db.execute(f'DELETE FROM "{table}" WHERE id IN ({marks})', ids)
+        for child in CASCADES.get(table, []):
+            children = [row[0] for row in db.execute(f'SELECT id FROM "{child}" WHERE parent_id IN ({marks})', ids)]
+            self._delete(db, child, children)
+
+    def _claim_sync(self) -> bool:
+        """Whether this worker syncs; with a shared file, only the holder of its lock does"""
+        if self._memory or fcntl is None or self._lock_file is not None:
+            return True
+        lock_file = open(f"{self.path}.lock", "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        logger.info(f"Worker {os.getpid()} is syncing the replica at {self.path}")
+        return True
+
+    async def run(self, stop: asyncio.Event) -> None:
+        """Keep the replica current until `stop` is set"""
+        while not stop.is_set():
+            if self._claim_sync():
+                try:
+                    await asyncio.to_thread(self.sync_once)
+                except Exception as e:
+                    logger.warning(f"Replica sync failed: {str(e)}")
+            try:
+                await asyncio.wait_for(stop.wait(), self.sync_interval)
+            except asyncio.TimeoutError:
+                pass
+        if self._lock_file is not None:
+            # Closing the file releases the lock for another worker
+            self._lock_file.close()
+            self._lock_file = None
+
+    # Reading
+
+    def synced_through(self) -> Dict[str, float]:
+        """table -> time up to which every change has been applied; re-read at most once a second"""
+        checked_at, synced = self._synced
+        if time.monotonic() - checked_at > 1.0:
+            with self._db() as db:
+                synced = {
+                    table: through
+                    for table, through in db.execute("SELECT table_name, synced_through FROM sync_state")
+                    if through is not None
+                }
+            self._synced = (time.monotonic(), synced)
+        return synced
+
+    def serves(self, table: str) -> bool:
+        """Whether reads of `table` should come from the replica right now, counting the decision"""
+        fresh = False
+        if self.enabled and table in REPLICA_TABLES:
+            through = self.synced_through().get(table)
+            fresh = (
+                through is not None
+                and through >= time.time() - self.max_staleness
+                and through >= self._writes.get(table, 0.0)
+            )
+            registry.inc("nzx_replica_reads_total", (("table", table), ("source", "replica" if fresh else "upstream")))
+        return fresh
+
+    def _scope_sql(self, table: str) -> str:
+        if table == "organizations":
+            return 'SELECT t0.data FROM "organizations" t0 WHERE t0.id = ?'
+        # Join up through the parents to the one that carries organization_id
+        joins, alias, parent = [], 0, REPLICA_TABLES[table][1]
+        while parent != "organizations":
+            joins.append(f'JOIN "{parent}" t{alias + 1} ON t{alias + 1}.id = t{alias}.parent_id')
+            alias, parent = alias + 1, REPLICA_TABLES[parent][1]
+        return f'SELECT t0.data FROM "{table}" t0 {" ".join(joins)} WHERE t{alias}.parent_id = ?'
+
+    def fetch_scoped(self, table: str, organization_id: str, columns: str = "*", filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """An organization's rows in `table` matching `filters`, shaped like a PostgREST select of `columns`"""
+        with self._db() as db:
+            rows = [json.loads(data) for (data,) in db.execute(self._scope_sql(table), (organization_id,))]
+        if filters:
+            rows = [row for row in rows if all(row.get(column) == value for column, value in filters.items())]
+        if columns.strip() != "*":
+            names = [c.strip() for c in columns.split(",") if c.strip()]
+            rows = [{name: row.get(name) for name in names} for row in rows]
+        return rows
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.time()
+        synced = self.synced_through() if self.enabled else {}
+        return {
+            "enabled": self.enabled,
+            "path": self.path,
+            "syncing": self.enabled and (self._memory or self._lock_file is not None),
+            "max_staleness_seconds": self.max_staleness,
+            "lag_seconds": {table: round(now - through, 1) for table, through in synced.items()},
+        }
+
+
+replica = LocalReplica(
+    settings.REPLICA_PATH or os.path.join(tempfile.gettempdir(), "nzx-replica.sqlite3"),
+    sync_interval=settings.REPLICA_SYNC_SECONDS,
+    max_staleness=settings.REPLICA_MAX_STALENESS_SECONDS,
+    enabled=settings.REPLICA_ENABLED
+)
@@ -0,0 +1,99 @@
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+from app.core.db import supabase
+from app.core.cache import read_cache
+from app.core.replica import replica
+from app.core.singleflight import normalize_columns
+import logging
+
+logger = logging.getLogger(__name__)
+
+# How each table reaches its owning organization: the embedded resource that
+# joins it there (empty when the table carries organization_id itself) and the
+# column the organization filter is applied to
+SCOPES: Dict[str, Tuple[str, str]] = {
+    "organizations": ("", "id"),
+    "profiles": ("", "organization_id"),
+    "portfolios": ("", "organization_id"),
+    "portfolio_rollups": ("", "organization_id"),
+    "organization_rollups": ("", "organization_id"),
+    "assets": ("portfolios!inner(organization_id)", "portfolios.organization_id"),
+    "asset_tenants": ("assets!inner(portfolios!inner(organization_id))", "assets.portfolios.organization_id"),
+    "energy_bills": ("assets!inner(portfolios!inner(organization_id))", "assets.portfolios.organization_id"),
+    "bill_anomalies": ("assets!inner(portfolios!inner(organization_id))", "assets.portfolios.organization_id"),
+    "asset_documents": ("assets!inner(portfolios!inner(organization_id))", "assets.portfolios.organization_id"),
+    "sync_tombstones": ("", "organization_id"),
+}
+
+
+def scoped_select(table: str, organization_id: str, columns: str = "*") -> Any:
+    """Select from `table` restricted to one organization's rows.
+
+    The restriction is a filter (through inner joins where the table has no
+    organization_id of its own) evaluated by the database, so the rows read
+    and returned grow with the organization's data, not with the table.
+    """
+    if table not in SCOPES:
+        raise KeyError(f"Table '{table}' has no organization scope")
+    if not organization_id:
+        raise ValueError("An organization id is required for scoped reads")
+    embed, column = SCOPES[table]
+    select = f"{columns},{embed}" if embed else columns
+    return supabase.table(table).select(select).eq(column, organization_id)
+
+
+def strip_scope(table: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Drop the embedded join a scoped select adds to every row"""
+    embed = SCOPES[table][0]
+    if embed:
+        key = embed.split("!", 1)[0]
+        for row in rows:
+            row.pop(key, None)
+    return rows
+
+
+def scope_tag(table: str, organization_id: str) -> str:
+    """Cache tag of everything read from `table` for one organization"""
+    return f"{table}:{organization_id}"
+
+
+def profile_tag(user_id: str) -> str:
+    """Cache tag of one user's own profile (GET /users/me)"""
+    return f"profile:{user_id}"
+
+
+def fetch_scoped(table: str, organization_id: str, columns: str = "*", filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """All of an organization's rows in `table` (matching `filters`), in one upstream query"""
+    query = scoped_select(table, organization_id, columns)
+    for column, value in sorted((filters or {}).items()):
+        query = query.eq(column, value)
+    return strip_scope(table, query.execute().data or [])
+
+
+async def fetch_scoped_shared(table: str, organization_id: str, columns: str = "*", filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """fetch_scoped from the local replica when it is current, else through the read cache;
+    concurrent misses are served by one upstream query"""
+    if replica.serves(table):
+        return await asyncio.to_thread(replica.fetch_scoped, table, organization_id, columns, filters)
+    key = (table, organization_id, normalize_columns(columns), tuple(sorted((filters or {}).items())))
+    return await read_cache.get_or_load(key, [scope_tag(table, organization_id)], fetch_scoped, table, organization_id, columns, filters)
+
+
+def _fetch_scoped_row(table: str, organization_id: str, row_id: str, columns: str) -> Optional[Dict[str, Any]]:
+    rows = strip_scope(table, scoped_select(table, organization_id, columns).eq("id", row_id).execute().data or [])
+    return rows[0] if rows else None
+
+
+async def fetch_scoped_row(table: str, organization_id: str, row_id: str, columns: str = "*") -> Optional[Dict[str, Any]]:
+    """One row by id if it belongs to the organization, else None; read from the replica or through the cache"""
+    if replica.serves(table):
+        rows = await asyncio.to_thread(replica.fetch_scoped, table, organization_id, columns, {"id": row_id})
+        return rows[0] if rows else None
+    key = (table, organization_id, normalize_columns(columns), row_id)
+    return await read_cache.get_or_load(key, [scope_tag(table, organization_id)], _fetch_scoped_row, table, organization_id, row_id, columns)
+
+
+async def invalidate_scope(table: str, organization_id: Optional[str]) -> None:
+    """Drop cached reads of an organization's rows in `table` after a write, in every worker"""
+    if organization_id:
+        await read_cache.invalidate(scope_tag(table, organization_id))
@@ -0,0 +1,61 @@
+from typing import Any, Callable, Dict, Hashable, Tuple
+import asyncio
+import copy
+import logging
+from fastapi import HTTPException
+from app.core.config import settings
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Coalesces identical concurrent reads within a worker.
+
+    The first caller for a key (the leader) runs the blocking read in a
+    thread; callers arriving while it is in flight wait for the same result
+    instead of issuing their own upstream call. Keys must include everything
+    that changes the result, including the organization the read is scoped
+    to. Waiters get their own copy of the result so none can mutate another's.
+    """
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Tuple[Hashable, ...], fn: Callable[..., Any], *args: Any) -> Any:
+        """Run `fn(*args)` once for every concurrent caller with this key; key[0] labels the metrics"""
+        label = (("flight", str(key[0])),)
+        task = self._inflight.get(key)
+        leader = task is None
+        if leader:
+            # A task of its own, so the read still completes for the followers if the leader is cancelled
+            task = asyncio.ensure_future(asyncio.to_thread(fn, *args))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        registry.inc("nzx_singleflight_requests_total", label + (("role", "leader" if leader else "follower"),))
+
+        try:
+            result = await asyncio.wait_for(asyncio.shield(task), self.timeout)
+        except asyncio.TimeoutError:
+            # Later callers start a fresh read rather than join one that may be stuck
+            self._forget(key, task)
+            registry.inc("nzx_singleflight_timeouts_total", label)
+            logger.warning("Coalesced read %s timed out after %.1f s", key[0], self.timeout)
+            raise HTTPException(status_code=504, detail="Upstream read timed out")
+        return result if leader else copy.deepcopy(result)
+
+    def _forget(self, key: Tuple[Hashable, ...], task: asyncio.Future) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if task.done() and not task.cancelled():
+            # Every caller may have timed out; mark a failure as retrieved so it is not reported as unhandled
+            task.exception()
+
+
+def normalize_columns(columns: str) -> str:
+    """Select lists that differ only in order or whitespace read the same data"""
+    return ",".join(sorted(c.strip() for c in columns.split(",") if c.strip()))
+
+
+reads = SingleFlight(timeout=settings.SINGLEFLIGHT_TIMEOUT_SECONDS)
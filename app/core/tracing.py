@@ -0,0 +1,137 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from collections import Counter
+import contextvars
+import threading
+import time
+import logging
+from app.core.config import settings
+from app.core.upstream import UpstreamCall, add_listener
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTrace:
+    """The upstream calls made while handling one request, including from worker threads"""
+
+    def __init__(self, parent: Optional["RequestTrace"] = None):
+        self.parent = parent
+        self.started = time.perf_counter()
+        self.spans: List[UpstreamCall] = []
+        # Calls of batch sub-requests: timed here, checked for problems in their own trace
+        self.nested: List[UpstreamCall] = []
+        self._lock = threading.Lock()
+
+    def add(self, call: UpstreamCall, nested: bool = False) -> None:
+        with self._lock:
+            (self.nested if nested else self.spans).append(call)
+        if self.parent is not None:
+            self.parent.add(call, nested=True)
+
+    def by_service(self) -> Dict[str, Tuple[int, float]]:
+        """service -> (calls, summed seconds)"""
+        summary: Dict[str, Tuple[int, float]] = {}
+        for span in self.spans + self.nested:
+            calls, seconds = summary.get(span.service, (0, 0.0))
+            summary[span.service] = (calls + 1, seconds + span.seconds)
+        return summary
+
+    def server_timing(self) -> str:
+        entries = [
+            f'{service};dur={seconds * 1000:.1f};desc="{calls} call{"s" if calls != 1 else ""}"'
+            for service, (calls, seconds) in sorted(self.by_service().items())
+        ]
+        entries.append(f"app;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(entries)
+
+
+# Set for the duration of each request; asyncio.to_thread copies it into the worker thread
+current_trace: contextvars.ContextVar = contextvars.ContextVar("request_trace", default=None)
+
+
+def query_shape(query: str) -> str:
+    """A PostgREST query string with filter values removed: id=eq.42&select=* -> id=eq&select=*"""
+    if not query:
+        return ""
+    parts = []
+    for part in query.split("&"):
+        key, _, value = part.partition("=")
+        if key in ("select", "order", "limit", "offset", "on_conflict", "columns"):
+            parts.append(part)
+        else:
+            parts.append(f"{key}={value.split('.', 1)[0]}")
+    return "&".join(sorted(parts))
+
+
+def find_problems(spans: List[UpstreamCall], max_calls: int, repeat_threshold: int) -> List[str]:
+    """Identical reads, the same query repeated with different values (N+1), and too many calls overall"""
+    problems = []
+    duplicates = Counter(
+        (s.service, s.table, s.query) for s in spans if s.operation in ("select", "get", "download")
+    )
+    for (service, table, query), count in duplicates.items():
+        if count > 1:
+            problems.append(f"same {service} read of {table} ran {count} times ({query or 'no filters'})")
+
+    shapes: Dict[Tuple[str, str, str, str], set] = {}
+    for s in spans:
+        shapes.setdefault((s.service, s.table, s.operation, query_shape(s.query)), set()).add(s.query)
+    for (service, table, operation, shape), queries in shapes.items():
+        if len(queries) >= repeat_threshold:
+            problems.append(
+                f"N+1: {len(queries)} {operation} calls on {service} {table} differing only in values ({shape})"
+            )
+
+    if len(spans) > max_calls:
+        problems.append(f"{len(spans)} upstream calls (limit {max_calls})")
+    return problems
+
+
+def record_span(call: UpstreamCall) -> None:
+    trace = current_trace.get()
+    if trace is not None:
+        trace.add(call)
+    if call.seconds >= settings.TRACE_SLOW_CALL_SECONDS:
+        logger.warning(
+            "Slow upstream call: %s %s %s took %.0f ms (status %s) %s",
+            call.service, call.operation, call.table, call.seconds * 1000, call.status, call.query
+        )
+
+
+add_listener(record_span)
+
+
+class TracingMiddleware:
+    """Traces the upstream calls of each request and reports them in a Server-Timing header.
+
+    After the response, logs a warning if the request repeated a read, made
+    N+1 calls or went over TRACE_MAX_UPSTREAM_CALLS. Batch sub-requests are
+    checked on their own; their calls only count towards the enclosing
+    request's Server-Timing.
+    """
+
+    def __init__(self, app: Callable, server_timing: bool = True):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = RequestTrace(parent=current_trace.get())
+        token = current_trace.set(trace)
+
+        async def send_with_timing(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start" and self.server_timing:
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", trace.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_trace.reset(token)
+            problems = find_problems(trace.spans, settings.TRACE_MAX_UPSTREAM_CALLS, settings.TRACE_REPEATED_CALLS)
+            for problem in problems:
+                logger.warning("%s %s: %s", scope.get("method"), scope.get("path"), problem)
@@ -0,0 +1,90 @@
+from typing import Any, Callable, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlsplit
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamCall(NamedTuple):
+    service: str  # rest, auth or storage
+    table: str  # table, rpc function, storage bucket or auth endpoint
+    operation: str  # select, insert, upsert, update, delete, rpc, upload, download, ...
+    status: Optional[int]  # None when no response came back
+    started: float  # time.perf_counter() at send
+    seconds: float
+    query: str = ""  # query string of REST calls: filters, select list, order
+
+
+# Called with every finished upstream call, from whichever thread made it
+_listeners: List[Callable[[UpstreamCall], None]] = []
+
+_REST_OPERATIONS = {"GET": "select", "HEAD": "select", "PATCH": "update", "DELETE": "delete"}
+_STORAGE_OPERATIONS = {"POST": "upload", "PUT": "update", "GET": "download", "DELETE": "remove"}
+
+
+def add_listener(listener: Callable[[UpstreamCall], None]) -> None:
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def classify(method: str, url: str, prefer: str = "") -> Tuple[str, str, str]:
+    """(service, table, operation) of a Supabase HTTP request"""
+    parts = [p for p in urlsplit(url).path.split("/") if p]
+    if len(parts) >= 3 and parts[:2] == ["rest", "v1"]:
+        if parts[2] == "rpc" and len(parts) > 3:
+            return "rest", parts[3], "rpc"
+        if method == "POST":
+            return "rest", parts[2], "upsert" if "resolution=" in prefer else "insert"
+        return "rest", parts[2], _REST_OPERATIONS.get(method, method.lower())
+    if len(parts) >= 2 and parts[:2] == ["auth", "v1"]:
+        return "auth", parts[2] if len(parts) > 2 else "", method.lower()
+    if len(parts) >= 2 and parts[:2] == ["storage", "v1"]:
+        if len(parts) > 3 and parts[2] == "object":
+            # /object/sign/<bucket>/..., /object/public/<bucket>/... or /object/<bucket>/...
+            if parts[3] in ("sign", "public", "authenticated", "list", "move", "copy") and len(parts) > 4:
+                return "storage", parts[4], parts[3]
+            return "storage", parts[3], _STORAGE_OPERATIONS.get(method, method.lower())
+        return "storage", parts[2] if len(parts) > 2 else "", method.lower()
+    return "other", "", method.lower()
+
+
+def _notify(call: UpstreamCall) -> None:
+    for listener in _listeners:
+        try:
+            listener(call)
+        except Exception as e:
+            logger.warning(f"Upstream call listener failed: {str(e)}")
+
+
+def instrument_http_client(http_client: Any) -> None:
+    """Report every request sent through an httpx.Client to the listeners"""
+    if getattr(http_client, "_nzx_instrumented", False):
+        return
+    send = http_client.send
+
+    def instrumented_send(request, *args, **kwargs):
+        service, table, operation = classify(request.method, str(request.url), request.headers.get("prefer", ""))
+        query = request.url.query.decode("latin-1") if service == "rest" else ""
+        started = time.perf_counter()
+        status = None
+        try:
+            response = send(request, *args, **kwargs)
+            status = response.status_code
+            return response
+        finally:
+            _notify(UpstreamCall(service, table, operation, status, started, time.perf_counter() - started, query))
+
+    http_client.send = instrumented_send
+    http_client._nzx_instrumented = True
+
+
+def instrument_supabase(client: Any) -> Any:
+    """Instrument the HTTP clients behind a supabase-py Client's REST, auth and storage APIs"""
+    for owner, attribute in ((client.postgrest, "session"), (client.auth, "_http_client"), (client.storage, "_client")):
+        http_client = getattr(owner, attribute, None)
+        if http_client is not None:
+            instrument_http_client(http_client)
+        else:
+            logger.warning(f"Cannot instrument {type(owner).__name__}: no {attribute}")
+    return client
@@ -2,7 +2,8 @@
 from .organization import Organization, OrganizationCreate, OrganizationBase
 from .user import UserProfile, UserCreate, UserUpdate
 from .portfolio import Portfolio, PortfolioCreate, PortfolioBase
-from .asset import Asset, AssetCreate, AssetType
+from .asset import Asset, AssetCreate, AssetUpdate, AssetType
+from .bill import EnergyBill, EnergyBillCreate
 
 __all__ = [
     'Organization',
@@ -16,5 +17,8 @@ __all__ = [
     'PortfolioBase',
     'Asset',
     'AssetCreate',
-    'AssetType'
+    'AssetUpdate',
+    'AssetType',
+    'EnergyBill',
+    'EnergyBillCreate'
 ]
\ No newline at end of file
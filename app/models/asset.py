@@ -41,10 +41,25 @@ class AssetBase(BaseModel):
     portfolio_id: str
     floor_area: Optional[float] = None
     occupancy_rate: Optional[float] = None
+    region: Optional[str] = None
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
 
 class AssetCreate(AssetBase):
     pass
 
+class AssetUpdate(BaseModel):
+    name: Optional[str] = None
+    description: Optional[str] = None
+    address: Optional[str] = None
+    asset_type: Optional[AssetType] = None
+    portfolio_id: Optional[str] = None
+    floor_area: Optional[float] = None
+    occupancy_rate: Optional[float] = None
+    region: Optional[str] = None
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
+
 class Asset(AssetBase):
     id: str
     created_at: Optional[datetime] = None
@@ -0,0 +1,27 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import date, datetime
+
+class EnergyBillBase(BaseModel):
+    billing_period_start: date
+    billing_period_end: date
+    consumption_kwh: float
+    emissions_kgco2e: Optional[float] = None
+    previous_reading: Optional[float] = None
+    current_reading: Optional[float] = None
+    meter_id: Optional[str] = None
+    provider: Optional[str] = None
+    total_amount: Optional[float] = None
+    document_id: Optional[str] = None
+
+class EnergyBillCreate(EnergyBillBase):
+    pass
+
+class EnergyBill(EnergyBillBase):
+    id: str
+    asset_id: str
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
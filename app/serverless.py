@@ -0,0 +1,59 @@
+"""Entry point for serverless platforms (Vercel, AWS Lambda).
+
+Built for cold starts: route groups are imported on the first request that
+needs them (see app/api/route_groups.py) and the Supabase client is created
+on first use (see app/core/db.py). Measure with scripts/profile_cold_start.py.
+"""
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from mangum import Mangum
+from app.api.route_groups import LazyRouteGroups, enabled_groups, load_router
+from app.core.compression import CompressionMiddleware
+from app.core.config import settings
+from app.core.logs import RequestLogContextMiddleware, setup_logging
+from app.core.tracing import TracingMiddleware
+import os
+import time
+
+setup_logging(queued=False)
+
+app = FastAPI(
+    title="NZX API",
+    description="API for NetZeroXchange platform",
+    version="1.0.0"
+)
+
+app.add_middleware(LazyRouteGroups, fastapi_app=app, api_prefix=settings.API_V1_STR)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=settings.CORS_ORIGINS,
+    allow_credentials=True,
+    allow_methods=[m.strip() for m in settings.CORS_METHODS.split(",")],
+    allow_headers=[h.strip() for h in settings.CORS_HEADERS.split(",")],
+)
+
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MINIMUM_SIZE)
+
+app.add_middleware(TracingMiddleware, server_timing=settings.TRACE_SERVER_TIMING)
+
+app.add_middleware(RequestLogContextMiddleware, default_rate=settings.LOG_SAMPLE_RATE)
+
+# Groups without a prefix (root and version) are tiny and always loaded
+for group in enabled_groups():
+    if not group.prefix:
+        app.include_router(load_router(group), prefix=settings.API_V1_STR, tags=group.tags)
+
+@app.get("/health")
+@app.get("/api/health")
+async def health_check():
+    """Health check endpoint; never loads a route group or the Supabase client"""
+    return {
+        "status": "ok",
+        "environment": os.environ.get("ENVIRONMENT", "production"),
+        "timestamp": time.time()
+    }
+
+# AWS Lambda / API Gateway; Vercel's Python runtime serves `app` directly.
+# Lambda freezes the process between invocations, so no lifespan tasks are run.
+handler = Mangum(app, lifespan="off")
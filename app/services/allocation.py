@@ -0,0 +1,185 @@
+from typing import Any, Dict, List, Optional, Tuple
+import threading
+import numpy as np
+import logging
+from app.services.pathways import grid_emission_factor
+from app.services.reference_data import reference_data
+
+logger = logging.getLogger(__name__)
+
+# Open-ended leases run until this date for overlap arithmetic
+OPEN_LEASE_END = np.datetime64("9999-12-31")
+
+
+def _dates(rows: List[Dict[str, Any]], field: str, default: Optional[np.datetime64] = None) -> np.ndarray:
+    values = [str(r[field])[:10] if r.get(field) else None for r in rows]
+    return np.array([v if v else default for v in values], dtype="datetime64[D]")
+
+
+def allocate(
+    asset: Dict[str, Any],
+    tenants: List[Dict[str, Any]],
+    bills: List[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    """Split each bill's consumption and emissions across the asset's tenants.
+
+    A tenant's share of a billing period is its occupied area times the days its
+    lease overlaps the period, divided by the asset's floor area times the period
+    length. Whatever is not leased is reported as unallocated (landlord/vacant).
+    When the asset has no floor area, or tenants report more area than the asset
+    has, the shares are normalised by the total leased area-days instead.
+    """
+    if not bills:
+        return []
+
+    bill_start = _dates(bills, "billing_period_start")
+    bill_end = _dates(bills, "billing_period_end")
+    period_days = ((bill_end - bill_start).astype(np.int64) + 1).astype(float)
+    consumption = np.array([float(b.get("consumption_kwh") or 0) for b in bills])
+    reported = np.array([np.nan if b.get("emissions_kgco2e") is None else float(b["emissions_kgco2e"]) for b in bills])
+    emissions = np.where(np.isnan(reported), consumption * grid_emission_factor(asset.get("region")), reported)
+
+    if tenants:
+        lease_start = _dates(tenants, "lease_start_date")
+        lease_end = _dates(tenants, "lease_end_date", OPEN_LEASE_END)
+        area = np.array([float(t.get("area_occupied") or 0) for t in tenants])
+
+        # tenants x bills matrix of overlapping days, inclusive of both end dates
+        overlap_start = np.maximum(lease_start[:, None], bill_start[None, :])
+        overlap_end = np.minimum(lease_end[:, None], bill_end[None, :])
+        overlap_days = np.clip((overlap_end - overlap_start).astype(np.int64) + 1, 0, None).astype(float)
+        area_days = area[:, None] * overlap_days
+    else:
+        overlap_days = np.zeros((0, len(bills)))
+        area_days = np.zeros((0, len(bills)))
+
+    leased = area_days.sum(axis=0)
+    floor_area = float(asset.get("floor_area") or 0)
+    capacity = np.maximum(floor_area * period_days, leased) if floor_area > 0 else leased
+    with np.errstate(invalid="ignore", divide="ignore"):
+        shares = np.where(capacity > 0, area_days / capacity, 0.0)
+    unallocated = 1.0 - shares.sum(axis=0)
+
+    results = []
+    for j, bill in enumerate(bills):
+        allocations = [
+            {
+                "asset_tenant_id": tenant.get("id"),
+                "tenant_id": tenant.get("tenant_id"),
+                "floor_number": tenant.get("floor_number"),
+                "area_occupied": tenant.get("area_occupied"),
+                "overlap_days": int(overlap_days[i, j]),
+                "share": round(float(shares[i, j]), 6),
+                "consumption_kwh": round(float(shares[i, j] * consumption[j]), 3),
+                "emissions_kgco2e": round(float(shares[i, j] * emissions[j]), 3),
+            }
+            for i, tenant in enumerate(tenants)
+            if overlap_days[i, j] > 0
+        ]
+        results.append({
+            "bill_id": bill.get("id"),
+            "billing_period_start": str(bill_start[j]),
+            "billing_period_end": str(bill_end[j]),
+            "consumption_kwh": float(consumption[j]),
+            "emissions_kgco2e": round(float(emissions[j]), 3),
+            "tenants": allocations,
+            "unallocated_share": round(float(unallocated[j]), 6),
+            "unallocated_consumption_kwh": round(float(unallocated[j] * consumption[j]), 3),
+        })
+    return results
+
+
+def tenancy_fingerprint(asset: Dict[str, Any], tenants: List[Dict[str, Any]]) -> Tuple:
+    """Everything an allocation depends on besides the bill itself"""
+    return (
+        # Emission factors come from the reference data; a newly published version recomputes
+        reference_data.current().version,
+        asset.get("floor_area"),
+        asset.get("region"),
+        tuple(sorted(
+            (
+                str(t.get("id")),
+                t.get("area_occupied"),
+                str(t.get("lease_start_date")),
+                str(t.get("lease_end_date")),
+            )
+            for t in tenants
+        )),
+    )
+
+
+def _bill_key(bill: Dict[str, Any]) -> Tuple:
+    return (
+        str(bill.get("id")),
+        str(bill["billing_period_start"])[:10],
+        str(bill["billing_period_end"])[:10],
+        bill.get("consumption_kwh"),
+        bill.get("emissions_kgco2e"),
+    )
+
+
+class AllocationCache:
+    """Per-asset cache of billing-period allocations.
+
+    Entries are keyed by bill and remember the tenancy fingerprint they were
+    computed from, so a tenancy change made by another worker is never served
+    stale; `invalidate_asset` frees the entries eagerly on local changes.
+    """
+
+    def __init__(self, max_assets: int = 5000):
+        self.max_assets = max_assets
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[Tuple, Tuple[Tuple, Dict[str, Any]]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(
+        self,
+        asset: Dict[str, Any],
+        tenants: List[Dict[str, Any]],
+        bills: List[Dict[str, Any]],
+    ) -> List[Dict[str, Any]]:
+        asset_id = str(asset["id"])
+        fingerprint = tenancy_fingerprint(asset, tenants)
+        with self._lock:
+            cached = self._entries.get(asset_id, {})
+            results: Dict[Tuple, Dict[str, Any]] = {}
+            missing = []
+            for bill in bills:
+                key = _bill_key(bill)
+                entry = cached.get(key)
+                if entry and entry[0] == fingerprint:
+                    results[key] = entry[1]
+                else:
+                    missing.append(bill)
+            self.hits += len(results)
+            self.misses += len(missing)
+
+        if missing:
+            computed = allocate(asset, tenants, missing)
+            with self._lock:
+                if asset_id not in self._entries and len(self._entries) >= self.max_assets:
+                    self._entries.pop(next(iter(self._entries)))
+                entries = self._entries.setdefault(asset_id, {})
+                for bill, allocation in zip(missing, computed):
+                    entries[_bill_key(bill)] = (fingerprint, allocation)
+                    results[_bill_key(bill)] = allocation
+
+        ordered = [results[_bill_key(bill)] for bill in bills]
+        return sorted(ordered, key=lambda a: a["billing_period_start"])
+
+    def invalidate_asset(self, asset_id: str) -> None:
+        with self._lock:
+            self._entries.pop(str(asset_id), None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "assets": len(self._entries),
+                "entries": sum(len(e) for e in self._entries.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+allocation_cache = AllocationCache()
@@ -0,0 +1,190 @@
+from typing import Any, Callable, Dict, List, Optional
+from datetime import datetime
+from app.core.db import supabase
+from app.services.bills import PAGE_SIZE
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLDS = {
+    "gap_days": 1,            # days allowed between one period's end and the next start
+    "reading_tolerance": 0.5,  # absolute kWh slack for reading/consumption comparisons
+    "mismatch_ratio": 0.02,   # relative slack between consumption and reading delta
+    "window": 6,              # trailing bills used for the rolling baseline
+    "min_periods": 3,         # bills needed before the rolling baseline is trusted
+    "z_threshold": 3.0,       # rolling z-score that counts as a spike or drop
+    "seasonal_ratio": 1.5,    # year-on-year daily usage ratio that counts as a deviation
+}
+
+
+def _to_days(bills: List[Dict[str, Any]], field: str) -> np.ndarray:
+    """Dates as integer days since the epoch"""
+    return np.array([str(b[field])[:10] for b in bills], dtype="datetime64[D]").astype(np.int64)
+
+
+def _column(bills: List[Dict[str, Any]], field: str) -> np.ndarray:
+    return np.array([np.nan if b.get(field) is None else float(b[field]) for b in bills], dtype=float)
+
+
+def _rolling_stats(values: np.ndarray, group_start: np.ndarray, window: int):
+    """Trailing mean/std/count over the previous `window` values of each group, excluding the current one"""
+    idx = np.arange(len(values))
+    lo = np.maximum(group_start, idx - window)
+    count = idx - lo
+
+    clean = np.nan_to_num(values)
+    valid = (~np.isnan(values)).astype(float)
+    cs = np.concatenate(([0.0], np.cumsum(clean)))
+    cs2 = np.concatenate(([0.0], np.cumsum(clean * clean)))
+    cn = np.concatenate(([0.0], np.cumsum(valid)))
+
+    n = cn[idx] - cn[lo]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = (cs[idx] - cs[lo]) / n
+        var = (cs2[idx] - cs2[lo]) / n - mean * mean
+    std = np.sqrt(np.clip(var, 0.0, None))
+    return mean, std, n
+
+
+def detect_anomalies(bills: List[Dict[str, Any]], thresholds: Optional[Dict[str, float]] = None) -> List[Dict[str, Any]]:
+    """Flag gaps, rollbacks, mismatches, spikes and seasonal deviations across all meter series at once.
+
+    A series is one (asset_id, meter_id) pair; every check is computed as an array
+    operation over the concatenation of all series, so cost is a handful of passes
+    over the bills regardless of how many meters they span.
+    """
+    if not bills:
+        return []
+    t = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+
+    series_keys = [f"{b.get('asset_id')}:{b.get('meter_id') or ''}" for b in bills]
+    _, series = np.unique(np.array(series_keys), return_inverse=True)
+    start = _to_days(bills, "billing_period_start")
+    end = _to_days(bills, "billing_period_end")
+
+    order = np.lexsort((start, series))
+    series, start, end = series[order], start[order], end[order]
+    ordered = [bills[i] for i in order]
+    consumption = _column(ordered, "consumption_kwh")
+    previous = _column(ordered, "previous_reading")
+    current = _column(ordered, "current_reading")
+
+    n = len(ordered)
+    idx = np.arange(n)
+    first = np.r_[True, series[1:] != series[:-1]]
+    group_start = np.maximum.accumulate(np.where(first, idx, 0))
+    prev_end = np.r_[0, end[:-1]]
+    prev_current = np.r_[np.nan, current[:-1]]
+
+    flags: List[Dict[str, Any]] = []
+
+    def flag(mask: np.ndarray, anomaly_type: str, reason: Callable[[int], str], scores: np.ndarray):
+        # Only flagged rows reach Python; reasons are formatted lazily per hit
+        for i in np.flatnonzero(mask):
+            bill = ordered[i]
+            flags.append({
+                "bill_id": bill.get("id"),
+                "asset_id": bill.get("asset_id"),
+                "meter_id": bill.get("meter_id"),
+                "billing_period_start": str(bill["billing_period_start"])[:10],
+                "anomaly_type": anomaly_type,
+                "reason": reason(i),
+                "score": None if np.isnan(scores[i]) else round(float(scores[i]), 4),
+            })
+
+    # Gaps and overlaps between consecutive billing periods
+    gap = start - prev_end - 1
+    gap_mask = ~first & (gap > t["gap_days"])
+    overlap_mask = ~first & (gap < -t["gap_days"])
+    flag(gap_mask, "gap", lambda i: f"{gap[i]} day(s) missing before this period", gap.astype(float))
+    flag(overlap_mask, "overlap", lambda i: f"{-gap[i]} day(s) overlap with previous period", -gap.astype(float))
+
+    # Meter rollbacks, within a bill and across consecutive bills
+    tol = t["reading_tolerance"]
+    with np.errstate(invalid="ignore"):
+        within = current < previous - tol
+        across = ~first & (previous < prev_current - tol)
+    rollback_drop = np.where(within, previous - current, prev_current - previous)
+    flag(
+        within | across,
+        "rollback",
+        lambda i: (
+            f"current reading {current[i]:g} below previous {previous[i]:g}" if within[i]
+            else f"opening reading {previous[i]:g} below prior closing {prev_current[i]:g}"
+        ),
+        rollback_drop,
+    )
+
+    # Consumption that doesn't match the reading delta
+    delta = current - previous
+    with np.errstate(invalid="ignore"):
+        mismatch = np.abs(consumption - delta)
+        mismatch_mask = mismatch > np.maximum(tol, t["mismatch_ratio"] * np.abs(consumption))
+    flag(
+        mismatch_mask & ~within,
+        "consumption_mismatch",
+        lambda i: f"billed {consumption[i]:g} kWh but readings differ by {delta[i]:g}",
+        mismatch,
+    )
+
+    # Spikes/drops in daily usage against a rolling trailing baseline
+    days = np.maximum(end - start + 1, 1)
+    daily = consumption / days
+    mean, std, count = _rolling_stats(daily, group_start, int(t["window"]))
+    # A perfectly flat baseline has zero spread, so floor the scale at 5% of the mean
+    scale = np.maximum(std, 0.05 * np.abs(np.nan_to_num(mean))) + 1e-9
+    with np.errstate(invalid="ignore"):
+        z = (daily - mean) / scale
+        trusted = count >= t["min_periods"]
+        spike = trusted & (z > t["z_threshold"])
+        drop = trusted & (z < -t["z_threshold"])
+    usage = lambda i: f"daily usage {daily[i]:.1f} kWh vs rolling mean {mean[i]:.1f} (z={z[i]:.1f})"
+    flag(spike, "spike", usage, z)
+    flag(drop, "drop", usage, z)
+
+    # Seasonal baseline: same calendar month one year earlier in the same series
+    months = start.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    key = series.astype(np.int64) * 1_000_000 + months
+    prior = np.searchsorted(key, key - 12)
+    prior = np.minimum(prior, n - 1)
+    has_prior = key[prior] == key - 12
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ratio = np.where(has_prior, daily / daily[prior], np.nan)
+        seasonal = has_prior & ((ratio > t["seasonal_ratio"]) | (ratio < 1 / t["seasonal_ratio"]))
+    flag(
+        seasonal & ~spike & ~drop,
+        "seasonal_deviation",
+        lambda i: f"daily usage {ratio[i]:.2f}x the same month last year",
+        ratio,
+    )
+
+    return flags
+
+
+def store_anomalies(anomalies: List[Dict[str, Any]]) -> None:
+    """Upsert flagged anomalies so repeated scans stay idempotent"""
+    detected_at = datetime.utcnow().isoformat()
+    rows = [{**a, "detected_at": detected_at} for a in anomalies]
+    for i in range(0, len(rows), PAGE_SIZE):
+        supabase.table("bill_anomalies").upsert(
+            rows[i:i + PAGE_SIZE],
+            on_conflict="bill_id,anomaly_type"
+        ).execute()
+
+
+def scan_bills(bills: List[Dict[str, Any]], store: bool = True) -> Dict[str, Any]:
+    started = datetime.utcnow()
+    anomalies = detect_anomalies(bills)
+    if store and anomalies:
+        store_anomalies(anomalies)
+    counts: Dict[str, int] = {}
+    for anomaly in anomalies:
+        counts[anomaly["anomaly_type"]] = counts.get(anomaly["anomaly_type"], 0) + 1
+    return {
+        "bills_scanned": len(bills),
+        "anomalies_found": len(anomalies),
+        "by_type": counts,
+        "duration_ms": round((datetime.utcnow() - started).total_seconds() * 1000, 1),
+        "anomalies": anomalies,
+    }
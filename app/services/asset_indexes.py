@@ -0,0 +1,133 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+import threading
+import time
+import logging
+from app.core.scoping import scoped_select
+from app.services.bills import fetch_all
+
+logger = logging.getLogger(__name__)
+
+# Rebuild an organization's index after this long so other workers' writes show up
+INDEX_TTL_SECONDS = 300
+
+
+class OrganizationIndexRegistry:
+    """Lazily built in-process indexes, one per organization.
+
+    Subclasses implement `_build(organization_id)`, returning an index with
+    a `built_at` monotonic timestamp; `name` is used in log messages.
+    """
+
+    name = "organization"
+
+    def __init__(self, ttl: float = INDEX_TTL_SECONDS):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._indexes: Dict[str, Any] = {}
+        self._refreshing: Set[str] = set()
+
+    def get(self, organization_id: str) -> Any:
+        """Return the organization's index, building it on first use.
+
+        A stale index keeps serving while a background thread rebuilds it, so
+        only the very first query of an organization waits for a build.
+        """
+        index = self._indexes.get(organization_id)
+        if index is None:
+            index = self._build(organization_id)
+            with self._lock:
+                self._indexes[organization_id] = index
+        elif time.monotonic() - index.built_at > self.ttl:
+            with self._lock:
+                if organization_id in self._refreshing:
+                    return index
+                self._refreshing.add(organization_id)
+            threading.Thread(target=self._refresh, args=(organization_id,), daemon=True).start()
+        return index
+
+    def _refresh(self, organization_id: str) -> None:
+        try:
+            index = self._build(organization_id)
+            with self._lock:
+                self._indexes[organization_id] = index
+        except Exception as e:
+            logger.error(f"Error rebuilding {self.name} index for organization {organization_id}: {str(e)}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(organization_id)
+
+    def _build(self, organization_id: str) -> Any:
+        raise NotImplementedError
+
+
+class AssetIndexRegistry(OrganizationIndexRegistry):
+    """Lazily built in-process asset indexes, one per organization.
+
+    `index_factory` receives the organization's asset rows (restricted to
+    `columns`) and returns an object with `upsert(asset)`, `remove(asset_id)`,
+    `built_at` and `__len__`. Asset writes are applied incrementally to the
+    loaded index of the asset's organization.
+    """
+
+    def __init__(self, name: str, columns: str, index_factory: Callable[[Iterable[Dict[str, Any]]], Any], ttl: float = INDEX_TTL_SECONDS):
+        super().__init__(ttl)
+        self.name = name
+        self.columns = columns
+        self.index_factory = index_factory
+        self._portfolio_org: Dict[str, str] = {}
+        _registries.append(self)
+
+    def upsert_asset(self, asset: Dict[str, Any], previous_portfolio_id: Optional[str] = None) -> None:
+        """Apply a created or updated asset to its organization's index, if that index is loaded"""
+        if previous_portfolio_id and previous_portfolio_id != asset.get("portfolio_id"):
+            old_org = self._portfolio_org.get(previous_portfolio_id)
+            if old_org in self._indexes:
+                self._indexes[old_org].remove(str(asset["id"]))
+        organization_id = self._portfolio_org.get(asset.get("portfolio_id"))
+        if organization_id in self._indexes:
+            self._indexes[organization_id].upsert(asset)
+
+    def register_portfolio(self, portfolio_id: str, organization_id: str) -> None:
+        with self._lock:
+            self._portfolio_org[portfolio_id] = organization_id
+
+    def remove_asset(self, asset_id: str) -> None:
+        for index in list(self._indexes.values()):
+            index.remove(asset_id)
+
+    def invalidate(self, organization_id: str) -> None:
+        with self._lock:
+            self._indexes.pop(organization_id, None)
+
+    def _build(self, organization_id: str) -> Any:
+        started = time.perf_counter()
+        portfolios = scoped_select("portfolios", organization_id, "id").execute().data or []
+        with self._lock:
+            for portfolio in portfolios:
+                self._portfolio_org[portfolio["id"]] = organization_id
+        assets = fetch_all(lambda: scoped_select("assets", organization_id, self.columns))
+        index = self.index_factory(assets)
+        logger.info(
+            f"Built {self.name} index for organization {organization_id}: "
+            f"{len(index)} assets in {(time.perf_counter() - started) * 1000:.0f} ms"
+        )
+        return index
+
+
+_registries: List[AssetIndexRegistry] = []
+
+
+def upsert_asset(asset: Dict[str, Any], previous_portfolio_id: Optional[str] = None) -> None:
+    """Apply an asset write to every loaded asset index"""
+    for registry in _registries:
+        registry.upsert_asset(asset, previous_portfolio_id)
+
+
+def remove_asset(asset_id: str) -> None:
+    for registry in _registries:
+        registry.remove_asset(asset_id)
+
+
+def register_portfolio(portfolio_id: str, organization_id: str) -> None:
+    for registry in _registries:
+        registry.register_portfolio(portfolio_id, organization_id)
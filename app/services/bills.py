@@ -0,0 +1,55 @@
+from typing import Any, Callable, Dict, List, Optional
+from datetime import date
+from app.core.db import supabase
+from app.core.scoping import scoped_select
+import logging
+
+logger = logging.getLogger(__name__)
+
+# PostgREST caps a single response at 1000 rows, so bulk reads are paged
+PAGE_SIZE = 1000
+
+BILL_COLUMNS = (
+    "id,asset_id,meter_id,billing_period_start,billing_period_end,"
+    "consumption_kwh,emissions_kgco2e,previous_reading,current_reading"
+)
+
+
+def fetch_all(build_query: Callable[[], Any]) -> List[Dict[str, Any]]:
+    """Page through a query built by `build_query` until a short page comes back.
+
+    Pages are ordered by id: without an order PostgREST may return rows in a
+    different order per request, and offset pages would skip or repeat rows.
+    """
+    rows: List[Dict[str, Any]] = []
+    offset = 0
+    while True:
+        page = build_query().order("id").range(offset, offset + PAGE_SIZE - 1).execute().data or []
+        rows.extend(page)
+        if len(page) < PAGE_SIZE:
+            return rows
+        offset += PAGE_SIZE
+
+
+def fetch_asset_bills(asset_id: str, start: Optional[date] = None, end: Optional[date] = None) -> List[Dict[str, Any]]:
+    def build_query():
+        query = supabase.table("energy_bills").select(BILL_COLUMNS).eq("asset_id", asset_id)
+        if start:
+            query = query.gte("billing_period_end", start.isoformat())
+        if end:
+            query = query.lte("billing_period_start", end.isoformat())
+        return query
+
+    return fetch_all(build_query)
+
+
+def fetch_portfolio_bills(portfolio_id: str) -> List[Dict[str, Any]]:
+    return fetch_all(lambda: (
+        supabase.table("energy_bills")
+        .select(f"{BILL_COLUMNS},assets!inner(portfolio_id)")
+        .eq("assets.portfolio_id", portfolio_id)
+    ))
+
+
+def fetch_organization_bills(organization_id: str) -> List[Dict[str, Any]]:
+    return fetch_all(lambda: scoped_select("energy_bills", organization_id, BILL_COLUMNS))
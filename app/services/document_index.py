@@ -0,0 +1,212 @@
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+from pathlib import Path
+import asyncio
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import logging
+from app.core.config import settings
+from app.core.events import event_hub
+
+logger = logging.getLogger(__name__)
+
+_TERM = re.compile(r"[0-9A-Za-z][0-9A-Za-z.\-/]*")
+
+SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS document_text USING fts5(
+    body,
+    document_id UNINDEXED,
+    organization_id UNINDEXED,
+    asset_id UNINDEXED,
+    document_type UNINDEXED,
+    provider UNINDEXED,
+    billing_period_start UNINDEXED,
+    indexed_at UNINDEXED,
+    tokenize = 'porter unicode61 remove_diacritics 2'
+);
+"""
+
+
+def to_match_query(text: str) -> str:
+    """Turn free text into an FTS5 query: every term must match, punctuation-joined terms as phrases"""
+    terms = []
+    for term in _TERM.findall(text):
+        words = [w for w in re.split(r"[.\-/]+", term) if w]
+        if words:
+            terms.append('"' + " ".join(words) + '"')
+    return " AND ".join(terms)
+
+
+class DocumentIndex:
+    """BM25-ranked full-text index over extracted document text, stored in a local SQLite FTS5 file.
+
+    The index lives on local disk next to the worker, so searches never go to
+    Supabase. Organization, asset, type, provider and billing period are stored
+    alongside the text and filtered in the same query.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.path != ":memory:":
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+            # WAL lets every gunicorn worker read while one of them writes
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def index_document(
+        self,
+        document_id: str,
+        organization_id: str,
+        text: str,
+        asset_id: Optional[str] = None,
+        document_type: Optional[str] = None,
+        provider: Optional[str] = None,
+        billing_period_start: Optional[str] = None,
+    ) -> None:
+        """Add or replace a document's text"""
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute("DELETE FROM document_text WHERE document_id = ?", (document_id,))
+                conn.execute(
+                    "INSERT INTO document_text (body, document_id, organization_id, asset_id, document_type, "
+                    "provider, billing_period_start, indexed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        text, document_id, organization_id, asset_id, document_type,
+                        provider, billing_period_start, datetime.utcnow().isoformat()
+                    )
+                )
+
+    def remove_document(self, document_id: str) -> None:
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute("DELETE FROM document_text WHERE document_id = ?", (document_id,))
+
+    def search(
+        self,
+        organization_id: str,
+        query: str,
+        asset_id: Optional[str] = None,
+        document_type: Optional[str] = None,
+        provider: Optional[str] = None,
+        year: Optional[int] = None,
+        limit: int = 20,
+        offset: int = 0,
+    ) -> List[Dict[str, Any]]:
+        match = to_match_query(query) if query else ""
+        filters = ["organization_id = ?"]
+        params: List[Any] = [organization_id]
+        for column, value in (("asset_id", asset_id), ("document_type", document_type)):
+            if value:
+                filters.append(f"{column} = ?")
+                params.append(value)
+        if provider:
+            filters.append("provider = ? COLLATE NOCASE")
+            params.append(provider)
+        if year:
+            filters.append("substr(billing_period_start, 1, 4) = ?")
+            params.append(str(year))
+
+        if match:
+            sql = (
+                "SELECT document_id, asset_id, document_type, provider, billing_period_start, "
+                "bm25(document_text) AS rank, snippet(document_text, 0, '[', ']', '…', 12) AS snippet "
+                "FROM document_text WHERE document_text MATCH ? AND " + " AND ".join(filters) +
+                " ORDER BY rank LIMIT ? OFFSET ?"
+            )
+            params = [match] + params
+        else:
+            sql = (
+                "SELECT document_id, asset_id, document_type, provider, billing_period_start, "
+                "0.0 AS rank, substr(body, 1, 80) AS snippet FROM document_text WHERE " + " AND ".join(filters) +
+                " ORDER BY billing_period_start DESC LIMIT ? OFFSET ?"
+            )
+        params += [limit, offset]
+
+        with self._lock:
+            rows = self._connection().execute(sql, params).fetchall()
+        return [
+            {
+                "document_id": row[0],
+                "asset_id": row[1],
+                "document_type": row[2],
+                "provider": row[3],
+                "billing_period_start": row[4],
+                # bm25() is lower-is-better; flip it so callers can sort descending
+                "score": round(-row[5], 4) or 0.0,
+                "snippet": row[6],
+            }
+            for row in rows
+        ]
+
+    def optimize(self) -> None:
+        """Merge index segments into one, the most compact on-disk layout"""
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute("INSERT INTO document_text(document_text) VALUES ('optimize')")
+
+
+document_index = DocumentIndex(settings.DOCUMENT_INDEX_PATH)
+
+
+async def extract_and_index(
+    document_id: str,
+    organization_id: str,
+    asset_id: str,
+    document_type: str,
+    filename: str,
+    content: bytes,
+    content_type: Optional[str],
+) -> None:
+    """Run text extraction on an uploaded document and add the text to the index.
+
+    Provider and billing period stay empty: BillReader's field parsers are
+    placeholders that return the same values for every bill.
+    """
+    from bill_reader import BillReader
+
+    def progress(status: str, error: Optional[str] = None) -> None:
+        event_hub.publish("job", f"job:document_index:{document_id}", {
+            "job": "document_index", "id": document_id, "asset_id": asset_id, "status": status, "error": error
+        }, organization_id=organization_id)
+
+    progress("running")
+    suffix = Path(filename or "").suffix
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as f:
+        f.write(content)
+        path = f.name
+    try:
+        result = await BillReader().process_bill(path, content_type or "")
+        if result.get("status") != "success":
+            logger.warning(f"Text extraction failed for document {document_id}: {result.get('error')}")
+            progress("failed", result.get("error"))
+            return
+        await asyncio.to_thread(
+            document_index.index_document,
+            document_id,
+            organization_id,
+            result.get("text") or "",
+            asset_id=asset_id,
+            document_type=document_type,
+        )
+        logger.info(f"Indexed text of document {document_id}")
+        progress("succeeded")
+    except Exception as e:
+        logger.error(f"Error indexing document {document_id}: {str(e)}")
+        progress("failed", str(e))
+    finally:
+        os.unlink(path)
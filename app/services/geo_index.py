@@ -0,0 +1,274 @@
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import math
+import threading
+import time
+import numpy as np
+import logging
+from app.services.asset_indexes import AssetIndexRegistry
+
+logger = logging.getLogger(__name__)
+
+GEO_COLUMNS = "id,name,address,asset_type,portfolio_id,latitude,longitude"
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Assets are bucketed into geohash cells of this precision (~20 x 40 km at the equator)
+INDEX_PRECISION = 4
+
+# Below this zoom level bounding-box results are returned as clusters
+CLUSTER_BELOW_ZOOM = 13
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def _cell_bits(precision: int) -> Tuple[int, int]:
+    """Latitude and longitude bits of a geohash of `precision` characters"""
+    bits = 5 * precision
+    return bits // 2, bits - bits // 2
+
+
+def encode(latitude: float, longitude: float, precision: int = 9) -> str:
+    """Standard base32 geohash of a point"""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bit, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        target, span = (longitude, lon_range) if even else (latitude, lat_range)
+        mid = (span[0] + span[1]) / 2
+        if target >= mid:
+            value = (value << 1) | 1
+            span[0] = mid
+        else:
+            value <<= 1
+            span[1] = mid
+        even = not even
+        bit += 1
+        if bit == 5:
+            chars.append(_BASE32[value])
+            bit, value = 0, 0
+    return "".join(chars)
+
+
+def cell_keys(latitude: np.ndarray, longitude: np.ndarray, precision: int) -> np.ndarray:
+    """Integer id of the geohash cell containing each point.
+
+    Two points share a key exactly when they share a geohash of `precision`
+    characters; the key is cheaper to compute and group on than the string.
+    """
+    lat_bits, lon_bits = _cell_bits(precision)
+    lat_index = np.clip(((latitude + 90.0) / 180.0 * (1 << lat_bits)).astype(np.int64), 0, (1 << lat_bits) - 1)
+    lon_index = np.clip(((longitude + 180.0) / 360.0 * (1 << lon_bits)).astype(np.int64), 0, (1 << lon_bits) - 1)
+    return (lat_index << lon_bits) | lon_index
+
+
+def zoom_precision(zoom: int) -> int:
+    """Geohash precision giving roughly eight cluster cells across a web map tile at `zoom`"""
+    return int(min(max(math.ceil(2 * (zoom + 3) / 5), 1), 9))
+
+
+def haversine_km(latitude: float, longitude: float, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    lat1, lon1 = math.radians(latitude), math.radians(longitude)
+    lat2, lon2 = np.radians(latitudes), np.radians(longitudes)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _has_coordinates(asset: Dict[str, Any]) -> bool:
+    return asset.get("latitude") is not None and asset.get("longitude") is not None
+
+
+class GeoIndex:
+    """Geohash grid over one organization's located assets.
+
+    Each asset sits in the bucket of its precision-4 geohash cell. A query
+    only looks at the buckets overlapping its bounding box and then filters
+    those candidates exactly with numpy, so a viewport over one city never
+    touches the assets of another. Assets without coordinates are not indexed.
+    """
+
+    def __init__(self, assets: Iterable[Dict[str, Any]] = ()):
+        self.built_at = time.monotonic()
+        self._lock = threading.RLock()
+        self._assets: Dict[str, Dict[str, Any]] = {}
+        self._cell_of: Dict[str, int] = {}
+        self._cells: Dict[int, Set[str]] = {}
+        located = [
+            {**{k: a[k] for k in GEO_COLUMNS.split(",") if k in a}, "id": str(a["id"])}
+            for a in assets if _has_coordinates(a)
+        ]
+        latitudes = np.array([a["latitude"] for a in located], dtype=float)
+        longitudes = np.array([a["longitude"] for a in located], dtype=float)
+        for asset, lat, lon, cell in zip(located, latitudes.tolist(), longitudes.tolist(),
+                                         cell_keys(latitudes, longitudes, INDEX_PRECISION).tolist()):
+            asset["latitude"], asset["longitude"] = lat, lon
+            self._assets[asset["id"]] = asset
+            self._cell_of[asset["id"]] = cell
+            self._cells.setdefault(cell, set()).add(asset["id"])
+
+    def __len__(self) -> int:
+        return len(self._assets)
+
+    def upsert(self, asset: Dict[str, Any]) -> None:
+        asset_id = str(asset["id"])
+        with self._lock:
+            merged = dict(self._assets.get(asset_id) or {})
+            merged.update({k: asset[k] for k in GEO_COLUMNS.split(",") if k in asset})
+            self.remove(asset_id)
+            if not _has_coordinates(merged):
+                return
+            merged["latitude"], merged["longitude"] = float(merged["latitude"]), float(merged["longitude"])
+            cell = int(cell_keys(np.array([merged["latitude"]]), np.array([merged["longitude"]]), INDEX_PRECISION)[0])
+            self._assets[asset_id] = merged
+            self._cell_of[asset_id] = cell
+            self._cells.setdefault(cell, set()).add(asset_id)
+
+    def remove(self, asset_id: str) -> None:
+        with self._lock:
+            asset_id = str(asset_id)
+            self._assets.pop(asset_id, None)
+            cell = self._cell_of.pop(asset_id, None)
+            if cell is not None:
+                members = self._cells[cell]
+                members.discard(asset_id)
+                if not members:
+                    del self._cells[cell]
+
+    def _cells_in(self, south: float, west: float, north: float, east: float) -> List[int]:
+        lat_bits, lon_bits = _cell_bits(INDEX_PRECISION)
+        corners = cell_keys(np.array([south, north]), np.array([west, east]), INDEX_PRECISION)
+        lat_lo, lat_hi = sorted(int(k) >> lon_bits for k in corners)
+        lon_lo, lon_hi = sorted(int(k) & ((1 << lon_bits) - 1) for k in corners)
+        wanted = (lat_hi - lat_lo + 1) * (lon_hi - lon_lo + 1)
+        if wanted > len(self._cells):
+            # Wide viewport: cheaper to walk the occupied cells than the covered ones
+            return [
+                cell for cell in self._cells
+                if lat_lo <= cell >> lon_bits <= lat_hi and lon_lo <= cell & ((1 << lon_bits) - 1) <= lon_hi
+            ]
+        return [
+            (lat << lon_bits) | lon
+            for lat in range(lat_lo, lat_hi + 1)
+            for lon in range(lon_lo, lon_hi + 1)
+            if (lat << lon_bits) | lon in self._cells
+        ]
+
+    def _candidates(self, south: float, west: float, north: float, east: float) -> Tuple[List[Dict[str, Any]], np.ndarray, np.ndarray]:
+        """Assets in the cells overlapping the box, with their coordinates as arrays"""
+        if west > east:
+            # Viewport crossing the antimeridian
+            boxes = [(south, west, north, 180.0), (south, -180.0, north, east)]
+        else:
+            boxes = [(south, west, north, east)]
+        with self._lock:
+            ids: Set[str] = set()
+            for box in boxes:
+                for cell in self._cells_in(*box):
+                    ids.update(self._cells[cell])
+            assets = [self._assets[asset_id] for asset_id in ids]
+        latitudes = np.array([a["latitude"] for a in assets], dtype=float)
+        longitudes = np.array([a["longitude"] for a in assets], dtype=float)
+        return assets, latitudes, longitudes
+
+    def bbox(
+        self,
+        south: float,
+        west: float,
+        north: float,
+        east: float,
+        portfolio_id: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], np.ndarray, np.ndarray]:
+        assets, latitudes, longitudes = self._candidates(south, west, north, east)
+        inside = (latitudes >= south) & (latitudes <= north)
+        if west > east:
+            inside &= (longitudes >= west) | (longitudes <= east)
+        else:
+            inside &= (longitudes >= west) & (longitudes <= east)
+        if portfolio_id:
+            inside &= np.array([a.get("portfolio_id") == portfolio_id for a in assets], dtype=bool)
+        keep = np.flatnonzero(inside)
+        return [assets[i] for i in keep], latitudes[keep], longitudes[keep]
+
+    def within(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        portfolio_id: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Assets within `radius_km` of a point, nearest first, with their distance"""
+        lat_delta = math.degrees(radius_km / EARTH_RADIUS_KM)
+        south, north = max(latitude - lat_delta, -90.0), min(latitude + lat_delta, 90.0)
+        cos_lat = math.cos(math.radians(max(abs(south), abs(north))))
+        if south <= -90.0 or north >= 90.0 or cos_lat <= 0 or lat_delta / cos_lat >= 180.0:
+            west, east = -180.0, 180.0
+        else:
+            lon_delta = lat_delta / cos_lat
+            west = (longitude - lon_delta + 180.0) % 360.0 - 180.0
+            east = (longitude + lon_delta + 180.0) % 360.0 - 180.0
+
+        assets, latitudes, longitudes = self.bbox(south, west, north, east, portfolio_id)
+        distances = haversine_km(latitude, longitude, latitudes, longitudes)
+        order = [i for i in np.argsort(distances, kind="stable") if distances[i] <= radius_km]
+        if limit is not None:
+            order = order[:limit]
+        return [{**assets[i], "distance_km": round(float(distances[i]), 3)} for i in order]
+
+    def nearest(
+        self,
+        latitude: float,
+        longitude: float,
+        count: int,
+        max_radius_km: float = 2 * math.pi * EARTH_RADIUS_KM,
+        portfolio_id: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """The `count` assets closest to a point, growing the search radius until enough are found"""
+        radius = 10.0
+        while True:
+            radius = min(radius, max_radius_km)
+            results = self.within(latitude, longitude, radius, portfolio_id, limit=count)
+            if len(results) >= count or radius >= max_radius_km:
+                return results
+            radius *= 4
+
+    def clusters(
+        self,
+        assets: List[Dict[str, Any]],
+        latitudes: np.ndarray,
+        longitudes: np.ndarray,
+        precision: int,
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Group points by geohash cell; cells holding a single asset are returned as the asset itself"""
+        if not assets:
+            return [], []
+        keys = cell_keys(latitudes, longitudes, precision)
+        unique, inverse = np.unique(keys, return_inverse=True)
+        counts = np.bincount(inverse)
+        lat_mean = np.bincount(inverse, weights=latitudes) / counts
+        lon_mean = np.bincount(inverse, weights=longitudes) / counts
+        south = np.full(len(unique), np.inf)
+        north = np.full(len(unique), -np.inf)
+        west = np.full(len(unique), np.inf)
+        east = np.full(len(unique), -np.inf)
+        np.minimum.at(south, inverse, latitudes)
+        np.maximum.at(north, inverse, latitudes)
+        np.minimum.at(west, inverse, longitudes)
+        np.maximum.at(east, inverse, longitudes)
+
+        clusters, singles = [], []
+        single_cells = set(np.flatnonzero(counts == 1).tolist())
+        for i, asset in enumerate(assets):
+            if int(inverse[i]) in single_cells:
+                singles.append(asset)
+        for j in np.flatnonzero(counts > 1):
+            clusters.append({
+                "geohash": encode(float(lat_mean[j]), float(lon_mean[j]), precision),
+                "count": int(counts[j]),
+                "latitude": round(float(lat_mean[j]), 6),
+                "longitude": round(float(lon_mean[j]), 6),
+                "bbox": [float(south[j]), float(west[j]), float(north[j]), float(east[j])],
+            })
+        clusters.sort(key=lambda c: -c["count"])
+        return clusters, singles
+
+
+asset_geo = AssetIndexRegistry("geo", GEO_COLUMNS, GeoIndex)
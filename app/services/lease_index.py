@@ -0,0 +1,185 @@
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import date
+from bisect import bisect_left, bisect_right
+import threading
+import time
+import numpy as np
+import logging
+from app.core.db import supabase
+from app.core.scoping import scoped_select
+from app.services.asset_indexes import OrganizationIndexRegistry
+from app.services.bills import fetch_all
+
+logger = logging.getLogger(__name__)
+
+LEASE_COLUMNS = (
+    "id,asset_id,tenant_id,floor_number,area_occupied,lease_start_date,lease_end_date,"
+    "assets!inner(name,portfolio_id,floor_area,portfolios!inner(organization_id))"
+)
+
+
+def _ordinal(value: Any) -> Optional[int]:
+    if not value:
+        return None
+    if isinstance(value, date):
+        return value.toordinal()
+    return date.fromisoformat(str(value)[:10]).toordinal()
+
+
+def _flatten(row: Dict[str, Any]) -> Dict[str, Any]:
+    asset = row.get("assets") or {}
+    return {
+        "id": row.get("id"),
+        "asset_id": row.get("asset_id"),
+        "asset_name": asset.get("name"),
+        "portfolio_id": asset.get("portfolio_id"),
+        "tenant_id": row.get("tenant_id"),
+        "floor_number": row.get("floor_number"),
+        "area_occupied": row.get("area_occupied"),
+        "lease_start_date": str(row["lease_start_date"])[:10] if row.get("lease_start_date") else None,
+        "lease_end_date": str(row["lease_end_date"])[:10] if row.get("lease_end_date") else None,
+    }
+
+
+class LeaseIndex:
+    """Leases of one organization kept sorted by end date.
+
+    Range queries are two binary searches plus a slice, so the cost of
+    "expiring in the next N days" depends on the page size, not on the
+    number of leases. Open-ended leases are kept aside; they never expire.
+    """
+
+    def __init__(self, assets: List[Dict[str, Any]], leases: List[Dict[str, Any]]):
+        self.built_at = time.monotonic()
+        self.assets: Dict[str, Dict[str, Any]] = {a["id"]: a for a in assets}
+        self._lock = threading.Lock()
+        dated = sorted(
+            (lease for lease in leases if lease.get("lease_end_date")),
+            key=lambda lease: (lease["lease_end_date"], str(lease.get("id")))
+        )
+        self._ends: List[int] = [_ordinal(lease["lease_end_date"]) for lease in dated]
+        self._leases: List[Dict[str, Any]] = dated
+        self._open: List[Dict[str, Any]] = [lease for lease in leases if not lease.get("lease_end_date")]
+        self._arrays: Optional[Tuple[np.ndarray, ...]] = None
+
+    def __len__(self) -> int:
+        return len(self._leases) + len(self._open)
+
+    def add(self, lease: Dict[str, Any]) -> None:
+        with self._lock:
+            self._arrays = None
+            end = _ordinal(lease.get("lease_end_date"))
+            if end is None:
+                self._open.append(lease)
+                return
+            position = bisect_right(self._ends, end)
+            self._ends.insert(position, end)
+            self._leases.insert(position, lease)
+
+    def upsert_asset(self, asset: Dict[str, Any]) -> None:
+        """Apply a created or updated asset's name, portfolio and floor area"""
+        meta = {k: asset.get(k) for k in ("id", "name", "portfolio_id", "floor_area")}
+        with self._lock:
+            self._arrays = None
+            self.assets[meta["id"]] = meta
+            for lease in self._leases + self._open:
+                if lease.get("asset_id") == meta["id"]:
+                    lease["asset_name"] = meta["name"]
+                    lease["portfolio_id"] = meta["portfolio_id"]
+
+    def expiring(self, start: date, end: date, offset: int = 0, limit: int = 50) -> Tuple[int, List[Dict[str, Any]]]:
+        """Leases ending within [start, end], soonest first, with the total count"""
+        with self._lock:
+            lo = bisect_left(self._ends, start.toordinal())
+            hi = bisect_right(self._ends, end.toordinal())
+            page_start = min(lo + offset, hi)
+            return hi - lo, self._leases[page_start:min(page_start + limit, hi)]
+
+    def _lease_arrays(self) -> Tuple[np.ndarray, ...]:
+        """Column arrays (asset position, area, start day, end day) over all leases, rebuilt after writes"""
+        with self._lock:
+            if self._arrays is None:
+                position = {asset_id: i for i, asset_id in enumerate(self.assets)}
+                leases = [lease for lease in self._leases + self._open if lease.get("asset_id") in position]
+                self._arrays = (
+                    np.array([position[lease["asset_id"]] for lease in leases], dtype=np.int64),
+                    np.array([float(lease.get("area_occupied") or 0) for lease in leases]),
+                    np.array([lease.get("lease_start_date") or "0001-01-01" for lease in leases], dtype="datetime64[D]"),
+                    np.array([lease.get("lease_end_date") or "9999-12-31" for lease in leases], dtype="datetime64[D]"),
+                )
+            return self._arrays
+
+    def occupancy_forecast(self, months: List[date], portfolio_id: Optional[str] = None) -> Dict[str, List[Optional[float]]]:
+        """Projected occupancy_rate per asset at each of `months`, assuming expiring leases are not renewed"""
+        asset_position, area, starts, ends = self._lease_arrays()
+        asset_ids = list(self.assets)
+        days = np.array([m.isoformat() for m in months], dtype="datetime64[D]")
+
+        occupied = np.zeros((len(asset_ids), len(months)))
+        for j, day in enumerate(days):
+            active = (starts <= day) & (ends >= day)
+            occupied[:, j] = np.bincount(asset_position, weights=area * active, minlength=len(asset_ids))
+
+        floor_area = np.array([float(self.assets[a].get("floor_area") or 0) for a in asset_ids])
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rates = np.where(floor_area[:, None] > 0, np.minimum(occupied / floor_area[:, None], 1.0), np.nan)
+        rates = np.round(rates, 4)
+        return {
+            asset_id: [None if np.isnan(v) else float(v) for v in rates[i]]
+            for i, asset_id in enumerate(asset_ids)
+            if not portfolio_id or self.assets[asset_id].get("portfolio_id") == portfolio_id
+        }
+
+
+class LeaseIndexRegistry(OrganizationIndexRegistry):
+    """Lazily built lease indexes, one per organization.
+
+    Lease and asset writes are applied to the loaded index of their
+    organization; writes made by other workers show up after the TTL.
+    """
+
+    name = "lease"
+
+    def add_lease(self, row: Dict[str, Any], asset: Dict[str, Any], organization_id: str) -> None:
+        """Insert a newly assigned lease on `asset` into its organization's index, if that index is loaded"""
+        index = self._indexes.get(organization_id)
+        if index is None:
+            return
+        if asset["id"] not in index.assets:
+            index.upsert_asset(asset)
+        lease = _flatten(row)
+        lease["asset_name"] = lease["asset_name"] or asset.get("name")
+        lease["portfolio_id"] = lease["portfolio_id"] or asset.get("portfolio_id")
+        index.add(lease)
+
+    def upsert_asset(self, asset: Dict[str, Any], organization_id: str) -> None:
+        """Apply a created or updated asset to its organization's index, if that index is loaded"""
+        index = self._indexes.get(organization_id)
+        if index is None:
+            return
+        if asset["id"] in index.assets or asset.get("portfolio_id") in {a.get("portfolio_id") for a in index.assets.values()}:
+            index.upsert_asset(asset)
+        else:
+            # A portfolio the index has not seen; rebuild rather than trust it belongs here
+            index.built_at = 0.0
+
+    def _build(self, organization_id: str) -> LeaseIndex:
+        started = time.perf_counter()
+        assets = fetch_all(lambda: scoped_select("assets", organization_id, "id,name,portfolio_id,floor_area"))
+        rows = fetch_all(lambda: (
+            supabase.table("asset_tenants")
+            .select(LEASE_COLUMNS)
+            .eq("assets.portfolios.organization_id", organization_id)
+        ))
+        index = LeaseIndex(
+            [{k: a.get(k) for k in ("id", "name", "portfolio_id", "floor_area")} for a in assets],
+            [_flatten(row) for row in rows]
+        )
+        logger.info(
+            f"Built lease index for organization {organization_id}: "
+            f"{len(index)} leases in {(time.perf_counter() - started) * 1000:.0f} ms"
+        )
+        return index
+
+
+lease_indexes = LeaseIndexRegistry()
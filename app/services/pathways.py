@@ -0,0 +1,207 @@
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
+from functools import lru_cache
+import numpy as np
+import logging
+from app.services.reference_data import reference_data
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REGION = "global"
+
+# Years of bill history used to fit each asset's trend
+TREND_YEARS = 5
+
+
+@lru_cache(maxsize=2)
+def _memo(version: str) -> Dict[Tuple[Any, ...], Any]:
+    """Lookups from one reference data version; keyed on the version, so a newly published one starts empty"""
+    return {}
+
+
+def load_reference_pathways() -> Dict[str, Any]:
+    """The 1.5°C reference curves of the current reference data version, memory-mapped"""
+    return reference_data.current().dataset("pathways")
+
+
+def load_emission_factors() -> Dict[str, Any]:
+    return reference_data.current().dataset("emission_factors")
+
+
+def pathway_years() -> np.ndarray:
+    return load_reference_pathways()["years"]
+
+
+def pathway_curve(asset_type: str, region: Optional[str] = None, reference: Optional[Dict[str, Any]] = None) -> np.ndarray:
+    """Reference intensity curve (kgCO2e/m²/yr per pathway year) for an asset type and region.
+
+    Falls back to the global curve when the region has no curve for the type.
+    The returned array is a read-only view of the shared reference data.
+    Pass `reference` to read several curves from one version.
+    """
+    if reference is not None:
+        return _find_curve(reference["pathways"], asset_type, region)
+    snapshot = reference_data.current()
+    memo = _memo(snapshot.version)
+    key = ("curve", asset_type, region)
+    if key not in memo:
+        memo[key] = _find_curve(snapshot.dataset("pathways")["pathways"], asset_type, region)
+    return memo[key]
+
+
+def _find_curve(pathways: Dict[str, Any], asset_type: str, region: Optional[str]) -> np.ndarray:
+    region_curves = pathways.get((region or DEFAULT_REGION).lower()) or {}
+    values = region_curves.get(asset_type)
+    if values is None:
+        values = pathways[DEFAULT_REGION].get(asset_type)
+    if values is None:
+        raise KeyError(f"No reference pathway for asset type '{asset_type}'")
+    return np.asarray(values, dtype=float)
+
+
+def pathway_intensity(asset_type: str, region: Optional[str], year: int) -> float:
+    """Reference intensity for a single year, clamped to the pathway's year range"""
+    snapshot = reference_data.current()
+    memo = _memo(snapshot.version)
+    key = ("intensity", asset_type, region, year)
+    if key not in memo:
+        reference = snapshot.dataset("pathways")
+        years = reference["years"]
+        index = int(np.clip(year - years[0], 0, len(years) - 1))
+        memo[key] = float(_find_curve(reference["pathways"], asset_type, region)[index])
+    return memo[key]
+
+
+def grid_emission_factor(region: Optional[str] = None) -> float:
+    snapshot = reference_data.current()
+    memo = _memo(snapshot.version)
+    key = ("grid", region)
+    if key not in memo:
+        factors = snapshot.dataset("emission_factors")
+        grid = factors["grid_electricity"]
+        memo[key] = float(grid.get((region or "").lower(), grid[factors.get("default_region", DEFAULT_REGION)]))
+    return memo[key]
+
+
+def _annual_intensity(
+    assets: List[Dict[str, Any]],
+    bills: List[Dict[str, Any]],
+    first_year: int,
+    last_year: int,
+) -> np.ndarray:
+    """Matrix of annualised emissions intensity, one row per asset and one column per history year (NaN where unknown)"""
+    n_years = last_year - first_year + 1
+    row_of = {asset["id"]: i for i, asset in enumerate(assets)}
+    intensity = np.full((len(assets), n_years), np.nan)
+    if not bills:
+        return intensity
+
+    kept = [b for b in bills if b.get("asset_id") in row_of]
+    if not kept:
+        return intensity
+    rows = np.array([row_of[b["asset_id"]] for b in kept])
+    start = np.array([str(b["billing_period_start"])[:10] for b in kept], dtype="datetime64[D]")
+    end = np.array([str(b["billing_period_end"])[:10] for b in kept], dtype="datetime64[D]")
+    year = start.astype("datetime64[Y]").astype(np.int64) + 1970
+    days = (end - start).astype(np.int64) + 1
+
+    # Bills without reported emissions fall back to consumption x regional grid factor
+    reported = np.array([np.nan if b.get("emissions_kgco2e") is None else float(b["emissions_kgco2e"]) for b in kept])
+    consumption = np.array([float(b.get("consumption_kwh") or 0) for b in kept])
+    factors = np.array([grid_emission_factor(a.get("region")) for a in assets])
+    emissions = np.where(np.isnan(reported), consumption * factors[rows], reported)
+
+    in_range = (year >= first_year) & (year <= last_year)
+    rows, cols = rows[in_range], (year - first_year)[in_range]
+    emissions, days = emissions[in_range], days[in_range]
+
+    totals = np.zeros((len(assets), n_years))
+    covered = np.zeros((len(assets), n_years))
+    np.add.at(totals, (rows, cols), emissions)
+    np.add.at(covered, (rows, cols), days)
+
+    floor_area = np.array([a.get("floor_area") or np.nan for a in assets], dtype=float)[:, None]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # Scale partially billed years up to a full year before normalising by area
+        annualised = np.where(covered > 0, totals * 365.0 / np.maximum(covered, 1), np.nan)
+        intensity = annualised / np.where(floor_area > 0, floor_area, np.nan)
+    return intensity
+
+
+def _fit_trends(history: np.ndarray, years: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-row least squares line through the non-NaN points; rows with one point get a flat trend"""
+    mask = ~np.isnan(history)
+    count = mask.sum(axis=1)
+    x = np.where(mask, years[None, :], 0.0)
+    y = np.where(mask, history, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x_mean = x.sum(axis=1) / count
+        y_mean = y.sum(axis=1) / count
+        dx = np.where(mask, years[None, :] - x_mean[:, None], 0.0)
+        dy = np.where(mask, history - y_mean[:, None], 0.0)
+        denom = (dx * dx).sum(axis=1)
+        slope = np.where(denom > 0, (dx * dy).sum(axis=1) / denom, 0.0)
+    intercept = y_mean - slope * x_mean
+    return slope, intercept
+
+
+def project_assets(
+    assets: List[Dict[str, Any]],
+    bills: List[Dict[str, Any]],
+    current_year: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Project every asset's intensity to the end of the pathway and find its stranding year"""
+    if not assets:
+        return []
+    current_year = current_year or datetime.utcnow().year
+    history_years = np.arange(current_year - TREND_YEARS, current_year + 1)
+    history = _annual_intensity(assets, bills, int(history_years[0]), int(history_years[-1]))
+    slope, intercept = _fit_trends(history, history_years.astype(float))
+
+    # Years and curves from one reference data version, even if a new one is published meanwhile
+    reference = load_reference_pathways()
+    years = reference["years"]
+    projected = np.clip(intercept[:, None] + slope[:, None] * years[None, :], 0.0, None)
+
+    # Curves are views of the shared mapping, stacked into an asset x year matrix
+    pathway = np.vstack([
+        pathway_curve(str(a.get("asset_type")), a.get("region"), reference) for a in assets
+    ])
+
+    future = years >= current_year
+    above = (projected > pathway) & future[None, :]
+    stranded = above.any(axis=1) & ~np.isnan(intercept)
+    stranding_year = np.where(stranded, years[np.argmax(above, axis=1)], 0)
+    current_index = int(np.clip(current_year - years[0], 0, len(years) - 1))
+
+    results = []
+    for i, asset in enumerate(assets):
+        has_data = not np.isnan(intercept[i])
+        results.append({
+            "asset_id": asset["id"],
+            "asset_type": asset.get("asset_type"),
+            "region": asset.get("region") or DEFAULT_REGION,
+            "has_data": has_data,
+            "current_intensity": round(float(projected[i, current_index]), 2) if has_data else None,
+            "pathway_intensity": round(float(pathway[i, current_index]), 2),
+            "annual_trend": round(float(slope[i]), 3) if has_data else None,
+            "stranding_year": int(stranding_year[i]) if stranded[i] else None,
+            "projection": [round(float(v), 2) for v in projected[i]] if has_data else None,
+            "pathway": [round(float(v), 2) for v in pathway[i]],
+        })
+    return results
+
+
+def summarize(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    stranding = [r["stranding_year"] for r in results if r["stranding_year"]]
+    pathways = load_reference_pathways()
+    return {
+        "years": [int(y) for y in pathways["years"]],
+        "unit": pathways.get("unit"),
+        "scenario": pathways.get("scenario"),
+        "pathway_version": pathways.get("version"),
+        "assets_projected": sum(1 for r in results if r["has_data"]),
+        "assets_stranded": len(stranding),
+        "earliest_stranding_year": min(stranding) if stranding else None,
+        "assets": results,
+    }
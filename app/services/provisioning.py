@@ -0,0 +1,184 @@
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timedelta
+import asyncio
+import random
+import logging
+from app.core.cache import read_cache
+from app.core.db import supabase
+from app.core.events import event_hub
+from app.core.scoping import invalidate_scope, profile_tag
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 8
+BACKOFF_BASE_SECONDS = 2.0
+BACKOFF_MAX_SECONDS = 300.0
+
+# A claimed job is leased for this long; if its worker dies it becomes due again afterwards
+LEASE_SECONDS = 120
+
+POLL_SECONDS = 5.0
+BATCH_SIZE = 20
+
+
+def _now() -> datetime:
+    return datetime.utcnow()
+
+
+def backoff_seconds(attempts: int) -> float:
+    """Exponential backoff with full jitter"""
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** attempts)))
+
+
+def enqueue_signup(user_id: str, email: str, company_name: Optional[str]) -> Dict[str, Any]:
+    """Record the provisioning work for a new user; one job per user"""
+    response = supabase.table("provisioning_jobs").upsert({
+        "user_id": user_id,
+        "payload": {"email": email, "company_name": company_name or "Default Company"},
+        "status": "pending",
+        "next_attempt_at": _now().isoformat(),
+        "updated_at": _now().isoformat()
+    }, on_conflict="user_id").execute()
+    return response.data[0]
+
+
+def _provision(job: Dict[str, Any]) -> None:
+    """Create the profile and the default organization. Every step is safe to repeat."""
+    user_id = job["user_id"]
+    payload = job.get("payload") or {}
+
+    profile = supabase.table("profiles").select("id,organization_id").eq("id", user_id).execute().data
+    if not profile:
+        supabase.table("profiles").upsert({
+            "id": user_id,
+            "email": payload.get("email"),
+            "company_name": payload.get("company_name"),
+            "role": "user",
+            "organization_id": None,
+            "created_at": _now().isoformat(),
+            "updated_at": _now().isoformat()
+        }, on_conflict="id").execute()
+    elif profile[0].get("organization_id"):
+        return
+
+    organization_id = payload.get("organization_id")
+    if not organization_id:
+        organization = supabase.table("organizations").insert({
+            "name": payload.get("company_name") or "Default Company",
+            "created_at": _now().isoformat(),
+            "updated_at": _now().isoformat()
+        }).execute().data[0]
+        organization_id = organization["id"]
+        # Remember the organization before linking it, so a retry does not create a second one
+        payload = {**payload, "organization_id": organization_id}
+        supabase.table("provisioning_jobs").update({"payload": payload}).eq("id", job["id"]).execute()
+        job["payload"] = payload
+
+    supabase.table("profiles").update({
+        "organization_id": organization_id,
+        "updated_at": _now().isoformat()
+    }).eq("id", user_id).execute()
+
+
+def _claim(job: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Lease a job for this worker; the attempts check makes the claim fail if another worker got there first"""
+    response = (
+        supabase.table("provisioning_jobs")
+        .update({
+            "status": "running",
+            "attempts": job["attempts"] + 1,
+            "next_attempt_at": (_now() + timedelta(seconds=LEASE_SECONDS)).isoformat(),
+            "updated_at": _now().isoformat()
+        })
+        .eq("id", job["id"])
+        .eq("attempts", job["attempts"])
+        .execute()
+    )
+    return response.data[0] if response.data else None
+
+
+def _finish(job: Dict[str, Any], error: Optional[str]) -> str:
+    """Record the outcome of an attempt; returns the job's new status"""
+    if error is None:
+        update = {"status": "succeeded", "last_error": None, "completed_at": _now().isoformat()}
+    elif job["attempts"] >= MAX_ATTEMPTS:
+        update = {"status": "failed", "last_error": error}
+    else:
+        update = {
+            "status": "pending",
+            "last_error": error,
+            "next_attempt_at": (_now() + timedelta(seconds=backoff_seconds(job["attempts"]))).isoformat()
+        }
+    supabase.table("provisioning_jobs").update({**update, "updated_at": _now().isoformat()}).eq("id", job["id"]).execute()
+    return update["status"]
+
+
+def _publish_progress(job: Dict[str, Any], status: str, error: Optional[str] = None) -> None:
+    """Tell the user's event streams (GET /events/) how their provisioning is going"""
+    event_hub.publish("job", f"job:provisioning:{job['user_id']}", {
+        "job": "provisioning", "id": job["id"], "status": status, "attempts": job["attempts"], "error": error
+    }, user_id=job["user_id"])
+
+
+def _due_jobs() -> List[Dict[str, Any]]:
+    return (
+        supabase.table("provisioning_jobs")
+        .select("*")
+        .in_("status", ["pending", "running"])
+        .lte("next_attempt_at", _now().isoformat())
+        .order("next_attempt_at")
+        .limit(BATCH_SIZE)
+        .execute()
+        .data or []
+    )
+
+
+async def process_job(job: Dict[str, Any]) -> bool:
+    """Claim and run one job off the event loop; returns True once the user is provisioned"""
+    claimed = await asyncio.to_thread(_claim, job)
+    if claimed is None:
+        return False
+    _publish_progress(claimed, "running")
+    try:
+        await asyncio.to_thread(_provision, claimed)
+        error = None
+    except Exception as e:
+        error = str(e)
+        logger.warning(f"Provisioning attempt {claimed['attempts']} for user {claimed['user_id']} failed: {error}")
+    try:
+        _publish_progress(claimed, await asyncio.to_thread(_finish, claimed, error), error)
+    except Exception as e:
+        # The lease expires and the job is picked up again
+        logger.error(f"Error recording provisioning result for user {claimed['user_id']}: {str(e)}")
+    if error is None:
+        await read_cache.invalidate(profile_tag(claimed["user_id"]))
+        # _provision records the organization it created or attached in the payload
+        organization_id = (claimed.get("payload") or {}).get("organization_id")
+        await invalidate_scope("organizations", organization_id)
+        await invalidate_scope("profiles", organization_id)
+        logger.info(f"Provisioned user {claimed['user_id']}")
+    return error is None
+
+
+async def run_worker(stop: asyncio.Event) -> None:
+    """Poll the outbox for due jobs until `stop` is set"""
+    while not stop.is_set():
+        try:
+            for job in await asyncio.to_thread(_due_jobs):
+                await process_job(job)
+        except Exception as e:
+            logger.error(f"Provisioning worker error: {str(e)}")
+        try:
+            await asyncio.wait_for(stop.wait(), POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+
+def get_status(user_id: str) -> Optional[Dict[str, Any]]:
+    response = (
+        supabase.table("provisioning_jobs")
+        .select("status,attempts,last_error,created_at,completed_at,next_attempt_at")
+        .eq("user_id", user_id)
+        .execute()
+    )
+    return response.data[0] if response.data else None
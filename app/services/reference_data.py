@@ -0,0 +1,291 @@
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+from pathlib import Path
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+import numpy as np
+import logging
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SOURCE_DIR = Path(__file__).resolve().parent.parent / "data"
+MAGIC = b"NZXREF01"
+POINTER = "CURRENT"
+# Version of app/data last published by a starting worker, so versions published since are left alone
+BUNDLED = "BUNDLED"
+# Published versions kept besides the current one; workers that have not swapped yet still have theirs mapped
+KEEP_VERSIONS = 2
+
+
+def _is_numeric_list(node: Any) -> bool:
+    return (
+        isinstance(node, list) and bool(node)
+        and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in node)
+    )
+
+
+def _dtype(values: List[Any]) -> str:
+    return "<i8" if all(isinstance(v, int) for v in values) else "<f8"
+
+
+def _pack(values: Any, dtype: str, blobs: List[bytes], offset: List[int]) -> int:
+    blob = np.asarray(values, dtype=dtype).tobytes()
+    blobs.append(blob)
+    start = offset[0]
+    offset[0] += len(blob)
+    return start
+
+
+def _encode(node: Any, blobs: List[bytes], offset: List[int]) -> Any:
+    """Replace numbers with references to packed arrays in the data section.
+
+    A dict of equally long number lists (curves by asset type, factors by
+    year) becomes one matrix with a key list, so the header, which every
+    worker parses into its own memory, holds one entry per table rather
+    than one per row.
+    """
+    if isinstance(node, dict):
+        values = list(node.values())
+        if values and all(_is_numeric_list(v) and len(v) == len(values[0]) for v in values):
+            dtype = _dtype([x for v in values for x in v])
+            start = _pack(values, dtype, blobs, offset)
+            return {"$rows": [dtype, start, len(values[0]), list(node)]}
+        return {k: _encode(v, blobs, offset) for k, v in node.items()}
+    if _is_numeric_list(node):
+        dtype = _dtype(node)
+        return {"$array": [dtype, _pack(node, dtype, blobs, offset), len(node)]}
+    if isinstance(node, list):
+        return [_encode(v, blobs, offset) for v in node]
+    return node
+
+
+class ReadOnlyRows(Mapping):
+    """Key -> row of a mapped matrix; rows are views made on access"""
+
+    def __init__(self, keys: List[str], matrix: np.ndarray):
+        self._index = {key: i for i, key in enumerate(keys)}
+        self.matrix = matrix
+
+    def __getitem__(self, key: str) -> np.ndarray:
+        return self.matrix[self._index[key]]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+
+def compile_datasets(datasets: Dict[str, Any]) -> bytes:
+    """Pack datasets into one file: magic, header length, JSON header, then 8-byte aligned arrays.
+
+    The header keeps each dataset's structure and scalars; the numbers, which
+    are nearly all of the data, live in the array section and are read in
+    place from the memory map.
+    """
+    blobs: List[bytes] = []
+    offset = [0]
+    tree = {name: _encode(datasets[name], blobs, offset) for name in sorted(datasets)}
+    header = json.dumps({"datasets": tree}, separators=(",", ":")).encode()
+    prefix = len(MAGIC) + 8
+    header += b" " * (-(prefix + len(header)) % 8)
+    return MAGIC + struct.pack("<Q", len(header)) + header + b"".join(blobs)
+
+
+def load_source(directory: Path = SOURCE_DIR) -> Dict[str, Any]:
+    """Every *.json file in `directory` as a dataset named after the file"""
+    datasets = {}
+    for path in sorted(Path(directory).glob("*.json")):
+        with open(path) as f:
+            datasets[path.stem] = json.load(f)
+    return datasets
+
+
+def _write_atomically(path: str, content: bytes) -> None:
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+
+def content_version(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()[:16]
+
+
+def publish(datasets: Dict[str, Any], directory: str) -> str:
+    """Compile `datasets` as a new version and point CURRENT at it; returns the version.
+
+    Workers pick the version up on their next check. Both the data file and
+    the pointer are written to a temporary name and renamed into place, so a
+    worker sees either the old version or the complete new one.
+    """
+    content = compile_datasets(datasets)
+    version = content_version(content)
+    filename = f"reference-{version}.bin"
+    os.makedirs(directory, exist_ok=True)
+    if not os.path.exists(os.path.join(directory, filename)):
+        _write_atomically(os.path.join(directory, filename), content)
+    _write_atomically(os.path.join(directory, POINTER), filename.encode())
+
+    # Unlinking a mapped file is safe; workers still on it keep their mapping until they swap
+    published = sorted(
+        (name for name in os.listdir(directory) if name.startswith("reference-") and name.endswith(".bin")),
+        key=lambda name: os.stat(os.path.join(directory, name)).st_mtime,
+        reverse=True
+    )
+    for name in [n for n in published if n != filename][KEEP_VERSIONS:]:
+        try:
+            os.remove(os.path.join(directory, name))
+        except OSError:
+            pass
+    return version
+
+
+class ReferenceSnapshot:
+    """One published version, memory-mapped read-only.
+
+    Arrays are numpy views straight onto the mapping, so every worker
+    reading the same file shares the same physical pages and nothing is
+    copied into the process. They are read-only; callers must not write
+    to them.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.version = os.path.basename(path)[len("reference-"):-len(".bin")]
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a compiled reference data file")
+        header_length = struct.unpack_from("<Q", self._map, len(MAGIC))[0]
+        start = len(MAGIC) + 8
+        self._tree = json.loads(self._map[start:start + header_length])["datasets"]
+        self._data_offset = start + header_length
+        self._datasets: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _resolve(self, node: Any) -> Any:
+        if isinstance(node, dict):
+            if "$array" in node:
+                dtype, offset, count = node["$array"]
+                return np.frombuffer(self._map, dtype=dtype, count=count, offset=self._data_offset + offset)
+            if "$rows" in node:
+                dtype, offset, columns, keys = node["$rows"]
+                matrix = np.frombuffer(self._map, dtype=dtype, count=len(keys) * columns, offset=self._data_offset + offset)
+                return ReadOnlyRows(keys, matrix.reshape(len(keys), columns))
+            return {k: self._resolve(v) for k, v in node.items()}
+        if isinstance(node, list):
+            return [self._resolve(v) for v in node]
+        return node
+
+    def dataset(self, name: str) -> Dict[str, Any]:
+        """The dataset with its number lists as read-only arrays (tables of them as ReadOnlyRows)"""
+        data = self._datasets.get(name)
+        if data is None:
+            if name not in self._tree:
+                raise KeyError(f"No reference dataset '{name}'")
+            with self._lock:
+                data = self._datasets.setdefault(name, self._resolve(self._tree[name]))
+        return data
+
+    @property
+    def names(self) -> List[str]:
+        return sorted(self._tree)
+
+    @property
+    def size(self) -> int:
+        return len(self._map)
+
+
+class ReferenceStore:
+    """The current reference data version of this worker, swapped when a new one is published.
+
+    At start-up a worker publishes the datasets bundled in app/data when
+    they changed since they were last published (or nothing has been
+    published yet), so a deploy with changed data files takes effect while
+    a version published with scripts/publish_reference_data.py survives
+    worker restarts. A caller that holds on to a snapshot
+    keeps a consistent view across a swap; the old mapping is released when
+    the last reference to it goes.
+    """
+
+    def __init__(self, directory: str, source: Path = SOURCE_DIR, check_interval: float = 5.0):
+        self.directory = directory
+        self.source = source
+        self.check_interval = check_interval
+        self._snapshot: Optional[ReferenceSnapshot] = None
+        self._pointer: Optional[Tuple[int, int]] = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self.swaps = 0
+
+    def current(self) -> ReferenceSnapshot:
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() < self._next_check:
+            return snapshot
+        with self._lock:
+            if self._snapshot is None or time.monotonic() >= self._next_check:
+                self._refresh()
+            return self._snapshot
+
+    def _publish_bundled(self, pointer_path: str) -> None:
+        datasets = load_source(self.source)
+        bundled = content_version(compile_datasets(datasets))
+        bundled_path = os.path.join(self.directory, BUNDLED)
+        try:
+            with open(bundled_path) as f:
+                published = f.read().strip()
+        except FileNotFoundError:
+            published = None
+        if published == bundled and os.path.exists(pointer_path):
+            return
+        publish(datasets, self.directory)
+        _write_atomically(bundled_path, bundled.encode())
+        logger.info(f"Published bundled reference data version {bundled} (last bundled: {published or 'none'})")
+
+    def _refresh(self) -> None:
+        pointer_path = os.path.join(self.directory, POINTER)
+        if self._snapshot is None:
+            self._publish_bundled(pointer_path)
+        stat = os.stat(pointer_path)
+        self._next_check = time.monotonic() + self.check_interval
+        pointer = (stat.st_ino, stat.st_mtime_ns)
+        if pointer == self._pointer and self._snapshot is not None:
+            return
+        with open(pointer_path) as f:
+            filename = f.read().strip()
+        try:
+            snapshot = ReferenceSnapshot(os.path.join(self.directory, filename))
+        except (OSError, ValueError) as e:
+            if self._snapshot is None:
+                raise
+            logger.error(f"Keeping reference data version {self._snapshot.version}: {str(e)}")
+            return
+        if self._snapshot is not None and snapshot.version != self._snapshot.version:
+            self.swaps += 1
+            logger.info(f"Reference data swapped from version {self._snapshot.version} to {snapshot.version}")
+        self._snapshot, self._pointer = snapshot, pointer
+
+    def snapshot(self) -> Dict[str, Any]:
+        current = self.current()
+        return {
+            "version": current.version,
+            "datasets": current.names,
+            "mapped_bytes": current.size,
+            "swaps": self.swaps,
+            "directory": self.directory,
+        }
+
+
+reference_data = ReferenceStore(
+    settings.REFERENCE_DATA_DIR or os.path.join(tempfile.gettempdir(), "nzx-reference"),
+    check_interval=settings.REFERENCE_DATA_CHECK_SECONDS
+)
@@ -0,0 +1,241 @@
+from typing import Any, Dict, Iterable, List, Optional
+from app.core.db import supabase
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Numeric roll-up columns shared by portfolio_rollups and organization_rollups
+ROLLUP_FIELDS = (
+    "asset_count",
+    "floor_area",
+    "tenant_count",
+    "occupied_area",
+    "consumption_kwh",
+    "emissions_kgco2e",
+)
+
+# Floating point sums accumulated incrementally never match a rebuild exactly
+DRIFT_TOLERANCE = 1e-6
+
+
+def empty_rollup() -> Dict[str, Any]:
+    rollup: Dict[str, Any] = {field: 0 for field in ROLLUP_FIELDS}
+    rollup["assets_by_type"] = {}
+    return rollup
+
+
+def _add(rollup: Dict[str, Any], delta: Dict[str, Any]) -> None:
+    for field in ROLLUP_FIELDS:
+        rollup[field] = (rollup.get(field) or 0) + (delta.get(field) or 0)
+    counts = rollup.setdefault("assets_by_type", {})
+    for asset_type, count in (delta.get("assets_by_type") or {}).items():
+        counts[asset_type] = counts.get(asset_type, 0) + count
+        if counts[asset_type] == 0:
+            del counts[asset_type]
+
+
+def _asset_contribution(asset: Dict[str, Any], sign: int) -> Dict[str, Any]:
+    asset_type = asset.get("asset_type")
+    return {
+        "asset_count": sign,
+        "floor_area": sign * (asset.get("floor_area") or 0),
+        "assets_by_type": {asset_type: sign} if asset_type else {},
+    }
+
+
+def asset_deltas(
+    before: Optional[Dict[str, Any]],
+    after: Optional[Dict[str, Any]],
+    carried: Optional[Dict[str, Any]] = None
+) -> Dict[str, Dict[str, Any]]:
+    """Per-portfolio deltas for an asset insert (before=None), update or delete (after=None).
+
+    `carried` holds the asset's tenant and bill totals (asset_totals); they
+    leave the old portfolio and join the new one when the asset moves.
+    """
+    moved = (before or {}).get("portfolio_id") != (after or {}).get("portfolio_id")
+    deltas: Dict[str, Dict[str, Any]] = {}
+    for asset, sign in ((before, -1), (after, 1)):
+        if not asset or not asset.get("portfolio_id"):
+            continue
+        delta = deltas.setdefault(asset["portfolio_id"], empty_rollup())
+        _add(delta, _asset_contribution(asset, sign))
+        if moved and carried:
+            _add(delta, {field: sign * (carried.get(field) or 0) for field in ROLLUP_FIELDS})
+    return {pid: delta for pid, delta in deltas.items() if not _is_zero(delta)}
+
+
+def tenant_delta(tenant: Dict[str, Any], sign: int = 1) -> Dict[str, Any]:
+    return {
+        "tenant_count": sign,
+        "occupied_area": sign * (tenant.get("area_occupied") or 0),
+    }
+
+
+def bill_delta(bill: Dict[str, Any], sign: int = 1) -> Dict[str, Any]:
+    return {
+        "consumption_kwh": sign * (bill.get("consumption_kwh") or 0),
+        "emissions_kgco2e": sign * (bill.get("emissions_kgco2e") or 0),
+    }
+
+
+def _is_zero(delta: Dict[str, Any]) -> bool:
+    return not delta.get("assets_by_type") and all(
+        abs(delta.get(field) or 0) <= DRIFT_TOLERANCE for field in ROLLUP_FIELDS
+    )
+
+
+def apply_delta(portfolio_id: str, delta: Dict[str, Any]) -> None:
+    """Atomically add a delta to a portfolio roll-up and its organization roll-up.
+
+    Roll-ups are derived data, so a failure here is logged rather than failing
+    the write that triggered it; the rebuild script repairs any drift.
+    """
+    if not portfolio_id or _is_zero(delta):
+        return
+    try:
+        supabase.rpc("apply_rollup_delta", {
+            "p_portfolio_id": portfolio_id,
+            "p_delta": delta
+        }).execute()
+    except Exception as e:
+        logger.error(f"Error applying roll-up delta to portfolio {portfolio_id}: {str(e)}")
+
+
+def asset_totals(asset_id: str) -> Dict[str, Any]:
+    """The tenant and bill sums one asset contributes to its portfolio"""
+    totals = empty_rollup()
+    for tenant in _fetch_in("asset_tenants", "asset_id,area_occupied", "asset_id", [asset_id]):
+        _add(totals, tenant_delta(tenant))
+    for bill in _fetch_in("energy_bills", "asset_id,consumption_kwh,emissions_kgco2e", "asset_id", [asset_id]):
+        _add(totals, bill_delta(bill))
+    return totals
+
+
+def apply_asset_change(before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]) -> None:
+    carried = None
+    if before and after and before.get("portfolio_id") != after.get("portfolio_id"):
+        try:
+            carried = asset_totals(before["id"])
+        except Exception as e:
+            logger.error(f"Error reading totals of moved asset {before['id']}: {str(e)}")
+    for portfolio_id, delta in asset_deltas(before, after, carried).items():
+        apply_delta(portfolio_id, delta)
+
+
+def portfolio_id_for_asset(asset_id: str) -> Optional[str]:
+    response = supabase.table("assets").select("portfolio_id").eq("id", asset_id).single().execute()
+    return response.data.get("portfolio_id") if response.data else None
+
+
+def get_portfolio_rollup(portfolio_id: str) -> Dict[str, Any]:
+    """Read a portfolio's roll-up row; a single primary-key lookup"""
+    response = supabase.table("portfolio_rollups").select("*").eq("portfolio_id", portfolio_id).execute()
+    if response.data:
+        return response.data[0]
+    return {"portfolio_id": portfolio_id, **empty_rollup()}
+
+
+def get_organization_rollup(organization_id: str) -> Dict[str, Any]:
+    """Read an organization's roll-up row; a single primary-key lookup"""
+    response = supabase.table("organization_rollups").select("*").eq("organization_id", organization_id).execute()
+    if response.data:
+        return response.data[0]
+    return {"organization_id": organization_id, **empty_rollup()}
+
+
+def compute_rollups(
+    portfolios: Iterable[Dict[str, Any]],
+    assets: Iterable[Dict[str, Any]],
+    tenants: Iterable[Dict[str, Any]],
+    bills: Iterable[Dict[str, Any]],
+) -> Dict[str, Dict[str, Any]]:
+    """Recompute portfolio roll-ups from raw rows"""
+    result = {p["id"]: empty_rollup() for p in portfolios}
+    asset_portfolio: Dict[str, str] = {}
+
+    for asset in assets:
+        portfolio_id = asset.get("portfolio_id")
+        if portfolio_id not in result:
+            continue
+        asset_portfolio[asset["id"]] = portfolio_id
+        _add(result[portfolio_id], _asset_contribution(asset, 1))
+
+    for tenant in tenants:
+        portfolio_id = asset_portfolio.get(tenant.get("asset_id"))
+        if portfolio_id:
+            _add(result[portfolio_id], tenant_delta(tenant))
+
+    for bill in bills:
+        portfolio_id = asset_portfolio.get(bill.get("asset_id"))
+        if portfolio_id:
+            _add(result[portfolio_id], bill_delta(bill))
+
+    return result
+
+
+def find_drift(stored: Dict[str, Any], expected: Dict[str, Any]) -> Dict[str, Any]:
+    """Fields where a stored roll-up differs from the recomputed one"""
+    drift = {}
+    for field in ROLLUP_FIELDS:
+        have, want = stored.get(field) or 0, expected.get(field) or 0
+        if abs(have - want) > DRIFT_TOLERANCE * max(1.0, abs(want)):
+            drift[field] = {"stored": have, "expected": want}
+    if (stored.get("assets_by_type") or {}) != (expected.get("assets_by_type") or {}):
+        drift["assets_by_type"] = {
+            "stored": stored.get("assets_by_type") or {},
+            "expected": expected.get("assets_by_type") or {}
+        }
+    return drift
+
+
+def _fetch_in(table: str, columns: str, field: str, values: List[str]) -> List[Dict[str, Any]]:
+    if not values:
+        return []
+    return supabase.table(table).select(columns).in_(field, values).execute().data or []
+
+
+def rebuild_organization(organization_id: str, fix: bool = False) -> Dict[str, Any]:
+    """Recompute an organization's roll-ups from raw rows and report (optionally repair) drift"""
+    portfolios = supabase.table("portfolios").select("id").eq("organization_id", organization_id).execute().data or []
+    portfolio_ids = [p["id"] for p in portfolios]
+    assets = _fetch_in("assets", "id,portfolio_id,asset_type,floor_area", "portfolio_id", portfolio_ids)
+    asset_ids = [a["id"] for a in assets]
+    tenants = _fetch_in("asset_tenants", "asset_id,area_occupied", "asset_id", asset_ids)
+    bills = _fetch_in("energy_bills", "asset_id,consumption_kwh,emissions_kgco2e", "asset_id", asset_ids)
+
+    expected = compute_rollups(portfolios, assets, tenants, bills)
+    stored = {
+        row["portfolio_id"]: row
+        for row in _fetch_in("portfolio_rollups", "*", "portfolio_id", portfolio_ids)
+    }
+
+    organization_total = empty_rollup()
+    drift = {}
+    for portfolio_id, rollup in expected.items():
+        _add(organization_total, rollup)
+        portfolio_drift = find_drift(stored.get(portfolio_id, {}), rollup)
+        if portfolio_drift:
+            drift[portfolio_id] = portfolio_drift
+
+    stored_org = get_organization_rollup(organization_id)
+    organization_drift = find_drift(stored_org, organization_total)
+
+    if fix and (drift or organization_drift):
+        supabase.table("portfolio_rollups").upsert([
+            {"portfolio_id": pid, "organization_id": organization_id, **rollup}
+            for pid, rollup in expected.items()
+        ]).execute()
+        supabase.table("organization_rollups").upsert({
+            "organization_id": organization_id,
+            **organization_total
+        }).execute()
+        logger.info(f"Rebuilt roll-ups for organization {organization_id}")
+
+    return {
+        "organization_id": organization_id,
+        "portfolios_checked": len(expected),
+        "portfolio_drift": drift,
+        "organization_drift": organization_drift,
+        "fixed": bool(fix and (drift or organization_drift))
+    }
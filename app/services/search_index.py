@@ -0,0 +1,152 @@
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from array import array
+import re
+import threading
+import time
+import numpy as np
+import logging
+from app.services.asset_indexes import AssetIndexRegistry
+
+logger = logging.getLogger(__name__)
+
+ASSET_COLUMNS = "id,name,address,description,asset_type,portfolio_id"
+
+# A trigram found in the name counts for more than one found in the address or description
+FIELD_WEIGHTS = {"name": 3.0, "address": 2.0, "description": 1.0}
+
+# Fraction of the query's trigrams a result must share; lower is more typo tolerant
+MIN_MATCH = 0.3
+
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+
+
+def trigrams(text: Optional[str]) -> Set[str]:
+    """pg_trgm-style trigrams: lowercase words padded with two leading and one trailing space"""
+    if not text:
+        return set()
+    grams: Set[str] = set()
+    for word in _NON_WORD.sub(" ", text.lower()).split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def document_trigrams(asset: Dict[str, Any]) -> Dict[str, float]:
+    weights: Dict[str, float] = {}
+    for field, weight in FIELD_WEIGHTS.items():
+        for gram in trigrams(asset.get(field)):
+            if weight > weights.get(gram, 0.0):
+                weights[gram] = weight
+    return weights
+
+
+class AssetSearchIndex:
+    """Inverted trigram index over one organization's assets.
+
+    Each asset occupies an integer slot; postings are compact int32/float32
+    arrays of (slot, field weight) per trigram, so scoring a query is a couple
+    of numpy bincounts over the query's postings. Updates append a fresh slot
+    and retire the old one; retired slots are compacted away once they make
+    up half of the index.
+    """
+
+    def __init__(self, assets: Iterable[Dict[str, Any]] = ()):
+        self.built_at = time.monotonic()
+        self._lock = threading.RLock()
+        self._reset()
+        for asset in assets:
+            self.upsert(asset)
+
+    def _reset(self) -> None:
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._slot_of: Dict[str, int] = {}
+        self._slots: List[Optional[Dict[str, Any]]] = []
+        self._sizes = array("i")
+        self._alive = bytearray()
+        self._dead = 0
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    def upsert(self, asset: Dict[str, Any]) -> None:
+        asset_id = str(asset["id"])
+        with self._lock:
+            previous = self._slot_of.get(asset_id)
+            merged = dict(self._slots[previous]) if previous is not None else {}
+            merged.update({k: asset[k] for k in ASSET_COLUMNS.split(",") if k in asset})
+            if previous is not None:
+                self._retire(previous)
+
+            slot = len(self._slots)
+            grams = document_trigrams(merged)
+            for gram, weight in grams.items():
+                ids, weights = self._postings.setdefault(gram, (array("i"), array("f")))
+                ids.append(slot)
+                weights.append(weight)
+            self._slots.append(merged)
+            self._sizes.append(len(grams))
+            self._alive.append(1)
+            self._slot_of[asset_id] = slot
+            self._maybe_compact()
+
+    def remove(self, asset_id: str) -> None:
+        with self._lock:
+            slot = self._slot_of.pop(str(asset_id), None)
+            if slot is not None:
+                self._retire(slot)
+                self._maybe_compact()
+
+    def _retire(self, slot: int) -> None:
+        self._alive[slot] = 0
+        self._slots[slot] = None
+        self._dead += 1
+
+    def _maybe_compact(self) -> None:
+        if self._dead > 1000 and self._dead * 2 > len(self._slots):
+            live = [asset for asset in self._slots if asset is not None]
+            self._reset()
+            for asset in live:
+                self.upsert(asset)
+
+    def _score(self, query_grams: Set[str]):
+        n = len(self._slots)
+        ids = [np.frombuffer(self._postings[g][0], dtype=np.int32) for g in query_grams if g in self._postings]
+        weights = [np.frombuffer(self._postings[g][1], dtype=np.float32) for g in query_grams if g in self._postings]
+        if not ids:
+            return None, None
+        all_ids = np.concatenate(ids)
+        weighted = np.bincount(all_ids, weights=np.concatenate(weights), minlength=n)
+        matched = np.bincount(all_ids, minlength=n)
+        return weighted, matched
+
+    def search(self, query: str, limit: int = 20, portfolio_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        query_grams = trigrams(query)
+        if not query_grams:
+            return []
+        with self._lock:
+            weighted, matched = self._score(query_grams)
+            if weighted is None:
+                return []
+            alive = np.frombuffer(bytes(self._alive), dtype=np.uint8).astype(bool)
+            candidates = np.flatnonzero(alive & (matched >= MIN_MATCH * len(query_grams)))
+            if not len(candidates):
+                return []
+
+            # Weighted share of the query found, plus a nudge towards documents
+            # the query covers most of (shorter, closer names)
+            sizes = np.frombuffer(self._sizes, dtype=np.int32)[candidates]
+            scores = weighted[candidates] / (max(FIELD_WEIGHTS.values()) * len(query_grams))
+            scores += 0.1 * matched[candidates] / np.maximum(sizes, 1)
+
+            results = []
+            for i in np.argsort(-scores, kind="stable"):
+                asset = self._slots[candidates[i]]
+                if portfolio_id and asset.get("portfolio_id") != portfolio_id:
+                    continue
+                results.append({**asset, "score": round(float(scores[i]), 4)})
+                if len(results) >= limit:
+                    break
+            return results
+
+
+asset_search = AssetIndexRegistry("search", ASSET_COLUMNS, AssetSearchIndex)
@@ -0,0 +1,53 @@
+from typing import Any, Dict, Optional
+from datetime import datetime, timedelta, timezone
+import logging
+from app.core.changes import EPOCH, SyncCursor, decode_cursor, encode_cursor, fetch_page
+from app.core.config import settings
+from app.core.scoping import scoped_select, strip_scope
+
+logger = logging.getLogger(__name__)
+
+# Tables clients can keep a replica of; each has a database-assigned updated_at and tombstones (sql/sync.sql)
+SYNC_TABLES = ("organizations", "portfolios", "assets", "asset_tenants", "asset_documents")
+
+
+class CursorExpired(ValueError):
+    """The cursor predates the oldest tombstones kept; the client must resync from scratch"""
+
+
+def fetch_changes(table: str, organization_id: str, since: Optional[str], limit: int) -> Dict[str, Any]:
+    """One page of an organization's rows in `table` created, updated or deleted after the `since` cursor.
+
+    Without a cursor the page starts a full sync: every row, and deletions
+    from now on. Only changes older than SYNC_SAFETY_LAG_SECONDS are
+    included, so a transaction that commits late with an earlier updated_at
+    is still picked up by the next call. Clients apply `items` as upserts,
+    drop the ids in `deleted` (deleting a parent deletes its children), and
+    call again with `cursor`, straight away while `has_more` is true.
+    """
+    if table not in SYNC_TABLES:
+        raise KeyError(f"Table '{table}' cannot be synced")
+    now = datetime.now(timezone.utc)
+    upper = now - timedelta(seconds=settings.SYNC_SAFETY_LAG_SECONDS)
+    if since:
+        cursor = decode_cursor(since)
+        if cursor.deleted[0] < now - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS):
+            raise CursorExpired("Sync cursor is too old; start again without one")
+    else:
+        cursor = SyncCursor(rows=(EPOCH, ""), deleted=(upper, ""))
+
+    items, rows_position, more_items = fetch_page(
+        lambda: scoped_select(table, organization_id),
+        "updated_at", cursor.rows, max(upper, cursor.rows[0]), limit
+    )
+    tombstones, deleted_position, more_deleted = fetch_page(
+        lambda: scoped_select("sync_tombstones", organization_id, "id,row_id,deleted_at").eq("table_name", table),
+        "deleted_at", cursor.deleted, max(upper, cursor.deleted[0]), limit
+    )
+    return {
+        "table": table,
+        "items": strip_scope(table, items),
+        "deleted": [{"id": t["row_id"], "deleted_at": t["deleted_at"]} for t in tombstones],
+        "cursor": encode_cursor(SyncCursor(rows_position, deleted_position)),
+        "has_more": more_items or more_deleted,
+    }
@@ -1,3 +1,4 @@
+import asyncio
 import os
 import requests
 from typing import Dict, Any, Optional
@@ -36,6 +37,7 @@ class BillReader:
             return {
                 "status": "success",
                 "data": bill_data,
+                "text": extracted_text,
                 "processed_at": datetime.utcnow().isoformat()
             }
         except Exception as e:
@@ -48,24 +50,33 @@ class BillReader:
     
     async def _extract_text(self, file_path: str, file_type: str) -> str:
         """Extract text from document using OCR API"""
+        # Plain text needs no OCR
+        if file_type.startswith("text/"):
+            with open(file_path, 'r', encoding='utf-8', errors='replace') as file:
+                return file.read()
         # Implementation depends on which OCR service you're using
         # Example using a generic REST API:
         if self.ocr_api_key:
-            with open(file_path, 'rb') as file:
-                response = requests.post(
-                    "https://api.ocr-service.com/v1/extract",
-                    headers={"Authorization": f"Bearer {self.ocr_api_key}"},
-                    files={"file": file},
-                    data={"file_type": file_type}
-                )
-                
-                if response.status_code == 200:
-                    return response.json().get("text", "")
-                else:
-                    raise Exception(f"OCR API error: {response.text}")
+            # requests blocks; post from a worker thread so the event loop keeps serving
+            response = await asyncio.to_thread(self._post_to_ocr, file_path, file_type)
+            
+            if response.status_code == 200:
+                return response.json().get("text", "")
+            else:
+                raise Exception(f"OCR API error: {response.text}")
         else:
-            # Fallback to a simpler method or raise error
-            return "OCR API key not configured - text extraction skipped"
+            # Fallback to a simpler method or raise error; no text to index
+            logger.warning("OCR API key not configured - text extraction skipped")
+            return ""
+    
+    def _post_to_ocr(self, file_path: str, file_type: str) -> requests.Response:
+        with open(file_path, 'rb') as file:
+            return requests.post(
+                "https://api.ocr-service.com/v1/extract",
+                headers={"Authorization": f"Bearer {self.ocr_api_key}"},
+                files={"file": file},
+                data={"file_type": file_type}
+            )
     
     def _parse_bill_text(self, text: str) -> Dict[str, Any]:
         """Parse extracted text to find energy consumption data"""
@@ -1,16 +1,3 @@
-from http.server import BaseHTTPRequestHandler
-import json
-
-class handler(BaseHTTPRequestHandler):
-    def do_GET(self):
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.end_headers()
-        
-        response = {
-            "message": "NZX API root endpoint",
-            "status": "ok"
-        }
-        
-        self.wfile.write(json.dumps(response).encode())
-        return 
\ No newline at end of file
+# Serverless entry point (Vercel serves `app`, AWS Lambda calls `handler`).
+# The application lives in app/serverless.py; this module only re-exports it.
+from app.serverless import app, handler
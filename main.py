@@ -1,23 +1,64 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.api import api_router
 from app.core.config import settings
+from app.core.compression import CompressionMiddleware, compression_stats
+from app.core.admission import AdmissionController, AdmissionMiddleware
+from app.core.broker import broker
+from app.core.cache import read_cache
+from app.core.events import event_hub
+from app.core.replica import replica
+from app.core.rate_limit import auth_rate_limiter
+from app.core.logs import RequestLogContextMiddleware, log_pipeline, setup_logging
+from app.core.tracing import TracingMiddleware
+from app.core.metrics import MetricsMiddleware, WorkerMetricsStore, monitor_event_loop, registry, render
+from app.services import provisioning
+from app.services.reference_data import reference_data
+import asyncio
 import logging
 import time
 import os
+import tempfile
 import uvicorn
 from contextlib import asynccontextmanager
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Structured logs, formatted and written by a background thread
+setup_logging()
 logger = logging.getLogger(__name__)
 
+metrics_store = WorkerMetricsStore(
+    settings.METRICS_DIR or os.path.join(tempfile.gettempdir(), "nzx-metrics"),
+    registry,
+    interval=settings.METRICS_WRITE_SECONDS
+)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Set up
-    print(f"Starting application with CORS origins: {settings.CORS_ORIGINS}")
+    logger.info("Starting application with CORS origins: %s", settings.CORS_ORIGINS)
+    stop_provisioning = asyncio.Event()
+    provisioning_worker = asyncio.create_task(provisioning.run_worker(stop_provisioning))
+    metrics_store.start()
+    await broker.start()
+    # Map (and on a fresh host, publish) the reference data before the first request needs it
+    await asyncio.to_thread(reference_data.current)
+    stop_monitor = asyncio.Event()
+    loop_monitor = asyncio.create_task(monitor_event_loop(stop_monitor))
+    stop_replica = asyncio.Event()
+    replica_sync = asyncio.create_task(replica.run(stop_replica)) if replica.enabled else None
     yield
     # Clean up
+    stop_provisioning.set()
+    stop_monitor.set()
+    stop_replica.set()
+    await provisioning_worker
+    await loop_monitor
+    if replica_sync is not None:
+        await replica_sync
+    await broker.stop()
+    metrics_store.stop()
+    log_pipeline.stop()
 
 app = FastAPI(
     title="NZX API",
@@ -26,6 +67,15 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Admission control: bounded concurrency and queue per worker, fast 503 when full.
+# Added before CORS so shed responses still carry CORS headers and preflights are never queued
+admission = AdmissionController(
+    max_concurrency=settings.ADMISSION_MAX_CONCURRENCY,
+    max_queue=settings.ADMISSION_MAX_QUEUE,
+    max_wait=settings.ADMISSION_MAX_WAIT_SECONDS
+)
+app.add_middleware(AdmissionMiddleware, controller=admission)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -35,13 +85,29 @@ app.add_middleware(
     allow_headers=[h.strip() for h in settings.CORS_HEADERS.split(",")],
 )
 
+# gzip/brotli for large responses
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    thread_size=settings.COMPRESSION_THREAD_SIZE
+)
+
+# Upstream calls per request: Server-Timing header, slow-call and N+1 warnings
+app.add_middleware(TracingMiddleware, server_timing=settings.TRACE_SERVER_TIMING)
+
+# Request rate, errors and latency per route template; outside admission so shed requests count
+app.add_middleware(MetricsMiddleware)
+
+# Request id and log sampling decision; outermost so every other layer logs with them
+app.add_middleware(RequestLogContextMiddleware, default_rate=settings.LOG_SAMPLE_RATE)
+
 # Include API router
 app.include_router(api_router, prefix="/api/v1")
 
 @app.get("/")
 async def root():
     """Root endpoint for testing"""
-    print("Root endpoint called")
+    logger.debug("Root endpoint called")
     return {
         "status": "ok",
         "message": "API is running",
@@ -56,6 +122,52 @@ async def health_check():
         "environment": settings.ENVIRONMENT
     }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics summed over every worker"""
+    merged = await asyncio.to_thread(metrics_store.collect)
+    return PlainTextResponse(render(merged), media_type="text/plain; version=0.0.4")
+
+@app.get("/stats/compression")
+async def get_compression_stats():
+    """Egress bytes before and after compression, cache hits and CPU time spent compressing"""
+    return compression_stats.snapshot()
+
+@app.get("/stats/admission")
+async def get_admission_stats():
+    """Active requests, queue depth and shed counts of this worker"""
+    return admission.snapshot()
+
+@app.get("/stats/rate-limits")
+async def get_rate_limit_stats():
+    """Auth rate limiter backend and allowed/rejected counts of this worker"""
+    return auth_rate_limiter.snapshot()
+
+@app.get("/stats/logging")
+async def get_logging_stats():
+    """Log records waiting for the writer thread and records dropped because the queue was full"""
+    return log_pipeline.snapshot()
+
+@app.get("/stats/cache")
+async def get_cache_stats():
+    """Read cache size, shared tier and hit ratio of this worker"""
+    return read_cache.snapshot()
+
+@app.get("/stats/replica")
+async def get_replica_stats():
+    """Whether this worker syncs the local replica and how far behind each table is"""
+    return await asyncio.to_thread(replica.snapshot)
+
+@app.get("/stats/events")
+async def get_event_stats():
+    """Server-sent event streams open in this worker and the events waiting in them"""
+    return event_hub.snapshot()
+
+@app.get("/stats/reference-data")
+async def get_reference_data_stats():
+    """Reference data version mapped by this worker and how often it has been swapped"""
+    return reference_data.snapshot()
+
 @app.get("/routes")
 async def list_routes():
     """List all registered routes"""
@@ -67,5 +179,5 @@ async def list_routes():
 
 @app.get("/debug/simple")
 async def debug_simple():
-    print("Simple debug endpoint called")
+    logger.debug("Simple debug endpoint called")
     return {"status": "ok", "timestamp": time.time()}
\ No newline at end of file
@@ -0,0 +1,136 @@
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the project root directory to Python path
+project_root = str(Path(__file__).parent.parent)
+sys.path.insert(0, project_root)
+
+from app.core.logs import RequestLogContextMiddleware, log_pipeline
+
+logger = logging.getLogger("bench")
+
+
+class FakeResponse:
+    """Shaped like a postgrest APIResponse, whose repr is what the old f-string logs wrote out"""
+
+    def __init__(self, rows):
+        self.data = rows
+        self.count = None
+
+    def __repr__(self):
+        return f"data={self.data!r} count={self.count!r}"
+
+
+ROWS = [
+    {"id": f"{i:08d}-portfolio", "name": f"Portfolio {i}", "organization_id": "org-1",
+     "description": "x" * 40, "created_at": "2024-01-01T00:00:00", "updated_at": "2024-01-01T00:00:00"}
+    for i in range(200)
+]
+RESPONSE = FakeResponse(ROWS)
+
+
+async def before_endpoint():
+    # The pattern the hot endpoints used: f-strings at INFO, rendered whether or not anything is written
+    logger.info(f"Authenticating user with token: {'eyJhbGciOi'}...")
+    logger.info(f"User authenticated: {'user-1'}")
+    logger.info(f"Profile response: {RESPONSE}")
+    logger.info(f"Returning portfolios: {ROWS}")
+
+
+async def after_endpoint():
+    logger.debug("Authenticating bearer token")
+    logger.debug("User authenticated: %s", "user-1")
+    logger.debug("Profile response: %s", RESPONSE)
+    logger.info("Returning %d portfolios", len(ROWS))
+
+
+def asgi_app(endpoint):
+    async def app(scope, receive, send):
+        await endpoint()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"[]"})
+    return app
+
+
+async def drive(app, requests):
+    scope = {"type": "http", "method": "GET", "path": "/api/v1/portfolios/", "headers": []}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app(scope, receive, send)
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+def run(name, endpoint, requests, configure, sample_rate=1.0):
+    sink = tempfile.NamedTemporaryFile("w", delete=False, suffix=".log")
+    configure(sink)
+    app = RequestLogContextMiddleware(asgi_app(endpoint), default_rate=sample_rate)
+    per_request = asyncio.run(drive(app, requests))
+    log_pipeline.stop()
+    sink.close()
+    written = os.path.getsize(sink.name)
+    os.unlink(sink.name)
+    return name, per_request, written / requests
+
+
+def basic_config(level):
+    def configure(sink):
+        log_pipeline.stop()
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        handler = logging.StreamHandler(sink)
+        handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+        root.addHandler(handler)
+        root.setLevel(level)
+    return configure
+
+
+def pipeline(level):
+    def configure(sink):
+        log_pipeline.setup(level=level, queue_size=1000000, stream=sink)
+    return configure
+
+
+def bench_logging(requests):
+    results = [
+        run("no logging", after_endpoint, requests, basic_config(logging.CRITICAL)),
+        run("before: f-strings, sync handler, INFO", before_endpoint, requests, basic_config(logging.INFO)),
+        run("after: queue + lazy args, INFO", after_endpoint, requests, pipeline("INFO")),
+        run("after: queue + lazy args, DEBUG, all sampled", after_endpoint, requests, pipeline("DEBUG")),
+        run("after: queue + lazy args, DEBUG, 10% sampled", after_endpoint, requests, pipeline("DEBUG"), 0.1),
+    ]
+    baseline = results[0][1]
+
+    print(f"Logging overhead on the event loop over {requests} requests:")
+    for name, per_request, written in results:
+        print(f"  {name:<48} {per_request - baseline:8.1f} µs/request  {written:8.0f} bytes/request")
+
+    before = results[1][1] - baseline
+    after = results[2][1] - baseline
+    success = after < before
+    if success:
+        print(f"✅ Logging overhead down from {before:.1f} to {after:.1f} µs per request")
+    else:
+        print(f"❌ Logging overhead did not improve ({before:.1f} -> {after:.1f} µs per request)")
+    return success
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure per-request logging overhead before and after the structured pipeline")
+    parser.add_argument("--requests", type=int, default=5000, help="Requests to drive through each configuration")
+    args = parser.parse_args()
+
+    success = bench_logging(args.requests)
+    sys.exit(0 if success else 1)
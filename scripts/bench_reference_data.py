@@ -0,0 +1,125 @@
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the project root directory to Python path
+project_root = str(Path(__file__).parent.parent)
+sys.path.insert(0, project_root)
+
+import numpy as np
+from app.services.reference_data import ReferenceSnapshot, publish
+
+ASSET_TYPES = ["office", "retail", "industrial", "residential", "hotel", "healthcare", "education", "logistics"]
+YEARS = list(range(2020, 2051))
+
+
+def synthetic_pathways(regions):
+    """pathways.json grown to `regions` regions, the way benchmark and pathway tables grow"""
+    rng = np.random.default_rng(0)
+    return {
+        "version": "bench",
+        "years": YEARS,
+        "pathways": {
+            f"region-{r}": {t: [round(float(v), 2) for v in rng.uniform(5, 120, len(YEARS))] for t in ASSET_TYPES}
+            for r in range(regions)
+        },
+    }
+
+
+def private_kib():
+    """Unique (private) and proportional set size of this process, from /proc"""
+    sizes = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ("Private_Clean:", "Private_Dirty:", "Pss:"):
+                sizes[parts[0][:-1]] = int(parts[1])
+    return sizes["Private_Clean"] + sizes["Private_Dirty"], sizes["Pss"]
+
+
+def load_json(path):
+    # What each worker did before: parse the JSON into its own Python objects
+    with open(path) as f:
+        data = json.load(f)
+    return data, sum(sum(curve) for region in data["pathways"].values() for curve in region.values())
+
+
+def load_mapped(path):
+    snapshot = ReferenceSnapshot(path)
+    data = snapshot.dataset("pathways")
+    return (snapshot, data), sum(float(curve.sum()) for region in data["pathways"].values() for curve in region.values())
+
+
+def worker(loader, path, ready, results):
+    before, _ = private_kib()
+    data, total = loader(path)
+    after, pss = private_kib()
+    results.put((after - before, pss, total))
+    # Hold the data until every worker has measured, as a running server would
+    ready.wait()
+
+
+def run(loader, path, workers):
+    context = multiprocessing.get_context("fork")
+    ready, results = context.Event(), context.Queue()
+    processes = [context.Process(target=worker, args=(loader, path, ready, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    measured = [results.get() for _ in processes]
+    ready.set()
+    for process in processes:
+        process.join()
+    return measured
+
+
+def bench_reference_data(regions, workers):
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        print("❌ Needs Linux /proc/self/smaps_rollup to measure per-worker memory")
+        return False
+
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "pathways.json")
+        dataset = synthetic_pathways(regions)
+        with open(source, "w") as f:
+            json.dump(dataset, f)
+        version = publish({"pathways": dataset}, directory)
+        compiled = os.path.join(directory, f"reference-{version}.bin")
+        # Workers are forked from here; they must not start out sharing the generated dataset
+        del dataset
+        gc.collect()
+
+        print(f"{regions} regions x {len(ASSET_TYPES)} asset types x {len(YEARS)} years, {workers} workers")
+        print(f"  JSON {os.path.getsize(source) / 1024:.0f} KiB, compiled {os.path.getsize(compiled) / 1024:.0f} KiB")
+        before = run(load_json, source, workers)
+        after = run(load_mapped, compiled, workers)
+
+    for name, measured in (("before: json.load per worker", before), ("after: shared mmap", after)):
+        private = sum(m[0] for m in measured) / len(measured)
+        pss = sum(m[1] for m in measured) / len(measured)
+        print(f"  {name:<32} {private:10.0f} KiB private per worker  {pss:10.0f} KiB PSS")
+
+    if abs(before[0][2] - after[0][2]) > 1e-6 * abs(before[0][2]):
+        print("❌ Mapped data does not match the JSON")
+        return False
+    before_private = sum(m[0] for m in before) / len(before)
+    after_private = sum(m[0] for m in after) / len(after)
+    success = after_private < before_private / 2
+    if success:
+        print(f"✅ Private memory per worker down from {before_private:.0f} to {after_private:.0f} KiB")
+    else:
+        print(f"❌ Private memory per worker did not drop enough ({before_private:.0f} -> {after_private:.0f} KiB)")
+    return success
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare per-worker memory of JSON-loaded and memory-mapped reference data")
+    parser.add_argument("--regions", type=int, default=2000, help="Regions in the synthetic pathway table")
+    parser.add_argument("--workers", type=int, default=4, help="Worker processes, as in render.yaml")
+    args = parser.parse_args()
+
+    success = bench_reference_data(args.regions, args.workers)
+    sys.exit(0 if success else 1)
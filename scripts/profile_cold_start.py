@@ -0,0 +1,105 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# Add the project root directory to Python path
+project_root = str(Path(__file__).parent.parent)
+sys.path.insert(0, project_root)
+
+# Must not be imported just by loading the serverless entry point
+DEFERRED_MODULES = ["supabase", "numpy", "httpx", "app.api.endpoints.assets", "app.services.pathways"]
+
+# Runs in a fresh interpreter: import the entry point, then serve one health check
+PROBE = """
+import asyncio, json, sys, time
+started = time.perf_counter()
+import {module} as entry
+imported = time.perf_counter()
+
+async def first_request():
+    sent = []
+    async def receive():
+        return {{"type": "http.request", "body": b"", "more_body": False}}
+    async def send(message):
+        sent.append(message)
+    scope = {{"type": "http", "method": "GET", "path": "/api/health", "raw_path": b"/api/health",
+             "query_string": b"", "headers": [], "scheme": "http", "server": ("lambda", 443),
+             "client": ("127.0.0.1", 0), "root_path": "", "http_version": "1.1", "asgi": {{"version": "3.0"}}}}
+    await entry.app(scope, receive, send)
+    return sent[0]["status"]
+
+status = asyncio.run(first_request())
+served = time.perf_counter()
+print(json.dumps({{
+    "import_ms": (imported - started) * 1000,
+    "first_request_ms": (served - imported) * 1000,
+    "status": status,
+    "deferred_loaded": [m for m in {deferred!r} if m in sys.modules],
+}}))
+"""
+
+
+def run_probe(module):
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    code = PROBE.format(module=module, deferred=DEFERRED_MODULES)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=project_root, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr[-2000:])
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            # Nested imports are indented under the module that triggered them
+            imports.append((int(cumulative) / 1000, name[1:].rstrip()))
+    report["imports"] = imports
+    return report
+
+
+def profile_cold_start(module, runs, budget_ms, top):
+    reports = [run_probe(module) for _ in range(runs)]
+    best = min(reports, key=lambda r: r["import_ms"] + r["first_request_ms"])
+    total = best["import_ms"] + best["first_request_ms"]
+
+    print(f"Cold start of {module} (best of {runs}):")
+    print(f"  import        {best['import_ms']:8.1f} ms")
+    print(f"  first request {best['first_request_ms']:8.1f} ms (status {best['status']})")
+    print(f"  total         {total:8.1f} ms (budget {budget_ms} ms)")
+    print(f"Slowest imports made directly by {module}:")
+    direct = [(ms, name.strip()) for ms, name in best["imports"] if name.startswith("  ") and not name.startswith("   ")]
+    for ms, name in sorted(direct, reverse=True)[:top]:
+        print(f"  {ms:8.1f} ms  {name}")
+
+    success = True
+    if best["deferred_loaded"]:
+        print(f"❌ Imported at start-up but should be deferred: {', '.join(best['deferred_loaded'])}")
+        success = False
+    if total > budget_ms:
+        print(f"❌ Cold start {total:.0f} ms is over the {budget_ms} ms budget")
+        success = False
+    if best["status"] != 200:
+        print(f"❌ Health check returned {best['status']}")
+        success = False
+    if success:
+        print("✅ Cold start within budget")
+    return success
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure import time and first-request latency of the serverless entry point")
+    parser.add_argument("--module", default="app.serverless", help="Module exposing the ASGI `app`")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters to start; the fastest counts")
+    parser.add_argument("--budget-ms", type=float, default=800, help="Import plus first request must stay under this")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest imports to list")
+    args = parser.parse_args()
+
+    success = profile_cold_start(args.module, args.runs, args.budget_ms, args.top)
+    sys.exit(0 if success else 1)
@@ -0,0 +1,28 @@
+import argparse
+import sys
+from pathlib import Path
+
+# Add the project root directory to Python path
+project_root = str(Path(__file__).parent.parent)
+sys.path.insert(0, project_root)
+
+from app.services.reference_data import SOURCE_DIR, load_source, publish, reference_data
+
+def publish_reference_data(source, directory):
+    datasets = load_source(source)
+    if not datasets:
+        print(f"❌ No *.json datasets in {source}")
+        return False
+    version = publish(datasets, directory)
+    print(f"✅ Published {', '.join(sorted(datasets))} as version {version} in {directory}")
+    print("Running workers swap to it within REFERENCE_DATA_CHECK_SECONDS")
+    return True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile reference datasets and hot-swap them into running workers")
+    parser.add_argument("--source", default=str(SOURCE_DIR), help="Directory of *.json datasets (default: app/data)")
+    parser.add_argument("--dir", default=reference_data.directory, help="REFERENCE_DATA_DIR of the running server")
+    args = parser.parse_args()
+
+    success = publish_reference_data(Path(args.source), args.dir)
+    sys.exit(0 if success else 1)
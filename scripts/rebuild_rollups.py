@@ -0,0 +1,38 @@
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Add the project root directory to Python path
+project_root = str(Path(__file__).parent.parent)
+sys.path.insert(0, project_root)
+
+from app.core.db import supabase
+from app.services.rollups import rebuild_organization
+
+def rebuild_rollups(organization_ids, fix):
+    if not organization_ids:
+        response = supabase.table("organizations").select("id").execute()
+        organization_ids = [org["id"] for org in response.data or []]
+
+    drifted = 0
+    for org_id in organization_ids:
+        report = rebuild_organization(org_id, fix=fix)
+        if report["portfolio_drift"] or report["organization_drift"]:
+            drifted += 1
+            print(f"❌ Drift in organization {org_id}:")
+            print(json.dumps(report, indent=2, default=str))
+        else:
+            print(f"✅ Organization {org_id}: {report['portfolios_checked']} portfolios consistent")
+
+    print(f"Checked {len(organization_ids)} organizations, {drifted} with drift")
+    return drifted == 0 or fix
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check materialized roll-ups for drift")
+    parser.add_argument("--org", action="append", dest="organization_ids", help="Organization id (repeatable)")
+    parser.add_argument("--fix", action="store_true", help="Overwrite drifted roll-ups with recomputed values")
+    args = parser.parse_args()
+
+    success = rebuild_rollups(args.organization_ids or [], args.fix)
+    sys.exit(0 if success else 1)
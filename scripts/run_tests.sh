@@ -3,4 +3,10 @@
 export PYTHONPATH=$PYTHONPATH:$(pwd)
 
 # Run the test
-python scripts/test_models.py 
\ No newline at end of file
+python scripts/test_models.py
+python scripts/test_scoping.py
+python scripts/test_sync.py
+python scripts/test_replica.py
+python scripts/test_events.py
+python scripts/test_document_index.py
+python scripts/test_rate_limit.py
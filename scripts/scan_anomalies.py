@@ -0,0 +1,40 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add the project root directory to Python path
+project_root = str(Path(__file__).parent.parent)
+sys.path.insert(0, project_root)
+
+from app.core.db import supabase
+from app.services.anomalies import scan_bills
+from app.services.bills import fetch_organization_bills
+
+def scan_anomalies(organization_ids, dry_run):
+    if not organization_ids:
+        response = supabase.table("organizations").select("id").execute()
+        organization_ids = [org["id"] for org in response.data or []]
+
+    started = time.perf_counter()
+    for org_id in organization_ids:
+        fetch_started = time.perf_counter()
+        bills = fetch_organization_bills(org_id)
+        fetch_ms = (time.perf_counter() - fetch_started) * 1000
+        result = scan_bills(bills, store=not dry_run)
+        print(
+            f"Organization {org_id}: {result['bills_scanned']} bills, "
+            f"{result['anomalies_found']} anomalies {result['by_type']} "
+            f"(fetch {fetch_ms:.0f} ms, detect {result['duration_ms']:.0f} ms)"
+        )
+    print(f"Scanned {len(organization_ids)} organizations in {time.perf_counter() - started:.1f}s")
+    return True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Nightly meter anomaly scan")
+    parser.add_argument("--org", action="append", dest="organization_ids", help="Organization id (repeatable)")
+    parser.add_argument("--dry-run", action="store_true", help="Detect without storing anomalies")
+    args = parser.parse_args()
+
+    success = scan_anomalies(args.organization_ids or [], args.dry_run)
+    sys.exit(0 if success else 1)
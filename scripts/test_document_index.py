@@ -0,0 +1,50 @@
+import asyncio
+import sys
+from pathlib import Path
+
+# Add the project root directory to Python path
+project_root = str(Path(__file__).parent.parent)
+sys.path.insert(0, project_root)
+
+from app.services import document_index as document_index_module
+from app.services.document_index import DocumentIndex, extract_and_index
+
+BILL = b"""Northern Power Ltd
+Account number 12345-678
+Electricity for Harbour House, billing period 1 January 2024 to 31 January 2024
+Units consumed: 4,210 kWh at 28.4p per kWh
+"""
+
+
+def test_document_index():
+    index = DocumentIndex(":memory:")
+    document_index_module.document_index = index
+    asyncio.run(extract_and_index("doc-1", "caller", "asset-1", "bill", "january.txt", BILL, "text/plain"))
+
+    success = True
+    for query in ("12345", "harbour house", "consumed kwh"):
+        hits = index.search("caller", query)
+        if [hit["document_id"] for hit in hits] != ["doc-1"]:
+            print(f"❌ Search for '{query}' returned {hits}")
+            success = False
+        else:
+            print(f"✅ Processed bill found by '{query}': {hits[0]['snippet']}")
+
+    placeholder = index.search("caller", "example provider") + index.search("caller", "", year=2023)
+    if placeholder or hits and (hits[0]["provider"] or hits[0]["billing_period_start"]):
+        print(f"❌ Placeholder provider or billing period indexed: {placeholder or hits[0]}")
+        success = False
+    else:
+        print("✅ Only the extracted text is indexed; provider and billing period stay empty until parsed")
+
+    if index.search("other", "12345") or index.search("caller", "gas"):
+        print("❌ Search matched another organization's bill or a term not in it")
+        success = False
+    else:
+        print("✅ No match for another organization or a term not in the bill")
+    return success
+
+if __name__ == "__main__":
+    print("Testing document text indexing...")
+    success = test_document_index()
+    sys.exit(0 if success else 1)
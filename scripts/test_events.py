@@ -0,0 +1,126 @@
+import asyncio
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the project root directory to Python path
+project_root = str(Path(__file__).parent.parent)
+sys.path.insert(0, project_root)
+
+from fastapi import HTTPException
+from app.core import events
+from app.core.auth import MEMBERSHIP_CHANNEL
+from app.core.broker import LocalBroker
+from app.core.cache import INVALIDATION_CHANNEL
+from app.core.events import EVENTS_CHANNEL, HEARTBEAT, EventHub
+from app.api.endpoints.events import stream_events
+
+
+def parse(chunk):
+    """(type, data) of each event in a chunk of the stream; heartbeats come out as ("heartbeat", None)"""
+    if chunk == HEARTBEAT:
+        return [("heartbeat", None)]
+    parsed = []
+    for block in chunk.decode().strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.split("\n"))
+        parsed.append((fields["event"], json.loads(fields["data"])))
+    return parsed
+
+
+async def read(body, timeout=2.0):
+    return parse(await asyncio.wait_for(body.__anext__(), timeout))
+
+
+def job(hub, status, key="job:import:1", organization_id="caller"):
+    hub.publish("job", key, {"job": "import", "id": key, "status": status}, organization_id=organization_id)
+
+
+async def run_checks(directory):
+    success = True
+    # Two workers sharing the broker log; the hub lives in the first
+    first, second = LocalBroker(directory, poll_interval=0.05), LocalBroker(directory, poll_interval=0.05)
+    await first.start()
+    await second.start()
+    events.broker = first
+    hub = EventHub(max_streams=10, max_pending=5, heartbeat=0.2, max_connection=60)
+
+    body = hub.stream("caller", "user-1")
+    ready = await read(body)
+    second.publish(INVALIDATION_CHANNEL, {"cache": "read", "tags": ["assets:other", "assets:caller"], "at": time.time()})
+    second.publish(EVENTS_CHANNEL, {
+        "type": "job", "key": "job:import:9", "data": {"job": "import", "status": "running"},
+        "organization_id": "caller", "user_id": None, "at": time.time()
+    })
+    received = await read(body)
+    if len(received) < 2:
+        received += await read(body)
+    if ready[0][0] != "ready" or [(t, d.get("table") or d.get("status")) for t, d in received] != [("change", "assets"), ("job", "running")]:
+        print(f"❌ Events from another worker: {ready} then {received}")
+        success = False
+    else:
+        print("✅ A change and job progress published by another worker reach the stream; other organizations' do not")
+
+    for status in ("running", "10%", "50%", "90%", "succeeded"):
+        job(hub, status)
+    received = await read(body)
+    if [d["status"] for _, d in received] != ["succeeded"]:
+        print(f"❌ Coalescing: {received}")
+        success = False
+    else:
+        print("✅ Progress published faster than the client reads coalesces to the latest state")
+
+    started = time.monotonic()
+    received = await read(body)
+    if received != [("heartbeat", None)] or time.monotonic() - started < 0.15:
+        print(f"❌ Heartbeat: {received}")
+        success = False
+    else:
+        print("✅ An idle stream gets a heartbeat")
+
+    for i in range(6):
+        job(hub, "running", key=f"job:import:{i}")
+    received = await read(body)
+    try:
+        await read(body)
+        ended = False
+    except StopAsyncIteration:
+        ended = True
+    if received != [("reset", {"reason": "overflow"})] or not ended or hub.snapshot()["streams"]:
+        print(f"❌ Slow client: {received}, ended: {ended}, {hub.snapshot()['streams']} streams left")
+        success = False
+    else:
+        print("✅ A client too far behind gets a reset and is disconnected")
+
+    body = hub.stream("caller", "user-1")
+    await read(body)
+    second.publish(MEMBERSHIP_CHANNEL, {"user_id": "user-1"})
+    received = await read(body)
+    if received != [("reset", {"reason": "membership"})]:
+        print(f"❌ Membership change: {received}")
+        success = False
+    else:
+        print("✅ A stream is reset when its user changes organization")
+    await body.aclose()
+
+    events.event_hub.max_streams = 0
+    try:
+        await stream_events(current_user="user-1", org_id="caller")
+        print("❌ Stream opened beyond EVENTS_MAX_STREAMS")
+        success = False
+    except HTTPException as e:
+        print(f"✅ Streams beyond EVENTS_MAX_STREAMS are refused with {e.status_code}")
+    await first.stop()
+    await second.stop()
+    return success
+
+
+def test_events():
+    with tempfile.TemporaryDirectory() as directory:
+        return asyncio.run(run_checks(directory))
+
+if __name__ == "__main__":
+    print("Testing server-sent events...")
+    success = test_events()
+    sys.exit(0 if success else 1)
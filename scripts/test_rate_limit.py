@@ -0,0 +1,122 @@
+import asyncio
+import sys
+from pathlib import Path
+
+# Add the project root directory to Python path
+project_root = str(Path(__file__).parent.parent)
+sys.path.insert(0, project_root)
+
+from fastapi import HTTPException, Request
+from app.core.rate_limit import AUTH_LIMITS, AuthRateLimiter, Limit, MemoryBucketStore
+
+
+def make_request(client_ip, forwarded=None):
+    headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+    return Request({"type": "http", "method": "POST", "path": "/api/v1/auth/signin", "headers": headers, "client": (client_ip, 443)})
+
+
+def attempts(limiter, request, email, count):
+    """Sign-in attempts until the first 429; returns (allowed, the 429 or None)"""
+    for allowed in range(count):
+        try:
+            asyncio.run(limiter.check(request, "signin", email))
+        except HTTPException as e:
+            return allowed, e
+    return count, None
+
+
+def test_buckets():
+    store = MemoryBucketStore()
+    limit = Limit(3, 30)
+    results = [asyncio.run(store.take("k", limit, now=100.0))[0] for _ in range(4)]
+    allowed, retry_after = asyncio.run(store.take("k", limit, now=100.0))
+    refilled = asyncio.run(store.take("k", limit, now=110.0))[0]
+    success = True
+    if results != [True, True, True, False] or allowed or abs(retry_after - 10.0) > 1e-6:
+        print(f"❌ Bucket of 3: {results}, then retry after {retry_after}")
+        success = False
+    else:
+        print("✅ A bucket of 3 allows 3 requests and rejects the 4th with the time to the next token")
+    if not refilled:
+        print("❌ Bucket did not refill after 10 seconds")
+        success = False
+    else:
+        print("✅ The bucket refills at capacity / per_seconds")
+    return success
+
+
+def test_keys():
+    success = True
+    email_limit, ip_limit = AUTH_LIMITS["signin"]
+
+    limiter = AuthRateLimiter()
+    allowed, rejected = attempts(limiter, make_request("203.0.113.1"), "user@example.com", email_limit.capacity + 1)
+    other_ip = attempts(limiter, make_request("203.0.113.2"), "User@Example.com ", 1)[1]
+    other_email = attempts(limiter, make_request("203.0.113.1"), "someone@example.com", 1)[1]
+    if allowed != email_limit.capacity or rejected is None or other_ip is None or other_email is not None:
+        print(f"❌ Per-email limit: {allowed} allowed, other IP rejected: {other_ip is not None}, other email rejected: {other_email is not None}")
+        success = False
+    else:
+        print(f"✅ Per-email: {allowed} attempts, then 429 from any IP and regardless of case; other emails unaffected")
+
+    limiter = AuthRateLimiter()
+    allowed, rejected = 0, None
+    for i in range(ip_limit.capacity + 1):
+        count, rejected = attempts(limiter, make_request("198.51.100.7"), f"user{i}@example.com", 1)
+        allowed += count
+        if rejected:
+            break
+    if allowed != ip_limit.capacity or rejected is None:
+        print(f"❌ Per-IP limit: {allowed} allowed before a 429")
+        success = False
+    else:
+        print(f"✅ Per-IP: {allowed} attempts across different emails, then 429")
+
+    if rejected is not None and (rejected.status_code != 429 or int(rejected.headers["Retry-After"]) < 1):
+        print(f"❌ Rejection: {rejected.status_code} {rejected.headers}")
+        success = False
+    elif rejected is not None:
+        print(f"✅ Rejected with 429 and Retry-After: {rejected.headers['Retry-After']}")
+    return success
+
+
+def test_client_ip():
+    cases = [
+        # (trusted proxies, peer address, X-Forwarded-For, expected)
+        (1, "10.0.0.1", "1.1.1.1, 203.0.113.9", "203.0.113.9"),
+        (2, "10.0.0.1", "1.1.1.1, 203.0.113.9, 10.0.0.2", "203.0.113.9"),
+        (1, "10.0.0.1", None, "10.0.0.1"),
+        (0, "10.0.0.1", "203.0.113.9", "10.0.0.1"),
+        (3, "10.0.0.1", "203.0.113.9", "203.0.113.9"),
+    ]
+    success = True
+    for trusted, peer, forwarded, expected in cases:
+        actual = AuthRateLimiter(trusted_proxies=trusted).client_ip(make_request(peer, forwarded))
+        if actual != expected:
+            print(f"❌ client_ip with {trusted} trusted proxies and X-Forwarded-For {forwarded!r}: {actual}, expected {expected}")
+            success = False
+    if success:
+        print("✅ client_ip takes the address the outermost trusted proxy saw; spoofed entries before it are ignored")
+    return success
+
+
+def test_store_fallback():
+    class BrokenStore:
+        async def take(self, key, limit):
+            raise ConnectionError("redis down")
+
+    limiter = AuthRateLimiter(store=BrokenStore())
+    allowed, rejected = attempts(limiter, make_request("203.0.113.1"), "user@example.com", 10)
+    if allowed != AUTH_LIMITS["signin"][0].capacity or rejected is None or not limiter.store_errors:
+        print(f"❌ Store outage: {allowed} allowed, {limiter.store_errors} store errors")
+        return False
+    print("✅ With the shared store down, the worker's own buckets still enforce the limit")
+    return True
+
+if __name__ == "__main__":
+    print("Testing auth rate limits...")
+    success = test_buckets()
+    success = test_keys() and success
+    success = test_client_ip() and success
+    success = test_store_fallback() and success
+    sys.exit(0 if success else 1)
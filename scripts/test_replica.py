@@ -0,0 +1,143 @@
+import asyncio
+import sys
+from pathlib import Path
+
+# Add the project root directory to Python path
+project_root = str(Path(__file__).parent.parent)
+sys.path.insert(0, project_root)
+
+from app.core import replica as replica_module, scoping
+from app.core.cache import read_cache
+from app.core.config import settings
+from app.core.replica import LocalReplica
+from app.models.organization import OrganizationCreate
+from app.api.endpoints import assets, organizations, portfolios
+from test_sync import SyncClient, stamp
+
+
+def seed(client):
+    client.tables = {name: [] for name in ("organizations", "profiles", "portfolios", "assets", "asset_tenants", "sync_tombstones")}
+    for org_id in ("caller", "other"):
+        client.tables["organizations"].append({"id": org_id, "name": org_id, "updated_at": stamp(600)})
+        client.tables["profiles"].append({"id": f"{org_id}-user", "organization_id": org_id, "updated_at": stamp(600)})
+        for p in range(2):
+            portfolio_id = f"{org_id}-p{p}"
+            client.tables["portfolios"].append({"id": portfolio_id, "name": portfolio_id, "organization_id": org_id, "updated_at": stamp(600)})
+            for a in range(3):
+                asset_id = f"{portfolio_id}-a{a}"
+                client.tables["assets"].append({
+                    "id": asset_id, "name": asset_id, "address": "1 Test St", "asset_type": "office",
+                    "portfolio_id": portfolio_id, "updated_at": stamp(600)
+                })
+                client.tables["asset_tenants"].append({"id": f"{asset_id}-t", "asset_id": asset_id, "updated_at": stamp(600)})
+
+
+class CreateOrganizationClient:
+    """Just enough of the client for POST /organizations/ by a user without one"""
+
+    def table(self, name):
+        self.name, self.row = name, None
+        return self
+
+    def select(self, columns):
+        return self
+
+    def eq(self, column, value):
+        return self
+
+    def single(self):
+        return self
+
+    def insert(self, row):
+        self.row = {"id": "new-org", **row}
+        return self
+
+    def update(self, row):
+        return self
+
+    def execute(self):
+        class Response:
+            data = None
+        response = Response()
+        if self.row:
+            response.data = [self.row]
+        elif self.name == "profiles":
+            response.data = {"organization_id": None}
+        return response
+
+
+def ids(rows):
+    return sorted(row["id"] for row in rows)
+
+
+def test_replica():
+    client = SyncClient()
+    seed(client)
+    scoping.supabase = replica_module.supabase = client
+    replica = LocalReplica(":memory:", max_staleness=300)
+    scoping.replica = replica
+    read_cache.shared = None
+    read_cache.clear()
+
+    success = True
+    upstream = asyncio.run(assets.get_assets(portfolio_id=None, org_id="caller"))
+
+    # The first sync ran two minutes ago; the writes below happened since
+    lag = settings.SYNC_SAFETY_LAG_SECONDS
+    settings.SYNC_SAFETY_LAG_SECONDS = 120
+    applied = replica.sync_once()
+    settings.SYNC_SAFETY_LAG_SECONDS = lag
+
+    read_cache.clear()
+    client.queries = 0
+    served = asyncio.run(assets.get_assets(portfolio_id=None, org_id="caller"))
+    in_portfolio = asyncio.run(assets.get_assets(portfolio_id="caller-p1", org_id="caller"))
+    if client.queries or ids(served) != ids(upstream) or ids(in_portfolio) != [f"caller-p1-a{a}" for a in range(3)]:
+        print(f"❌ Replica reads: {client.queries} upstream queries, {len(served)} of {len(upstream)} assets")
+        success = False
+    else:
+        print(f"✅ Copied {applied} rows; GET /assets/ served locally, same rows as upstream, 0 queries")
+
+    client.tables["portfolios"][0].update(name="Renamed", updated_at=stamp(60))
+    client.tables["sync_tombstones"].append({
+        "id": "t1", "table_name": "portfolios", "row_id": "caller-p1", "organization_id": "caller", "deleted_at": stamp(30)
+    })
+    applied = replica.sync_once()
+    names = [row["name"] for row in replica.fetch_scoped("portfolios", "caller")]
+    remaining = replica.fetch_scoped("assets", "caller")
+    if names != ["Renamed"] or any(row["portfolio_id"] == "caller-p1" for row in remaining):
+        print(f"❌ Incremental sync: portfolios {names}, {len(remaining)} assets left")
+        success = False
+    else:
+        print(f"✅ Incremental sync applied {applied} changes; the deleted portfolio's assets went with it")
+
+    asyncio.run(scoping.invalidate_scope("portfolios", "caller"))
+    client.queries = 0
+    asyncio.run(portfolios.get_portfolios(org_id="caller"))
+    after_write = client.queries
+    replica._writes.clear()
+    replica.max_staleness = 1
+    client.queries = 0
+    read_cache.clear()
+    asyncio.run(portfolios.get_portfolios(org_id="caller"))
+    if after_write != 1 or client.queries != 1:
+        print(f"❌ Fallback: {after_write} queries after a write, {client.queries} when too stale")
+        success = False
+    else:
+        print("✅ Reads go upstream until the replica has caught up with a write, and when it is too stale")
+
+    replica.max_staleness = 300
+    replica.sync_once()
+    organizations.supabase = CreateOrganizationClient()
+    asyncio.run(organizations.create_organization(OrganizationCreate(name="New"), current_user="new-user"))
+    if replica.serves("organizations") or replica.serves("profiles"):
+        print("❌ Organizations or profiles read from the replica right after an organization was created")
+        success = False
+    else:
+        print("✅ Creating an organization sends organization and profile reads upstream until the replica has it")
+    return success
+
+if __name__ == "__main__":
+    print("Testing the local read replica...")
+    success = test_replica()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,261 @@
+import asyncio
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the project root directory to Python path
+project_root = str(Path(__file__).parent.parent)
+sys.path.insert(0, project_root)
+
+from fastapi import BackgroundTasks, HTTPException, UploadFile
+from app.core import scoping
+from app.core.broker import LocalBroker
+from app.core.cache import SqliteCacheTier, read_cache
+from app.models.asset import AssetCreate, AssetUpdate
+from app.models.bill import EnergyBillCreate
+from app.api.endpoints import assets, organizations, portfolios
+
+
+class RecordingTable:
+    """Stand-in for a PostgREST table query: applies eq filters to in-memory rows and counts what it ships"""
+
+    def __init__(self, db, name):
+        self.db = db
+        self.name = name
+        self.filters = []
+
+    def select(self, columns):
+        return self
+
+    def eq(self, column, value):
+        self.filters.append((column, value))
+        return self
+
+    def range(self, start, end):
+        return self
+
+    def _resolve(self, table, row, path):
+        head, _, rest = path.partition(".")
+        if not rest:
+            return row.get(head)
+        # Follow the foreign key of an embedded resource: portfolios -> portfolio_id
+        parent_id = row.get(head[:-1] + "_id")
+        parent = next((r for r in self.db.tables[head] if r["id"] == parent_id), None)
+        return self._resolve(head, parent, rest) if parent else None
+
+    def execute(self):
+        time.sleep(self.db.latency)
+        rows = [
+            dict(row) for row in self.db.tables[self.name]
+            if all(self._resolve(self.name, row, column) == value for column, value in self.filters)
+        ]
+        self.db.queries += 1
+        self.db.rows_shipped += len(rows)
+        return type("Response", (), {"data": rows})()
+
+
+class RecordingClient:
+    def __init__(self):
+        self.tables = {"organizations": [], "portfolios": [], "assets": []}
+        self.queries = 0
+        self.rows_shipped = 0
+        self.latency = 0.0
+
+    def table(self, name):
+        return RecordingTable(self, name)
+
+    def add_organization(self, org_id, n_portfolios, assets_per_portfolio):
+        self.tables["organizations"].append({"id": org_id, "name": org_id})
+        for p in range(n_portfolios):
+            portfolio_id = f"{org_id}-p{p}"
+            self.tables["portfolios"].append({"id": portfolio_id, "name": portfolio_id, "organization_id": org_id})
+            for a in range(assets_per_portfolio):
+                self.tables["assets"].append({
+                    "id": f"{portfolio_id}-a{a}",
+                    "name": f"Asset {a}",
+                    "address": "1 Test St",
+                    "asset_type": "office",
+                    "portfolio_id": portfolio_id
+                })
+
+
+ENDPOINTS = {
+    "GET /assets/": lambda org_id: assets.get_assets(portfolio_id=None, org_id=org_id),
+    "GET /assets/organizations": lambda org_id: assets.get_organizations(org_id=org_id),
+    "GET /assets/portfolios": lambda org_id: assets.get_portfolios(org_id=org_id),
+    "GET /organizations/": lambda org_id: organizations.get_organizations(org_id=org_id),
+    "GET /portfolios/": lambda org_id: portfolios.get_portfolios(org_id=org_id),
+}
+
+
+def reset_cache():
+    # Every read below must reach the client; a shared tier would also persist between runs
+    read_cache.shared = None
+    read_cache.clear()
+
+
+def measure(client, endpoint, org_id):
+    reset_cache()
+    client.queries = client.rows_shipped = 0
+    result = asyncio.run(ENDPOINTS[endpoint](org_id))
+    return client.queries, client.rows_shipped, result
+
+
+def test_scoping():
+    client = RecordingClient()
+    scoping.supabase = client
+    client.add_organization("caller", n_portfolios=2, assets_per_portfolio=5)
+    client.add_organization("other", n_portfolios=3, assets_per_portfolio=10)
+
+    success = True
+    for endpoint in ENDPOINTS:
+        baseline = measure(client, endpoint, "caller")
+        # Grow everybody else's data a hundredfold; the caller's cost must not move
+        for i in range(100):
+            client.add_organization(f"bulk-{endpoint}-{i}", n_portfolios=2, assets_per_portfolio=10)
+        grown = measure(client, endpoint, "caller")
+
+        leaked = [row for row in grown[2] if row.get("organization_id", "caller") != "caller"
+                  or not str(row.get("id", "")).startswith("caller")]
+        if grown[:2] != baseline[:2] or grown[0] != 1 or leaked:
+            print(f"❌ {endpoint}: {baseline[0]} queries/{baseline[1]} rows before, "
+                  f"{grown[0]} queries/{grown[1]} rows after, {len(leaked)} foreign rows")
+            success = False
+        else:
+            print(f"✅ {endpoint}: 1 query, {grown[1]} rows regardless of other organizations")
+    return success
+
+
+def test_coalescing():
+    client = RecordingClient()
+    scoping.supabase = client
+    client.add_organization("caller", n_portfolios=2, assets_per_portfolio=1)
+    client.add_organization("other", n_portfolios=1, assets_per_portfolio=1)
+    client.latency = 0.05
+    reset_cache()
+
+    async def page_load():
+        return await asyncio.gather(*(portfolios.get_portfolios(org_id="caller") for _ in range(10)))
+
+    success = True
+    client.queries = 0
+    results = asyncio.run(page_load())
+    if client.queries != 1 or any(r != results[0] for r in results) or len({id(r) for r in results}) != 10:
+        print(f"❌ 10 concurrent GET /portfolios/: {client.queries} queries")
+        success = False
+    else:
+        print("✅ 10 concurrent GET /portfolios/: 1 query, each caller gets its own copy")
+
+    try:
+        asyncio.run(portfolios.get_portfolio("other-p0", org_id="caller"))
+        print("❌ GET /portfolios/{id} returned another organization's portfolio")
+        success = False
+    except HTTPException as e:
+        if e.status_code == 404:
+            print("✅ GET /portfolios/{id} of another organization: 404")
+        else:
+            print(f"❌ GET /portfolios/{{id}} of another organization: {e.status_code}")
+            success = False
+    return success
+
+
+def test_write_ownership():
+    client = RecordingClient()
+    scoping.supabase = client
+    client.add_organization("caller", n_portfolios=1, assets_per_portfolio=1)
+    client.add_organization("other", n_portfolios=1, assets_per_portfolio=1)
+    bill = EnergyBillCreate(
+        meter_id="m1", billing_period_start="2024-01-01", billing_period_end="2024-01-31",
+        consumption_kwh=100, emissions_kgco2e=20
+    )
+
+    writes = {
+        "POST /assets/ into another organization's portfolio": lambda: assets.create_asset(
+            AssetCreate(name="Mine", address="1 Test St", asset_type="office", portfolio_id="other-p0"),
+            current_user="u1", org_id="caller"),
+        "PUT /assets/{id} of another organization": lambda: assets.update_asset(
+            "other-p0-a0", AssetUpdate(name="Mine now"), current_user="u1", org_id="caller"),
+        "PUT /assets/{id} into another organization's portfolio": lambda: assets.update_asset(
+            "caller-p0-a0", AssetUpdate(portfolio_id="other-p0"), current_user="u1", org_id="caller"),
+        "POST /assets/{id}/bills of another organization": lambda: assets.ingest_bill(
+            "other-p0-a0", bill, current_user="u1", org_id="caller"),
+        "POST /assets/{id}/documents of another organization": lambda: assets.upload_document(
+            "other-p0-a0", "bill", BackgroundTasks(), UploadFile(io.BytesIO(b"bill"), filename="bill.txt"),
+            current_user="u1", org_id="caller"),
+        "GET /portfolios/{id}/summary of another organization": lambda: portfolios.get_portfolio_summary(
+            "other-p0", org_id="caller"),
+        "GET /portfolios/{id}/summary of an unknown portfolio": lambda: portfolios.get_portfolio_summary(
+            "missing", org_id="caller"),
+    }
+    success = True
+    for label, write in writes.items():
+        try:
+            asyncio.run(write())
+            print(f"❌ {label} was accepted")
+            success = False
+        except HTTPException as e:
+            if e.status_code == 404:
+                print(f"✅ {label}: 404")
+            else:
+                print(f"❌ {label}: {e.status_code} {e.detail}")
+                success = False
+    return success
+
+
+def test_invalidation():
+    client = RecordingClient()
+    scoping.supabase = client
+    client.add_organization("caller", n_portfolios=2, assets_per_portfolio=1)
+    reset_cache()
+
+    success = True
+    asyncio.run(portfolios.get_portfolios(org_id="caller"))
+    client.queries = 0
+    client.tables["portfolios"].append({"id": "caller-p9", "name": "caller-p9", "organization_id": "caller"})
+    cached = asyncio.run(portfolios.get_portfolios(org_id="caller"))
+    asyncio.run(scoping.invalidate_scope("portfolios", "caller"))
+    fresh = asyncio.run(portfolios.get_portfolios(org_id="caller"))
+    if client.queries != 1 or len(cached) != 2 or len(fresh) != 3:
+        print(f"❌ Write invalidation: {client.queries} queries, {len(cached)} then {len(fresh)} portfolios")
+        success = False
+    else:
+        print("✅ Repeated GET /portfolios/ served from cache; a write invalidates it")
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Two workers of one host: a message published by one reaches the other through the log
+        first, second = LocalBroker(directory), LocalBroker(directory)
+        received = []
+        second.subscribe("test", received.append)
+        asyncio.run(first.start())
+        asyncio.run(second.start())
+        first.publish("test", {"tags": ["portfolios:caller"]})
+        second._poll()
+        asyncio.run(first.stop())
+        asyncio.run(second.stop())
+        if received != [{"tags": ["portfolios:caller"]}]:
+            print(f"❌ Broker delivery between workers: {received}")
+            success = False
+        else:
+            print("✅ Broker delivers invalidations to other workers")
+
+        tier = SqliteCacheTier(os.path.join(directory, "cache.sqlite3"))
+        asyncio.run(tier.put("key", [{"id": 1}], time.time(), ["portfolios:caller"], 60))
+        hit = asyncio.run(tier.get("key"))
+        asyncio.run(tier.invalidate(["portfolios:caller"]))
+        if not hit or hit[0] != [{"id": 1}] or asyncio.run(tier.get("key")) is not None:
+            print("❌ Shared tier did not store or invalidate the entry")
+            success = False
+        else:
+            print("✅ Shared tier stores entries and drops them by tag")
+    return success
+
+if __name__ == "__main__":
+    print("Testing organization-scoped reads...")
+    success = test_scoping()
+    success = test_coalescing() and success
+    success = test_write_ownership() and success
+    success = test_invalidation() and success
+    sys.exit(0 if success else 1)
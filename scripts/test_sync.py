@@ -0,0 +1,162 @@
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Add the project root directory to Python path
+project_root = str(Path(__file__).parent.parent)
+sys.path.insert(0, project_root)
+
+from app.core import scoping
+from app.core.changes import parse_timestamp
+from app.core.config import settings
+from app.services import sync
+from app.services.sync import CursorExpired
+
+TIMESTAMP_COLUMNS = ("updated_at", "deleted_at")
+
+
+class SyncTable:
+    """Stand-in for a PostgREST table query with the filters, ordering and limit the sync pages use"""
+
+    def __init__(self, db, name):
+        self.db = db
+        self.name = name
+        self.filters = []
+        self.order_by = []
+        self.count = None
+
+    def select(self, columns):
+        return self
+
+    def _value(self, column, value):
+        return parse_timestamp(value) if column in TIMESTAMP_COLUMNS else value
+
+    def _filter(self, op):
+        def apply(column, value):
+            self.filters.append((column, op, self._value(column, value)))
+            return self
+        return apply
+
+    def __getattr__(self, name):
+        if name in ("eq", "gt", "lte"):
+            return self._filter(name)
+        raise AttributeError(name)
+
+    def order(self, columns):
+        self.order_by = columns.split(",")
+        return self
+
+    def limit(self, count):
+        self.count = count
+        return self
+
+    def _matches(self, row):
+        for column, op, value in self.filters:
+            if column.endswith("organization_id") and "organization_id" not in row:
+                # Embedded scope of assets: portfolios.organization_id
+                actual = next(p["organization_id"] for p in self.db.tables["portfolios"] if p["id"] == row["portfolio_id"])
+            else:
+                actual = self._value(column, row[column.split(".")[-1]])
+            if op == "eq" and not actual == value or op == "gt" and not actual > value or op == "lte" and not actual <= value:
+                return False
+        return True
+
+    def execute(self):
+        rows = [dict(row) for row in self.db.tables[self.name] if self._matches(row)]
+        rows.sort(key=lambda row: tuple(self._value(c, row[c]) for c in self.order_by))
+        self.db.queries += 1
+        return type("Response", (), {"data": rows[:self.count]})()
+
+
+class SyncClient:
+    def __init__(self):
+        self.tables = {"portfolios": [], "sync_tombstones": []}
+        self.queries = 0
+
+    def table(self, name):
+        return SyncTable(self, name)
+
+
+def stamp(seconds_ago):
+    # Postgres style: trailing zeros of the fraction dropped
+    value = (datetime.now(timezone.utc) - timedelta(seconds=seconds_ago)).replace(microsecond=120000)
+    return value.isoformat().replace(".120000", ".12")
+
+
+def drain(org_id, cursor, limit):
+    items, deleted, pages = [], [], 0
+    while True:
+        page = sync.fetch_changes("portfolios", org_id, cursor, limit)
+        items += page["items"]
+        deleted += page["deleted"]
+        cursor, pages = page["cursor"], pages + 1
+        if not page["has_more"]:
+            return items, deleted, cursor, pages
+
+
+def test_sync():
+    client = SyncClient()
+    scoping.supabase = client
+    bulk = stamp(600)
+    for i in range(7):
+        # Three rows written in one transaction share their timestamp
+        client.tables["portfolios"].append({
+            "id": f"p{i}", "name": f"Portfolio {i}", "organization_id": "caller",
+            "updated_at": bulk if i < 3 else stamp(500 - i)
+        })
+    client.tables["portfolios"].append({"id": "x0", "name": "Other", "organization_id": "other", "updated_at": stamp(400)})
+
+    success = True
+    # The full sync ran two minutes ago; the writes below happened since
+    lag = settings.SYNC_SAFETY_LAG_SECONDS
+    settings.SYNC_SAFETY_LAG_SECONDS = 120
+    items, deleted, cursor, pages = drain("caller", None, limit=2)
+    settings.SYNC_SAFETY_LAG_SECONDS = lag
+    ids = sorted(row["id"] for row in items)
+    if ids != [f"p{i}" for i in range(7)] or deleted:
+        print(f"❌ Full sync in pages of 2: got {ids}, {len(deleted)} deletions")
+        success = False
+    else:
+        print(f"✅ Full sync: 7 rows exactly once in {pages} pages, none of another organization")
+
+    client.tables["portfolios"][4]["updated_at"] = stamp(60)
+    client.tables["portfolios"][4]["name"] = "Renamed"
+    client.tables["portfolios"].append({"id": "p9", "name": "Too recent", "organization_id": "caller", "updated_at": stamp(0)})
+    client.tables["sync_tombstones"].append({
+        "id": "t1", "table_name": "portfolios", "row_id": "p5", "organization_id": "caller", "deleted_at": stamp(30)
+    })
+    client.tables["sync_tombstones"].append({
+        "id": "t2", "table_name": "assets", "row_id": "a1", "organization_id": "caller", "deleted_at": stamp(30)
+    })
+    client.queries = 0
+    items, deleted, cursor, pages = drain("caller", cursor, limit=500)
+    if [r["name"] for r in items] != ["Renamed"] or [d["id"] for d in deleted] != ["p5"]:
+        print(f"❌ Delta sync: {[r['id'] for r in items]} changed, {[d['id'] for d in deleted]} deleted")
+        success = False
+    else:
+        print(f"✅ Delta sync: 1 update and 1 deletion in {client.queries} queries; writes inside the safety lag wait")
+
+    items, deleted, cursor, pages = drain("caller", cursor, limit=500)
+    if items or deleted:
+        print(f"❌ Sync with nothing new returned {len(items)} rows, {len(deleted)} deletions")
+        success = False
+    else:
+        print("✅ Nothing changed: empty page")
+
+    old = sync.encode_cursor(sync.SyncCursor(
+        rows=(sync.EPOCH, ""),
+        deleted=(datetime.now(timezone.utc) - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS + 1), "")
+    ))
+    for since, expected, label in ((old, CursorExpired, "expired cursor"), ("not-a-cursor", ValueError, "malformed cursor")):
+        try:
+            sync.fetch_changes("portfolios", "caller", since, 500)
+            print(f"❌ {label} accepted")
+            success = False
+        except expected:
+            print(f"✅ {label} rejected")
+    return success
+
+if __name__ == "__main__":
+    print("Testing delta sync...")
+    success = test_sync()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,6 @@
+-- Coordinates for the map view (GET /api/v1/assets/map/*)
+
+alter table assets add column if not exists latitude double precision
+    check (latitude between -90 and 90);
+alter table assets add column if not exists longitude double precision
+    check (longitude between -180 and 180);
@@ -0,0 +1,16 @@
+-- Meter anomalies flagged by app/services/anomalies.py
+
+create table if not exists bill_anomalies (
+    id uuid primary key default gen_random_uuid(),
+    bill_id uuid not null references energy_bills(id) on delete cascade,
+    asset_id uuid not null references assets(id) on delete cascade,
+    meter_id text,
+    billing_period_start date not null,
+    anomaly_type text not null,
+    reason text not null,
+    score double precision,
+    detected_at timestamptz not null default now(),
+    unique (bill_id, anomaly_type)
+);
+
+create index if not exists bill_anomalies_asset_idx on bill_anomalies (asset_id, billing_period_start);
@@ -0,0 +1,21 @@
+-- Energy bills recorded against assets (POST /api/v1/assets/{asset_id}/bills)
+
+create table if not exists energy_bills (
+    id uuid primary key default gen_random_uuid(),
+    asset_id uuid not null references assets(id) on delete cascade,
+    document_id uuid references documents(id) on delete set null,
+    meter_id text,
+    provider text,
+    billing_period_start date not null,
+    billing_period_end date not null,
+    consumption_kwh double precision not null,
+    emissions_kgco2e double precision,
+    previous_reading double precision,
+    current_reading double precision,
+    total_amount double precision,
+    created_at timestamptz not null default now(),
+    updated_at timestamptz not null default now()
+);
+
+create index if not exists energy_bills_asset_period_idx
+    on energy_bills (asset_id, billing_period_start);
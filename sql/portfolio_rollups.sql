@@ -0,0 +1,87 @@
+-- Materialized roll-ups for portfolio and organization dashboards.
+-- Rows are maintained incrementally by apply_rollup_delta() from the API write
+-- paths and can be checked/rebuilt with scripts/rebuild_rollups.py.
+
+create table if not exists portfolio_rollups (
+    portfolio_id uuid primary key references portfolios(id) on delete cascade,
+    organization_id uuid not null references organizations(id) on delete cascade,
+    asset_count integer not null default 0,
+    floor_area double precision not null default 0,
+    assets_by_type jsonb not null default '{}'::jsonb,
+    tenant_count integer not null default 0,
+    occupied_area double precision not null default 0,
+    consumption_kwh double precision not null default 0,
+    emissions_kgco2e double precision not null default 0,
+    updated_at timestamptz not null default now()
+);
+
+create table if not exists organization_rollups (
+    organization_id uuid primary key references organizations(id) on delete cascade,
+    asset_count integer not null default 0,
+    floor_area double precision not null default 0,
+    assets_by_type jsonb not null default '{}'::jsonb,
+    tenant_count integer not null default 0,
+    occupied_area double precision not null default 0,
+    consumption_kwh double precision not null default 0,
+    emissions_kgco2e double precision not null default 0,
+    updated_at timestamptz not null default now()
+);
+
+-- Add two {"type": count} maps, dropping entries that reach zero
+create or replace function merge_type_counts(a jsonb, b jsonb) returns jsonb
+language sql immutable as $$
+    select coalesce(jsonb_object_agg(k, total), '{}'::jsonb)
+    from (
+        select k, sum(v)::integer as total
+        from (
+            select key as k, value::integer as v from jsonb_each_text(coalesce(a, '{}'::jsonb))
+            union all
+            select key as k, value::integer as v from jsonb_each_text(coalesce(b, '{}'::jsonb))
+        ) counts
+        group by k
+        having sum(v) <> 0
+    ) merged
+$$;
+
+-- Atomically add a delta to a portfolio roll-up and its organization roll-up
+create or replace function apply_rollup_delta(p_portfolio_id uuid, p_delta jsonb) returns void
+language plpgsql as $$
+declare
+    v_org uuid;
+begin
+    select organization_id into v_org from portfolios where id = p_portfolio_id;
+    if v_org is null then
+        return;
+    end if;
+
+    insert into portfolio_rollups (portfolio_id, organization_id)
+    values (p_portfolio_id, v_org)
+    on conflict (portfolio_id) do nothing;
+
+    insert into organization_rollups (organization_id)
+    values (v_org)
+    on conflict (organization_id) do nothing;
+
+    update portfolio_rollups set
+        asset_count = asset_count + coalesce((p_delta->>'asset_count')::integer, 0),
+        floor_area = floor_area + coalesce((p_delta->>'floor_area')::double precision, 0),
+        assets_by_type = merge_type_counts(assets_by_type, p_delta->'assets_by_type'),
+        tenant_count = tenant_count + coalesce((p_delta->>'tenant_count')::integer, 0),
+        occupied_area = occupied_area + coalesce((p_delta->>'occupied_area')::double precision, 0),
+        consumption_kwh = consumption_kwh + coalesce((p_delta->>'consumption_kwh')::double precision, 0),
+        emissions_kgco2e = emissions_kgco2e + coalesce((p_delta->>'emissions_kgco2e')::double precision, 0),
+        updated_at = now()
+    where portfolio_id = p_portfolio_id;
+
+    update organization_rollups set
+        asset_count = asset_count + coalesce((p_delta->>'asset_count')::integer, 0),
+        floor_area = floor_area + coalesce((p_delta->>'floor_area')::double precision, 0),
+        assets_by_type = merge_type_counts(assets_by_type, p_delta->'assets_by_type'),
+        tenant_count = tenant_count + coalesce((p_delta->>'tenant_count')::integer, 0),
+        occupied_area = occupied_area + coalesce((p_delta->>'occupied_area')::double precision, 0),
+        consumption_kwh = consumption_kwh + coalesce((p_delta->>'consumption_kwh')::double precision, 0),
+        emissions_kgco2e = emissions_kgco2e + coalesce((p_delta->>'emissions_kgco2e')::double precision, 0),
+        updated_at = now()
+    where organization_id = v_org;
+end
+$$;
@@ -0,0 +1,20 @@
+-- Outbox of post-signup provisioning work (profile + default organization),
+-- processed with retries by app/services/provisioning.py
+
+create table if not exists provisioning_jobs (
+    id uuid primary key default gen_random_uuid(),
+    user_id uuid not null unique,
+    payload jsonb not null default '{}'::jsonb,
+    status text not null default 'pending'
+        check (status in ('pending', 'running', 'succeeded', 'failed')),
+    attempts integer not null default 0,
+    next_attempt_at timestamptz not null default now(),
+    last_error text,
+    created_at timestamptz not null default now(),
+    updated_at timestamptz not null default now(),
+    completed_at timestamptz
+);
+
+create index if not exists provisioning_jobs_due_idx
+    on provisioning_jobs (next_attempt_at)
+    where status in ('pending', 'running');
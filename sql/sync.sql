@@ -0,0 +1,69 @@
+-- Change tracking for the delta-sync endpoints (app/services/sync.py) and the
+-- local read replica (app/core/replica.py):
+-- database-assigned updated_at on every write, an index to page through it,
+-- and tombstones for deleted rows
+
+create or replace function sync_touch_updated_at() returns trigger as $$
+begin
+    -- The database clock, not the API server's, so cursors compare like with like
+    new.updated_at = now();
+    return new;
+end;
+$$ language plpgsql;
+
+create table if not exists sync_tombstones (
+    id uuid primary key default gen_random_uuid(),
+    table_name text not null,
+    row_id uuid not null,
+    -- Null when the parent was deleted in the same statement (cascade); the
+    -- parent's own tombstone covers its children
+    organization_id uuid,
+    deleted_at timestamptz not null default now()
+);
+
+create index if not exists sync_tombstones_org_idx
+    on sync_tombstones (organization_id, table_name, deleted_at, id);
+
+create or replace function sync_record_tombstone() returns trigger as $$
+declare
+    org uuid;
+begin
+    if tg_table_name = 'organizations' then
+        org := old.id;
+    elsif tg_table_name in ('portfolios', 'profiles') then
+        org := old.organization_id;
+    elsif tg_table_name = 'assets' then
+        select organization_id into org from portfolios where id = old.portfolio_id;
+    else
+        select p.organization_id into org
+        from assets a join portfolios p on p.id = a.portfolio_id
+        where a.id = old.asset_id;
+    end if;
+    insert into sync_tombstones (table_name, row_id, organization_id) values (tg_table_name, old.id, org);
+    return old;
+end;
+$$ language plpgsql;
+
+do $$
+declare
+    t text;
+begin
+    foreach t in array array['organizations', 'profiles', 'portfolios', 'assets', 'asset_tenants', 'asset_documents'] loop
+        execute format('drop trigger if exists sync_touch_updated_at on %I', t);
+        execute format(
+            'create trigger sync_touch_updated_at before insert or update on %I '
+            'for each row execute function sync_touch_updated_at()', t
+        );
+        execute format('drop trigger if exists sync_record_tombstone on %I', t);
+        execute format(
+            'create trigger sync_record_tombstone after delete on %I '
+            'for each row execute function sync_record_tombstone()', t
+        );
+        execute format('create index if not exists %I on %I (updated_at, id)', t || '_sync_idx', t);
+    end loop;
+end;
+$$;
+
+-- Tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS can be purged (e.g. daily
+-- with pg_cron); clients with an older cursor are told to resync from scratch:
+-- delete from sync_tombstones where deleted_at < now() - interval '30 days';